@@ -0,0 +1,66 @@
+"""Compare the per query cost of crowfliesdistance and HaversineHeuristic.
+
+Both sides use the same scales (heuristics.cost_scales of the roads), computed
+before the timing: only the way the heuristic is evaluated differs.
+
+Run from tp1/: python -m benchmarks.bench_heuristics
+"""
+
+import random
+import time
+
+from src import routing
+from src.routing.heuristics import component_scales
+from src.Town import Town
+
+
+def time_it(function, repeat):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        function()
+    return (time.perf_counter() - start) / repeat
+
+
+def bench_all_pairs(towns, heuristic):
+    """Run A* and greedy search on every pair of towns"""
+    pairs = [(a, b) for a in towns.values() for b in towns.values()]
+    for town in towns.values():
+        component_scales(town)  # Memoised before the timing, like the provider
+    searches = (("A*", routing.a_star), ("Gloutonne", routing.greedy_search))
+    for name, search in searches:
+        scalar = time_it(lambda: [search(a, b, 0) for a, b in pairs], 1)
+        table = time_it(
+            lambda: [search(a, b, 0, heuristic=heuristic) for a, b in pairs], 1
+        )
+        print(
+            f"{name:10} {len(pairs)} requêtes:"
+            f" crowfliesdistance {scalar / len(pairs) * 1e6:8.1f}µs"
+            f" / table {table / len(pairs) * 1e6:8.1f}µs par requête"
+            f" ({scalar / table:.2f}x)"
+        )
+
+
+def bench_goal_vector(n, repeat=5):
+    """Heuristic for every town of a random n town graph towards one goal"""
+    rng = random.Random(0)
+    towns = {
+        i: Town(i, str(i), rng.uniform(42, 51), rng.uniform(-4.5, 8)) for i in range(n)
+    }
+    town_list = list(towns.values())
+    goal = town_list[0]
+    heuristic = routing.HaversineHeuristic.from_towns(towns, pairwise_limit=0)
+    scalar = time_it(
+        lambda: [routing.crowfliesdistance(town, goal) for town in town_list], repeat
+    )
+    vector = time_it(lambda: heuristic.distances_to(goal), repeat)
+    print(
+        f"{n:8} villes: crowfliesdistance {scalar * 1e3:8.2f}ms"
+        f" / vecteur NumPy {vector * 1e3:8.2f}ms ({scalar / vector:.0f}x)"
+    )
+
+
+if __name__ == "__main__":
+    towns, roads = routing.load_graph()
+    bench_all_pairs(towns, routing.HaversineHeuristic.from_towns(towns, roads))
+    for n in (1_000, 10_000, 100_000):
+        bench_goal_vector(n)
@@ -0,0 +1,140 @@
+"""Memory used by the graph objects and by the search trees.
+
+Compares, on random graphs of increasing size:
+- Town/Road objects with __slots__ against the same classes with a __dict__,
+- a linked Node tree (what search.ucs_tree returns) against the parent
+  pointer arrays of a SearchTree and against plain Python lists.
+
+Run from tp1/: python -m benchmarks.bench_memory
+"""
+
+import random
+import tracemalloc
+
+from src import routing
+from src.Node import Node
+from src.Road import Road
+from src.routing.csr_search import shortest_path_tree
+from src.Town import Town
+
+
+class DictTown:
+    def __init__(self, dept_id, name, latitude, longitude):
+        self.dept_id = dept_id
+        self.name = name
+        self.latitude = latitude
+        self.longitude = longitude
+        self.neighbours = dict()
+
+
+class DictRoad:
+    def __init__(self, town1, town2, distance, time):
+        self.town1 = town1
+        self.town2 = town2
+        self.distance = distance
+        self.time = time
+
+
+class DictNode:
+    def __init__(self, state, parent=None, road_to_parent=None):
+        self.state = state
+        self.path_cost = float(0)
+        self.parent = parent
+        self.road_to_parent = road_to_parent
+
+
+def measure(function):
+    """Return (result, bytes still allocated by function once it returned)"""
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    result = function()
+    after = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return result, after - before
+
+
+def random_edges(n, rng):
+    """A path through all towns plus 2n random roads, so everything is reachable"""
+    edges = [(i, i + 1) for i in range(n - 1)]
+    edges += [(rng.randrange(n), rng.randrange(n)) for _ in range(2 * n)]
+    return [(a, b, rng.randint(10, 200), rng.randint(10, 150)) for a, b in edges]
+
+
+def build_objects(n, edges, town_type, road_type, rng):
+    towns = [
+        town_type(i, f"Ville {i}", rng.uniform(42, 51), rng.uniform(-4.5, 8))
+        for i in range(n)
+    ]
+    roads = []
+    for a, b, distance, time in edges:
+        road = road_type(towns[a], towns[b], distance, time)
+        towns[a].neighbours[towns[b]] = road
+        towns[b].neighbours[towns[a]] = road
+        roads.append(road)
+    return towns, roads
+
+
+def linked_tree(tree, node_type):
+    """Node per reached town, like ucs_tree, from parent pointer arrays"""
+    nodes = [None] * len(tree)
+    for town in sorted(range(len(tree)), key=tree.path_costs.__getitem__):
+        if not tree.reached(town):
+            continue
+        parent = tree.parent[town]
+        node = node_type(town, None if parent == -1 else nodes[parent])
+        node.road_to_parent = tree.parent_road[town]
+        node.path_cost = tree.path_costs[town]
+        nodes[town] = node
+    return nodes
+
+
+def report(label, compact, reference):
+    print(
+        f"  {label:28} {compact / 2**20:8.1f} Mo"
+        f" contre {reference / 2**20:8.1f} Mo ({reference / compact:.1f}x)"
+    )
+
+
+def bench(n, seed=0):
+    rng = random.Random(seed)
+    edges = random_edges(n, rng)
+    print(f"{n} villes, {len(edges)} routes")
+
+    _, slots = measure(lambda: build_objects(n, edges, Town, Road, random.Random(1)))
+    _, legacy = measure(
+        lambda: build_objects(n, edges, DictTown, DictRoad, random.Random(1))
+    )
+    report("Town/Road __slots__/__dict__", slots, legacy)
+
+    graph = routing.CSRGraph.from_edges(
+        list(range(n)),
+        [f"Ville {i}" for i in range(n)],
+        [45.0] * n,
+        [2.0] * n,
+        *zip(*edges),
+    )
+    path_costs, parent, parent_road = shortest_path_tree(graph, 0, 0)
+    tree = routing.SearchTree(n)
+    tree.path_costs[:] = path_costs
+    tree.parent[:] = parent
+    tree.parent_road[:] = parent_road
+
+    _, slot_nodes = measure(lambda: linked_tree(tree, Node))
+    _, dict_nodes = measure(lambda: linked_tree(tree, DictNode))
+    report("Node __slots__/__dict__", slot_nodes, dict_nodes)
+
+    _, arrays = measure(lambda: routing.SearchTree(n))
+    _, lists = measure(
+        lambda: [
+            tree.path_costs.tolist(),
+            tree.parent.tolist(),
+            tree.parent_road.tolist(),
+        ]
+    )
+    report("SearchTree/Node __slots__", arrays, slot_nodes)
+    report("SearchTree/listes", arrays, lists)
+
+
+if __name__ == "__main__":
+    for n in (10_000, 100_000, 300_000):
+        bench(n)
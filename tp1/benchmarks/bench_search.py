@@ -0,0 +1,151 @@
+"""Scaling of the search algorithms on synthetic road networks.
+
+For every size, a random network is generated once under data/synthetic/
+(see src/routing/synthetic.py) and loaded through its binary snapshot. Each
+algorithm then answers the same fixed set of random queries, and the table
+reports per query averages of the towns expanded, the peak frontier size
+(priority queue searches only), the time, and the peak memory allocated
+during a search (measured with tracemalloc on the first few queries).
+
+The informed searches (dfs_iter, greedy, a_star) get a HaversineHeuristic,
+or with --heuristic alt an ALTHeuristic built for the network (its build
+time is printed apart). Iterative deepening explores the graph again at
+each depth it tries: with the straight line bound its long queries on 10^5
+towns take minutes, while the landmark bounds of ALT leave it a few depths.
+
+Run from tp1/: python -m benchmarks.bench_search --towns 1000 10000 100000
+"""
+
+import argparse
+import os
+import random
+import time
+import tracemalloc
+
+from src import routing
+from src.routing import csr_search, synthetic
+from src.routing.graph import DATA_DIR
+
+SYNTHETIC_DIR = os.path.join(DATA_DIR, "synthetic")
+
+
+def search_function(search, informed=False, priority_queue=False):
+    """Uniform signature (graph, start, end, cost_type, visitor, heuristic, frontier)"""
+
+    def run(graph, start, end, cost_type, visitor, heuristic, frontier):
+        options = dict()
+        if informed:
+            options["heuristic"] = heuristic
+        if priority_queue:
+            options["frontier"] = frontier
+        return search(graph, start, end, cost_type, visitor, **options)
+
+    run.priority_queue = priority_queue
+    return run
+
+
+algorithms = {
+    "bfs": search_function(csr_search.bfs),
+    "dfs": search_function(csr_search.dfs),
+    "dfs_iter": search_function(csr_search.dfs_iter, informed=True),
+    "ucs": search_function(csr_search.ucs, priority_queue=True),
+    "greedy": search_function(csr_search.greedy_search, True, True),
+    "a_star": search_function(csr_search.a_star, True, True),
+}
+
+
+def load_network(n, k=4, seed=0):
+    """Generate (once) and open the synthetic network of n towns"""
+    directory = os.path.join(SYNTHETIC_DIR, f"{n}_k{k}_s{seed}")
+    towns_path = os.path.join(directory, "towns.csv")
+    roads_path = os.path.join(directory, "roads.csv")
+    if not (os.path.exists(towns_path) and os.path.exists(roads_path)):
+        synthetic.write_csv(directory, *synthetic.generate(n, k, seed))
+    return routing.open_graph(
+        os.path.join(directory, "snapshot"), towns_path, roads_path, recompile=True
+    )
+
+
+def random_queries(n, count, seed=0):
+    rng = random.Random(seed)
+    return [(rng.randrange(n), rng.randrange(n)) for _ in range(count)]
+
+
+def bench_algorithm(graph, run, queries, cost_type, heuristic, memory_queries):
+    expanded = peak = 0
+    elapsed = 0.0
+    for start, end in queries:
+        visitor = routing.CountingVisitor()
+        frontier = routing.HeapQueue()
+        begin = time.perf_counter()
+        run(graph, start, end, cost_type, visitor, heuristic, frontier)
+        elapsed += time.perf_counter() - begin
+        expanded += visitor.visits
+        peak += frontier.peak_size
+    memory = 0
+    for start, end in queries[:memory_queries]:
+        tracemalloc.start()
+        run(graph, start, end, cost_type, routing.NullVisitor(), heuristic, None)
+        memory = max(memory, tracemalloc.get_traced_memory()[1])
+        tracemalloc.stop()
+    count = len(queries)
+    return {
+        "expanded": expanded / count,
+        "peak": peak / count if run.priority_queue else None,
+        "time": elapsed / count,
+        "memory": memory,
+    }
+
+
+def bench(n, names, count, cost_type, memory_queries, seed=0, provider="haversine"):
+    begin = time.perf_counter()
+    graph = load_network(n, seed=seed)
+    print(
+        f"\n{graph.n_towns} villes, {graph.n_roads} routes"
+        f" (chargées en {time.perf_counter() - begin:.1f}s),"
+        f" {count} requêtes, coût {routing.costs[cost_type]}"
+    )
+    if provider == "alt":
+        begin = time.perf_counter()
+        heuristic = routing.ALTHeuristic.build(graph)
+        print(f"repères ALT construits en {time.perf_counter() - begin:.1f}s")
+    else:
+        heuristic = routing.HaversineHeuristic.from_csr(graph)
+    print(
+        f"{'algorithme':10} {'développées':>12} {'pic frontière':>14}"
+        f" {'ms/requête':>11} {'mémoire Mo':>11}"
+    )
+    queries = random_queries(graph.n_towns, count, seed)
+    for name in names:
+        result = bench_algorithm(
+            graph, algorithms[name], queries, cost_type, heuristic, memory_queries
+        )
+        peak = "-" if result["peak"] is None else f"{result['peak']:.0f}"
+        print(
+            f"{name:10} {result['expanded']:12.0f} {peak:>14}"
+            f" {result['time'] * 1e3:11.2f} {result['memory'] / 2**20:11.2f}"
+        )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--towns", type=int, nargs="+", default=[1_000, 10_000])
+    parser.add_argument("--algorithms", nargs="+", default=list(algorithms))
+    parser.add_argument("--queries", type=int, default=50)
+    parser.add_argument("--cost", type=int, default=routing.COST_DISTANCE)
+    parser.add_argument("--memory-queries", type=int, default=5)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument(
+        "--heuristic", choices=("haversine", "alt"), default="haversine"
+    )
+    args = parser.parse_args()
+    for n in args.towns:
+        bench(
+            n,
+            args.algorithms,
+            args.queries,
+            args.cost,
+            args.memory_queries,
+            args.seed,
+            args.heuristic,
+        )
@@ -0,0 +1,138 @@
+"""Load generator for the route server: latency percentiles under concurrency.
+
+`--concurrency` clients, each on its own keep-alive connection, send
+`--requests` route queries in total, drawn from a fixed set of `--distinct`
+random queries so that identical queries overlap and get coalesced. The
+report gives the throughput, the p50/p90/p99/max latencies and the server
+counters. Without --port or --unix, a server with `--workers` processes is
+started in this process on a free port.
+
+Run from tp1/: python -m benchmarks.bench_server --requests 2000 --concurrency 32
+"""
+
+import argparse
+import asyncio
+import json
+import random
+import statistics
+import time
+
+from src.routing import server as route_server
+from src.routing.snapshot import open_graph
+
+
+async def fetch(reader, writer, target):
+    """Send one keep-alive GET and return (status, decoded JSON body)"""
+    writer.write(
+        f"GET {target} HTTP/1.1\r\nHost: itineria\r\nConnection: keep-alive\r\n\r\n".encode()
+    )
+    await writer.drain()
+    status = int((await reader.readline()).split()[1])
+    length = 0
+    while True:
+        header = await reader.readline()
+        if header in (b"\r\n", b""):
+            break
+        name, _, value = header.decode("latin-1").partition(":")
+        if name.lower() == "content-length":
+            length = int(value)
+    return status, json.loads(await reader.readexactly(length))
+
+
+async def connect(args):
+    if args.unix is not None:
+        return await asyncio.open_unix_connection(args.unix)
+    return await asyncio.open_connection(args.host, args.port)
+
+
+async def client(args, targets, latencies, failures):
+    reader, writer = await connect(args)
+    try:
+        while targets:
+            target = targets.pop()
+            begin = time.perf_counter()
+            status, body = await fetch(reader, writer, target)
+            latencies.append(time.perf_counter() - begin)
+            if status != 200:
+                failures.append(body)
+    finally:
+        writer.close()
+
+
+def make_targets(dept_ids, args):
+    rng = random.Random(args.seed)
+    distinct = [
+        f"/route?start={rng.choice(dept_ids)}&end={rng.choice(dept_ids)}"
+        f"&algorithm={args.algorithm}&cost={args.cost}"
+        + ("" if args.budget is None else f"&budget={args.budget}")
+        for _ in range(args.distinct)
+    ]
+    return [rng.choice(distinct) for _ in range(args.requests)]
+
+
+def percentile(values, fraction):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+
+async def run(args):
+    local = None
+    if args.port is None and args.unix is None:
+        local = route_server.create_server(args.workers)
+        # Warm every worker up before measuring
+        await asyncio.gather(
+            *(
+                asyncio.get_running_loop().run_in_executor(
+                    local.executor, time.sleep, 0.05
+                )
+                for _ in range(args.workers)
+            )
+        )
+        listener = await local.start(args.host, 0)
+        args.port = listener.sockets[0].getsockname()[1]
+    dept_ids = open_graph().dept_ids.tolist()
+    targets = make_targets(dept_ids, args)
+    latencies, failures = [], []
+    begin = time.perf_counter()
+    await asyncio.gather(
+        *(client(args, targets, latencies, failures) for _ in range(args.concurrency))
+    )
+    elapsed = time.perf_counter() - begin
+
+    reader, writer = await connect(args)
+    _, stats = await fetch(reader, writer, "/stats")
+    writer.close()
+    if local is not None:
+        listener.close()
+        local.executor.shutdown()
+
+    print(
+        f"{len(latencies)} requêtes, {args.concurrency} clients,"
+        f" {args.distinct} requêtes distinctes: {len(latencies) / elapsed:.0f} req/s"
+    )
+    print(
+        f"latence p50 {percentile(latencies, 0.5) * 1e3:.2f}ms"
+        f"  p90 {percentile(latencies, 0.9) * 1e3:.2f}ms"
+        f"  p99 {percentile(latencies, 0.99) * 1e3:.2f}ms"
+        f"  max {max(latencies) * 1e3:.2f}ms"
+        f"  (moyenne {statistics.mean(latencies) * 1e3:.2f}ms)"
+    )
+    print("serveur:", ", ".join(f"{name} {value}" for name, value in stats.items()))
+    if failures:
+        print(f"{len(failures)} erreurs, par exemple {failures[0]}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, help="existing server to load")
+    parser.add_argument("--unix", help="existing server on a Unix socket")
+    parser.add_argument("-w", "--workers", type=int, default=2)
+    parser.add_argument("-n", "--requests", type=int, default=2000)
+    parser.add_argument("-c", "--concurrency", type=int, default=32)
+    parser.add_argument("--distinct", type=int, default=500)
+    parser.add_argument("--algorithm", default="a_star")
+    parser.add_argument("--cost", default="distance")
+    parser.add_argument("--budget", type=int)
+    parser.add_argument("--seed", type=int, default=0)
+    asyncio.run(run(parser.parse_args()))
@@ -0,0 +1,83 @@
+"""Nearest town lookups: TownIndex against a brute force scan.
+
+For random towns over France (half of them packed around a few cities,
+like real settlements), reports the time to build the index, the latency
+of a single nearest town query, and the throughput of bulk snapping, with
+the brute force haversine argmin of every town as reference. The answers
+of both methods are compared on the first points.
+
+Run from tp1/: python -m benchmarks.bench_spatial --towns 1000 100000 1000000
+"""
+
+import argparse
+import statistics
+import time
+
+import numpy as np
+
+from src.routing import synthetic
+from src.routing.spatial import TownIndex
+
+
+def random_towns(n, rng):
+    latitudes = rng.uniform(*synthetic.LATITUDES, n)
+    longitudes = rng.uniform(*synthetic.LONGITUDES, n)
+    cities = rng.integers(0, n, 20)
+    packed = rng.integers(0, len(cities), n // 2)
+    latitudes[: n // 2] = latitudes[cities][packed] + rng.normal(0, 0.1, n // 2)
+    longitudes[: n // 2] = longitudes[cities][packed] + rng.normal(0, 0.1, n // 2)
+    return latitudes, longitudes
+
+
+def brute_force(latitudes, longitudes, latitude, longitude):
+    return int(
+        np.argmin(synthetic.haversine_pairs(latitude, longitude, latitudes, longitudes))
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--towns", type=int, nargs="+", default=[1000, 100_000])
+    parser.add_argument("--queries", type=int, default=1000)
+    parser.add_argument("--points", type=int, default=1_000_000, help="bulk snap")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(args.seed)
+    for n in args.towns:
+        latitudes, longitudes = random_towns(n, rng)
+        begin = time.perf_counter()
+        index = TownIndex(latitudes, longitudes)
+        build = time.perf_counter() - begin
+        index.nearest(0.0, 0.0)  # Lists for the single point queries
+
+        queries = random_towns(args.queries, rng)
+        single, brute = [], []
+        for latitude, longitude in zip(*queries):
+            begin = time.perf_counter()
+            row = index.nearest(latitude, longitude)
+            single.append(time.perf_counter() - begin)
+            begin = time.perf_counter()
+            expected = brute_force(latitudes, longitudes, latitude, longitude)
+            brute.append(time.perf_counter() - begin)
+            if row != expected:
+                print(f"différence pour ({latitude}, {longitude}): {row} {expected}")
+
+        points = random_towns(args.points, rng)
+        begin = time.perf_counter()
+        index.snap(*points)
+        bulk = time.perf_counter() - begin
+
+        print(f"{n} villes: construction {build:.2f}s")
+        print(
+            f"  requête unique: {statistics.median(single) * 1e6:.0f}us"
+            f" (force brute {statistics.median(brute) * 1e6:.0f}us)"
+        )
+        print(
+            f"  {args.points} points en bloc: {bulk:.2f}s,"
+            f" {args.points / bulk:.0f} points/s"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1 @@
+"""Makes the src package importable from the tests, run from tp1/: pytest tests"""
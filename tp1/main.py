@@ -1,284 +1,32 @@
 import tkinter as tk
 from tkinter import ttk
-import csv
+from tkinter import filedialog
+import os
 import random
-from queue import Queue
-from queue import LifoQueue
-from queue import PriorityQueue
-import math
 import time
 
-from src.Node import Node
-from src.Town import Town
-from src.Road import Road
+from src import routing
+from src.routing import costs
+from src.routing import search_algorithms
+from src.routing.alternatives import route_roads
 
 
-search_algorithms = (
-    "Parcours en largeur",
-    "Parcours en profondeur",
-    "Parcours en profondeur itératif",
-    "Recherche à coût Uniforme",
-    "Recherche gloutonne",
-    "A*",
-)
-costs = ("distance", "temps", "points")
-
 town_color = "lightcoral"
 road_color = "lightgreen"
 path_color = "red"
 visited_color = "blue"
+redraw_batch_size = 5  # Number of visited towns between two canvas redraws
+collect_stats = False  # Show the search statistics (bypasses the route cache)
+trace_dir = None  # Directory where the expansion order of each search is saved
+alternative_colors = ("darkorange", "purple", "deepskyblue", "saddlebrown")
+alternative_method = "plateaus"  # "yen", "plateaus" or "penalties"
 
 
-def mark_town_visited(town):
-    """Mark a town as visited by changing its color to blue"""
-    if town in town_circles:
-        canvas1.itemconfig(town_circles[town], fill=visited_color)
-        canvas1.update()  # Force GUI update
-
-
-def deg2rad(deg):
-    return deg * (math.pi / 180)
-
-
-# Distance vol d'oiseau
-def crowfliesdistance(town1, town2):
-    lat1 = town1.latitude
-    lon1 = town1.longitude
-    lat2 = town2.latitude
-    lon2 = town2.longitude
-
-    R = 6371  # Radius of the earth in km
-    dLat = deg2rad(lat2 - lat1)
-    dLon = deg2rad(lon2 - lon1)
-    a = math.sin(dLat / 2) * math.sin(dLat / 2) + math.cos(deg2rad(lat1)) * math.cos(
-        deg2rad(lat2)
-    ) * math.sin(dLon / 2) * math.sin(dLon / 2)
-    c = 2 * math.atan2(math.sqrt(a), math.sqrt(1 - a))
-
-    return R * c
-    # distance in km
-
-
-# A-Star
-def a_star(start_town, end_town, cost_type):
-    start_node = Node(start_town)
-
-    # Initialize heuristic for start node
-    start_node.path_cost = crowfliesdistance(start_town, end_town)
-
-    frontier = PriorityQueue(maxsize=0)
-    frontier.put((start_node.path_cost, start_node))
-    explored = set()
-
-    # Track actual path costs
-    actual_costs = {start_node.state: 0}
-
-    while not frontier.empty():
-        node_cost, node = (
-            frontier.get()
-        )  # get the node with the lowest cost (heuristic + actual)
-        mark_town_visited(node.state)
-
-        if node.state == end_town:
-            node.path_cost = actual_costs[node.state]  # Return actual path cost
-            return node
-
-        if node.state in explored:
-            continue
-
-        explored.add(node.state)
-        for neighbour, road in node.state.neighbours.items():
-            child = Node(neighbour, node, road)
-            if child.state in explored:
-                continue
-
-            if cost_type == 0:  # distance
-                new_actual_cost = actual_costs[node.state] + road.distance
-            elif cost_type == 1:  # time
-                new_actual_cost = actual_costs[node.state] + road.time
-            else:
-                new_actual_cost = actual_costs[node.state] + 1
-            actual_costs[child.state] = new_actual_cost
-
-            # Use heuristic from child to goal for priority + actual path cost
-            # Same as greedy but the heuristic is not alone == find the optimal path
-            child.path_cost = crowfliesdistance(neighbour, end_town) + new_actual_cost
-            frontier.put((child.path_cost, child))
-
-
-# Recherche gloutonne
-def greedy_search(start_town, end_town, cost_type):
-    start_node = Node(start_town)
-
-    # Initialize heuristic for start node
-    start_node.path_cost = crowfliesdistance(start_town, end_town)
-
-    frontier = PriorityQueue(maxsize=0)
-    frontier.put((start_node.path_cost, start_node))
-    explored = set()
-
-    # Track actual path costs
-    actual_costs = {start_node.state: 0}
-
-    while not frontier.empty():
-        node_cost, node = frontier.get()  # get the node with the lowest heuristic cost
-        mark_town_visited(node.state)
-
-        if node.state == end_town:
-            node.path_cost = actual_costs[node.state]  # Return actual path cost
-            return node
-
-        if node.state in explored:
-            continue
-
-        explored.add(node.state)
-        for neighbour, road in node.state.neighbours.items():
-            child = Node(neighbour, node, road)
-            if child.state in explored:
-                continue
-
-            if cost_type == 0:  # distance
-                new_actual_cost = actual_costs[node.state] + road.distance
-            elif cost_type == 1:  # time
-                new_actual_cost = actual_costs[node.state] + road.time
-            else:
-                new_actual_cost = actual_costs[node.state] + 1
-            actual_costs[child.state] = new_actual_cost
-
-            # Use heuristic from child to goal for priority
-            child.path_cost = crowfliesdistance(neighbour, end_town)
-            frontier.put((child.path_cost, child))
-
-    return None  # No path found (greedy is not complete)
-
-
-# Parcours à coût uniforme
-def ucs(start_town, end_town, cost_type):
-    start_node = Node(start_town)
-    frontier = PriorityQueue(maxsize=0)
-    frontier.put((start_node.path_cost, start_node))
-    explored = set()
-
-    # Track costs in frontier
-    frontier_costs = {start_node.state: start_node.path_cost}
-
-    while not frontier.empty():
-        node_cost, node = frontier.get()  # get the node with the lowest cost
-        mark_town_visited(node.state)
-
-        # skip if better path found
-        if node.state in explored or node_cost > frontier_costs.get(node.state):
-            continue
-
-        if node.state == end_town:
-            return node
-
-        explored.add(node.state)
-        for neighbour, road in node.state.neighbours.items():
-            child = Node(neighbour, node, road)
-
-            if cost_type == 0:  # distance
-                child.path_cost = node.path_cost + road.distance
-            elif cost_type == 1:  # time
-                child.path_cost = node.path_cost + road.time
-            else:
-                child.path_cost = node.path_cost + 1
-
-            if child.state not in explored:
-                if (
-                    child.state not in frontier_costs
-                    or child.path_cost < frontier_costs[child.state]
-                ):
-                    frontier_costs[child.state] = child.path_cost
-                    frontier.put((child.path_cost, child))
-
-
-def dfs_recursive(node, end_town, explored, cost_type, depth_limit=None):
-    mark_town_visited(node.state)
-
-    if node.state == end_town:
-        return node
-
-    if depth_limit == 0:
-        return None
-
-    explored.add(node.state)
-    for neighbour, road in node.state.neighbours.items():
-        if neighbour not in explored:
-            child = Node(neighbour, node, road)
-
-            if cost_type == 0:  # distance
-                child.path_cost = node.path_cost + road.distance
-            elif cost_type == 1:  # time
-                child.path_cost = node.path_cost + road.time
-            else:
-                child.path_cost = node.path_cost + 1
-
-            if depth_limit is not None:
-                result = dfs_recursive(
-                    child, end_town, explored, cost_type, depth_limit - 1
-                )
-            else:
-                result = dfs_recursive(child, end_town, explored, cost_type)
-            if result:
-                return result
-
-
-# Parcours en profondeur itératif
-def dfs_iter(start_town, end_town, cost_type):
-    start_node = Node(start_town)
-    depth = 0
-    while True:
-        explored = set()
-        result = dfs_recursive(start_node, end_town, explored, cost_type, depth)
-        if result:
-            return result
-        depth += 1
-
-
-# Parcours en profondeur récursif
-def dfs(start_town, end_town, cost_type):
-    start_node = Node(start_town)
-    explored = set()
-    return dfs_recursive(start_node, end_town, explored, cost_type)
-
-
-# Parcours en largeur
-def bfs(start_town, end_town, cost_type):
-    start_node = Node(start_town)
-    frontier = Queue(maxsize=0)
-    frontier.put(start_node)
-    explored = set()
-
-    while not frontier.empty():
-        node = frontier.get()
-        mark_town_visited(node.state)
-
-        if node.state == end_town:
-            return node
-
-        if node.state not in explored:
-            explored.add(node.state)
-            # print("Exploring:", node.state.name)
-            for neighbour, road in node.state.neighbours.items():
-                child = Node(neighbour, node, road)
-
-                if cost_type == 0:  # distance
-                    child.path_cost = node.path_cost + road.distance
-                elif cost_type == 1:  # time
-                    child.path_cost = node.path_cost + road.time
-                else:
-                    child.path_cost = node.path_cost + 1
-
-                # print("  Child:", child.state.name, "Cost:", child.path_cost)
-                frontier.put(child)
-
-
-def display_path(path):
+def display_path(path, color=path_color):
     current_node = path
     # print("current_node:", current_node.state.name)
     while current_node.parent is not None:
-        canvas1.itemconfig(road_lines[current_node.road_to_parent], fill=path_color)
+        canvas1.itemconfig(road_lines[current_node.road_to_parent], fill=color)
         # print(
         #     current_node.road_to_parent.town1.name,
         #     current_node.road_to_parent.town2.name,
@@ -286,32 +34,78 @@ def display_path(path):
         current_node = current_node.parent
 
 
-def run_search():
-    button_run["state"] = tk.DISABLED
+def alternative_routes(path, start_city, end_city, cost_type):
+    """Other routes than path, as many as the spinbox asks for (none by default)"""
+    route_count = int(spinbox_routes.get())
+    if route_count <= 1:
+        return []
+    alternatives = routing.RouteAlternatives(start_city, end_city, cost_type)
+    routes = routing.alternative_methods[alternative_method](alternatives, route_count)
+    # path is drawn on top by run_search; it is not always the best route
+    # (dfs, greedy...), so it is looked for among the routes
+    path_roads = route_roads(path)
+    routes = [route for route in routes if route_roads(route) != path_roads]
+    return routes[: route_count - 1]
+
+
+def stats_text(stats):
+    """Counters of instrumented_search, for label_stats"""
+    text = f"Villes explorées: {stats['expanded']}, ajoutées: {stats['generated']}"
+    if not collect_stats:
+        return text
+    times = ", ".join(
+        f"{name} {stats[key] * 1e3:.1f}ms"
+        for name, key in (
+            ("total", "total_time"),
+            ("heuristique", "heuristic_time"),
+            ("file", "queue_time"),
+            ("affichage", "visitor_time"),
+            ("expansion", "expansion_time"),
+        )
+    )
+    return (
+        f"{text}, doublons: {stats['duplicate_pushes']}"
+        f"\nFrontière max: {stats['max_frontier']},"
+        f" appels à l'heuristique: {stats['heuristic_calls']}"
+        f"\nTemps: {times}"
+    )
+
+
+def reset_colors():
     # Reset all roads and towns to normal colors
     for road in roads:
         canvas1.itemconfig(road_lines[road], fill=road_color)
     for town in towns.values():
         canvas1.itemconfig(town_circles[town], fill=town_color)
+
+
+def run_search():
+    button_run["state"] = tk.DISABLED
+    reset_colors()
     start_city = towns[combobox_start.current() + 1]
     end_city = towns[combobox_end.current() + 1]
     search_method = combobox_algorithm.current()
     cost_type = combobox_cost.current()
     computing_time = time.time()
-    if search_method == 0:  # Parcours en largeur
-        path = bfs(start_city, end_city, cost_type)
-    elif search_method == 1:  # Parcours en profondeur
-        path = dfs(start_city, end_city, cost_type)
-    elif search_method == 2:  # Parcours en profondeur itératif
-        path = dfs_iter(start_city, end_city, cost_type)
-    elif search_method == 3:  # Parcours à coût uniforme
-        path = ucs(start_city, end_city, cost_type)
-    elif search_method == 4:  # Recherche gloutonne
-        path = greedy_search(start_city, end_city, cost_type)
-    elif search_method == 5:  # A*
-        path = a_star(start_city, end_city, cost_type)
+    visitor = routing.CanvasVisitor(
+        canvas1, town_circles, visited_color, redraw_batch_size
+    )
+    if collect_stats or trace_dir is not None:
+        trace = None
+        if trace_dir is not None:
+            trace = os.path.join(
+                trace_dir,
+                f"trace_{start_city.dept_id}_{end_city.dept_id}"
+                f"_{search_method}_{cost_type}.json",
+            )
+        path, stats = routing.instrumented_search(
+            search_method, start_city, end_city, cost_type, visitor, heuristic, trace
+        )
+        label_stats["text"] = stats_text(stats)
     else:
-        path = None
+        path = route_cache.search(
+            search_method, start_city, end_city, cost_type, visitor, heuristic
+        )
     computing_time = time.time() - computing_time
     if path is not None:
         label_path_title["text"] = (
@@ -329,10 +123,32 @@ def run_search():
         else:
             label_distance["text"] = "Points: " + str(path.path_cost)
         label_computing_time["text"] = "Temps de calcul: " + str(computing_time) + "s"
+        routes = alternative_routes(path, start_city, end_city, cost_type)
+        for route, color in reversed(list(zip(routes, alternative_colors))):
+            display_path(route, color)
+        if routes:
+            label_distance["text"] += " (autres: " + ", ".join(
+                str(route.path_cost) for route in routes
+            ) + ")"
         display_path(path)
     button_run["state"] = tk.NORMAL
 
 
+def replay_search():
+    file_name = filedialog.askopenfilename(
+        initialdir=trace_dir, filetypes=[("Trace", "*.json")]
+    )
+    if not file_name:
+        return
+    reset_colors()
+    visitor = routing.CanvasVisitor(
+        canvas1, town_circles, visited_color, redraw_batch_size
+    )
+    path = routing.replay_trace(file_name, towns, visitor)
+    if path is not None:
+        display_path(path)
+
+
 def longitude_to_pixel(longitude):
     return (longitude - map_W) * diff_W_E
 
@@ -341,30 +157,9 @@ def latitude_to_pixel(latitude):
     return (map_N - latitude) * diff_N_S
 
 
-# Read towns and roads csv and create relative objects
-towns = dict()
-roads = list()
-with open("data/towns.csv", newline="") as csvfile:
-    reader = csv.DictReader(csvfile, delimiter=";")
-    for row in reader:
-        towns[int(row["dept_id"])] = Town(
-            dept_id=int(row["dept_id"]),
-            name=row["name"],
-            latitude=float(row["latitude"]),
-            longitude=float(row["longitude"]),
-        )
-with open("data/roads.csv", newline="") as csvfile:
-    reader = csv.DictReader(csvfile, delimiter=";")
-    for row in reader:
-        road = Road(
-            town1=towns[int(row["town1"])],
-            town2=towns[int(row["town2"])],
-            distance=int(row["distance"]),
-            time=int(row["time"]),
-        )
-        roads.append(road)
-        road.town1.neighbours[road.town2] = road
-        road.town2.neighbours[road.town1] = road
+towns, roads = routing.open_graph().to_graph()
+heuristic = routing.HaversineHeuristic.from_towns(towns, roads)
+route_cache = routing.RouteCache()
 
 
 window = tk.Tk()
@@ -456,9 +251,21 @@ label_distance.grid(row=4, column=0)
 label_computing_time = tk.Label(window, text="")
 label_computing_time.grid(row=4, column=3)
 
+label_stats = tk.Label(window, text="")
+label_stats.grid(row=4, column=1, columnspan=2)
+
 button_run = tk.Button(window, text="Calculer", command=run_search)
 button_run.grid(row=5, column=0)
 
+if trace_dir is not None:
+    button_replay = tk.Button(window, text="Rejouer", command=replay_search)
+    button_replay.grid(row=5, column=1)
+
+spinbox_routes = tk.Spinbox(
+    window, from_=1, to=1 + len(alternative_colors), width=3, state="readonly"
+)
+spinbox_routes.grid(row=5, column=2)
+
 button_quit = tk.Button(window, text="Quitter", command=window.destroy)
 button_quit.grid(row=5, column=3)
 window.mainloop()
@@ -1,4 +1,6 @@
 class Node:
+    __slots__ = ("state", "path_cost", "parent", "road_to_parent")
+
     def __init__(self, state, parent=None, road_to_parent=None):
         self.state = state
         self.path_cost = float(0)
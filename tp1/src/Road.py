@@ -1,4 +1,5 @@
 class Road:
+    __slots__ = ("town1", "town2", "distance", "time")
 
     def __init__(self, town1, town2, distance, time):
         self.town1 = town1
@@ -1,4 +1,12 @@
 class Town:
+    __slots__ = (
+        "dept_id",
+        "name",
+        "latitude",
+        "longitude",
+        "neighbours",
+        "__weakref__",  # heuristics.component_scales memoises by town
+    )
 
     def __init__(self, dept_id, name, latitude, longitude):
         self.dept_id = dept_id
@@ -0,0 +1,40 @@
+"""Moteur de calcul d'itinéraires d'Itineria, utilisable sans interface graphique."""
+
+from .alt import ALTHeuristic
+from .alternatives import RouteAlternatives, alternative_methods
+from .cache import RouteCache
+from .ch import ContractionHierarchy
+from .csr import CSRGraph
+from .dynamic import DynamicGraph, LPAStar
+from .geo import crowfliesdistance, deg2rad
+from .graph import COST_DISTANCE, COST_POINTS, COST_TIME, costs, edge_cost, load_graph
+from .heuristics import HaversineHeuristic
+from .matrix import cost_matrix, load_cost_matrix
+from .pqueue import HeapQueue, IndexedHeap
+from .search import (
+    a_star,
+    bfs,
+    bidirectional_a_star,
+    bidirectional_ucs,
+    depth_limited_search,
+    dfs,
+    dfs_iter,
+    greedy_search,
+    run_search,
+    search_algorithms,
+    ucs,
+    ucs_tree,
+)
+from .snapshot import compile_snapshot, open_graph
+from .spatial import TownIndex
+from .stats import SearchStats, instrumented_search, read_trace, replay_trace
+from .tree import SearchTree
+from .visitor import (
+    BudgetExceeded,
+    BudgetVisitor,
+    CanvasVisitor,
+    CountingVisitor,
+    NullVisitor,
+    SearchVisitor,
+    UntilVisitor,
+)
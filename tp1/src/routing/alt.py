@@ -0,0 +1,246 @@
+"""ALT heuristic: A*, Landmarks and Triangle inequality.
+
+A few landmark towns are chosen once and the cost from each of them to
+every town is stored. Since roads are undirected, for any landmark L the
+triangle inequality gives |d(L, goal) - d(L, town)| <= d(town, goal), and
+the maximum over the landmarks is a consistent lower bound usually much
+tighter than the straight line distance.
+
+Build the tables once with `python -m src.routing.alt` (from tp1/), then
+load them with ALTHeuristic.load_or_build.
+"""
+
+import os
+import random
+
+import numpy as np
+
+from .csr import CSRGraph
+from .csr_search import shortest_path_tree
+from .graph import DATA_DIR, costs
+
+ALT_FILE = os.path.join(DATA_DIR, "alt.npz")
+ALT_VERSION = 1
+
+
+def compact(path_costs):
+    """Store one distance row as float32 when it is exact, float64 otherwise"""
+    row = np.asarray(path_costs, dtype=np.float64)
+    finite = row[np.isfinite(row)]
+    if np.all(finite == np.round(finite)) and np.all(finite < 2**24):
+        return row.astype(np.float32)
+    return row
+
+
+def farthest_landmarks(graph, cost_type, count, rng):
+    """Greedily add the town farthest from the landmarks already chosen"""
+    start = rng.randrange(graph.n_towns)
+    first = np.asarray(shortest_path_tree(graph, start, cost_type)[0])
+    first[~np.isfinite(first)] = -1
+    landmarks = [int(np.argmax(first))]
+    rows = [shortest_path_tree(graph, landmarks[0], cost_type)[0]]
+    nearest = np.asarray(rows[0])
+    while len(landmarks) < min(count, graph.n_towns):
+        # Unreachable towns start another component: take them first
+        candidates = nearest.copy()
+        candidates[landmarks] = -1
+        landmark = int(np.argmax(candidates))
+        if candidates[landmark] <= 0:
+            break
+        landmarks.append(landmark)
+        rows.append(shortest_path_tree(graph, landmark, cost_type)[0])
+        nearest = np.minimum(nearest, rows[-1])
+    return landmarks, rows
+
+
+def avoid_landmarks(graph, cost_type, count, rng):
+    """Goldberg and Werneck "avoid" selection.
+
+    Grow a shortest path tree from a random root, weight each town by how
+    badly the current landmarks bound its distance to the root, and follow
+    the heaviest subtree that holds no landmark down to a leaf, which becomes
+    the next landmark.
+    """
+    landmarks, rows = farthest_landmarks(graph, cost_type, 1, rng)
+    while len(landmarks) < min(count, graph.n_towns):
+        root = rng.randrange(graph.n_towns)
+        path_costs, parent, _ = shortest_path_tree(graph, root, cost_type)
+        path_costs = np.asarray(path_costs)
+        reached = np.isfinite(path_costs)
+        table = np.asarray(rows)
+        with np.errstate(invalid="ignore"):
+            bound = np.max(np.abs(table[:, [root]] - table), axis=0)
+            size = np.where(reached, path_costs - bound, 0.0)
+        size[~np.isfinite(size)] = 0
+        has_landmark = np.zeros(graph.n_towns, dtype=bool)
+        has_landmark[landmarks] = True
+        # Children have larger costs than their parent: accumulate bottom-up
+        for town in np.argsort(-np.where(reached, path_costs, -1)).tolist():
+            up = parent[town]
+            if has_landmark[town]:
+                size[town] = 0
+            if up != -1:
+                has_landmark[up] |= has_landmark[town]
+                size[up] += size[town]
+        best_child = dict()
+        for town, up in enumerate(parent):
+            if up != -1 and size[town] > 0:
+                if up not in best_child or size[town] > size[best_child[up]]:
+                    best_child[up] = town
+        town = root
+        while town in best_child:
+            town = best_child[town]
+        if town in landmarks:
+            # Nothing left to avoid, complete with the farthest strategy
+            town = int(np.argmax(np.where(reached, np.min(table, axis=0), -1)))
+            if town in landmarks:
+                break
+        landmarks.append(town)
+        rows.append(shortest_path_tree(graph, town, cost_type)[0])
+    return landmarks, rows
+
+
+landmark_strategies = {"farthest": farthest_landmarks, "avoid": avoid_landmarks}
+
+
+class ALTHeuristic:
+    """Landmark lower bounds, usable wherever a HaversineHeuristic is.
+
+    `tables[cost_type]` is a (landmarks x towns) array of costs from each
+    landmark of `landmarks[cost_type]` to every town. `keys` plays the same
+    role as in HaversineHeuristic: None when towns are CSRGraph indices, the
+    list of Town objects (in CSRGraph order) for the object graph.
+    """
+
+    vector_limit = 100_000
+
+    def __init__(self, landmarks, tables, fingerprint=None, keys=None):
+        self.landmarks = landmarks
+        self.tables = tables
+        self.fingerprint = fingerprint
+        self.keys = keys
+        self.index_of = None
+        if keys is not None:
+            self.index_of = {key: i for i, key in enumerate(keys)}
+        self._columns = dict()
+        self._last_query = None
+        self._last_lookup = None
+
+    @classmethod
+    def build(cls, graph, count=8, strategy="farthest", seed=0, keys=None):
+        """Choose `count` landmarks per cost type and run their Dijkstra"""
+        select = landmark_strategies[strategy]
+        landmarks, tables = dict(), dict()
+        for cost_type in range(len(costs)):
+            rng = random.Random(seed)
+            chosen, rows = select(graph, cost_type, count, rng)
+            landmarks[cost_type] = np.asarray(chosen, dtype=np.int32)
+            tables[cost_type] = np.stack([compact(row) for row in rows])
+        return cls(landmarks, tables, graph.fingerprint(), keys)
+
+    def save(self, path=ALT_FILE):
+        arrays = {"version": np.asarray(ALT_VERSION)}
+        arrays["fingerprint"] = np.asarray(self.fingerprint)
+        for cost_type in self.tables:
+            arrays[f"landmarks_{cost_type}"] = self.landmarks[cost_type]
+            arrays[f"table_{cost_type}"] = self.tables[cost_type]
+        np.savez(path, **arrays)
+
+    @classmethod
+    def load(cls, path=ALT_FILE, graph=None, keys=None):
+        """Read a saved preprocessing, None if missing or built for another graph"""
+        if not os.path.exists(path):
+            return None
+        with np.load(path) as data:
+            if int(data["version"]) != ALT_VERSION:
+                return None
+            fingerprint = str(data["fingerprint"])
+            if graph is not None and fingerprint != graph.fingerprint():
+                return None
+            landmarks, tables = dict(), dict()
+            for cost_type in range(len(costs)):
+                landmarks[cost_type] = data[f"landmarks_{cost_type}"]
+                tables[cost_type] = data[f"table_{cost_type}"]
+        return cls(landmarks, tables, fingerprint, keys)
+
+    @classmethod
+    def load_or_build(cls, graph, path=ALT_FILE, keys=None, **options):
+        """Load the preprocessing file, rebuilding and saving it when stale"""
+        heuristic = cls.load(path, graph, keys)
+        if heuristic is None:
+            heuristic = cls.build(graph, keys=keys, **options)
+            heuristic.save(path)
+        return heuristic
+
+    def __len__(self):
+        return self.tables[0].shape[1]
+
+    def distances_to(self, goal, cost_type):
+        """Return the NumPy vector of lower bounds from every town to `goal`"""
+        goal = goal if self.index_of is None else self.index_of[goal]
+        table = self.tables[cost_type].astype(np.float64)
+        to_goal = table[:, [goal]]
+        with np.errstate(invalid="ignore"):
+            bounds = np.abs(to_goal - table)
+        # inf - inf: neither town is reachable from this landmark, no bound.
+        # A single inf means the town cannot reach the goal at all.
+        bounds[np.isnan(bounds)] = 0
+        return np.max(bounds, axis=0)
+
+    def goal_lookup(self, goal, cost_type):
+        """Return a table `h` such that h[town] is a lower bound of the cost to goal.
+
+        Small graphs get a full vector computed in one NumPy call; above
+        vector_limit towns the bound is computed lazily for the towns the
+        search actually reaches.
+        """
+        query = (goal, cost_type)
+        if self._last_lookup is None or query != self._last_query:
+            if len(self) <= self.vector_limit:
+                bounds = self.distances_to(goal, cost_type).tolist()
+                if self.keys is None:
+                    self._last_lookup = bounds
+                else:
+                    self._last_lookup = dict(zip(self.keys, bounds))
+            else:
+                self._last_lookup = LandmarkBound(self, goal, cost_type)
+            self._last_query = query
+        return self._last_lookup
+
+    def columns(self, cost_type):
+        """Per town list of its costs to the landmarks, for LandmarkBound"""
+        if cost_type not in self._columns:
+            self._columns[cost_type] = self.tables[cost_type].T.tolist()
+        return self._columns[cost_type]
+
+
+class LandmarkBound:
+    """Lazy h[town] for one goal, evaluated town by town"""
+
+    def __init__(self, heuristic, goal, cost_type):
+        self.columns = heuristic.columns(cost_type)
+        self.index_of = heuristic.index_of
+        if self.index_of is not None:
+            goal = self.index_of[goal]
+        self.to_goal = self.columns[goal]
+
+    def __getitem__(self, town):
+        if self.index_of is not None:
+            town = self.index_of[town]
+        best = 0.0
+        for goal_cost, town_cost in zip(self.to_goal, self.columns[town]):
+            # nan when neither town is reachable from the landmark: ignored
+            bound = abs(goal_cost - town_cost)
+            if bound > best:
+                best = bound
+        return best
+
+
+if __name__ == "__main__":
+    graph = CSRGraph.from_csv()
+    alt = ALTHeuristic.build(graph)
+    alt.save()
+    for cost_type, name in enumerate(costs):
+        towns = ", ".join(graph.names[town] for town in alt.landmarks[cost_type])
+        print(f"{name}: {towns}")
+    print("Saved to", ALT_FILE)
@@ -0,0 +1,301 @@
+"""Alternative routes between two towns.
+
+RouteAlternatives computes, once, the shortest path tree towards the end
+town (ucs_tree from it, roads being undirected). The tree gives the exact
+remaining cost of every town, which all three methods reuse:
+
+- k_shortest: Yen's k shortest loopless paths. Each spur path follows the
+  tree directly when the tree path avoids the blocked towns and roads,
+  otherwise an A* whose heuristic is the exact cost of the tree, so it
+  goes nearly straight to the end town.
+- plateaus: with the tree from the start town too, a road used by both
+  trees in opposite directions lies on a "plateau"; each maximal plateau
+  gives a route following the forward tree, the plateau, then the
+  backward tree ("choice routing"). Long plateaus make natural, clearly
+  different alternatives.
+- penalties: repeated A* where the roads of the routes already found cost
+  more and more, keeping the routes that share little with the others.
+
+Routes are Node chains, like the searches return, with the real cost in
+path_cost. The graph must not change while a RouteAlternatives is used.
+"""
+
+import math
+
+from ..Node import Node
+from .graph import edge_cost
+from .pqueue import HeapQueue
+from .search import ucs_tree
+from .visitor import NULL_VISITOR
+
+
+def route_towns(path):
+    """List of the towns of a Node chain, from the start town"""
+    towns = []
+    while path is not None:
+        towns.append(path.state)
+        path = path.parent
+    return towns[::-1]
+
+
+def route_roads(path):
+    """List of the roads of a Node chain, from the start town"""
+    roads = []
+    while path.parent is not None:
+        roads.append(path.road_to_parent)
+        path = path.parent
+    return roads[::-1]
+
+
+def _chain(towns, cost_type):
+    """Node chain following the roads between consecutive towns"""
+    node = Node(towns[0])
+    for town in towns[1:]:
+        road = node.state.neighbours[town]
+        child = Node(town, node, road)
+        child.path_cost = node.path_cost + edge_cost(road, cost_type)
+        node = child
+    return node
+
+
+def overlap(path, others, cost_type):
+    """Largest share of the cost of path run on the roads of one of others"""
+    roads = route_roads(path)
+    if not roads or not others:
+        return 0.0
+    shares = []
+    for other in others:
+        shared = set(route_roads(other))
+        cost = sum(edge_cost(road, cost_type) for road in roads if road in shared)
+        shares.append(cost / path.path_cost if path.path_cost else 1.0)
+    return max(shares)
+
+
+class RouteAlternatives:
+    """Several good routes from start_town to end_town.
+
+    The shortest path tree towards end_town is computed in the constructor,
+    the one from start_town on the first call to plateaus; `visitor` sees
+    the towns expanded by both and by the spur searches.
+    """
+
+    def __init__(self, start_town, end_town, cost_type, visitor=NULL_VISITOR):
+        self.start = start_town
+        self.end = end_town
+        self.cost_type = cost_type
+        self.visitor = visitor
+        self.to_end = ucs_tree(end_town, cost_type, visitor)
+        self._from_start = None
+
+    def remaining(self, town):
+        """Exact cost from town to end_town, inf if it cannot be reached"""
+        node = self.to_end.get(town)
+        return math.inf if node is None else node.path_cost
+
+    def _tree_towns(self, town):
+        """Towns of the shortest path from town to end_town, in the tree"""
+        towns = []
+        node = self.to_end[town]
+        while node is not None:
+            towns.append(node.state)
+            node = node.parent
+        return towns
+
+    def shortest(self):
+        """Shortest route, read from the tree: no search needed"""
+        if self.start not in self.to_end:
+            return None
+        return _chain(self._tree_towns(self.start), self.cost_type)
+
+    def _spur(self, spur_town, blocked_towns, blocked_roads):
+        """Towns of the shortest path from spur_town to end_town, or None.
+
+        The path avoids blocked_towns and, out of spur_town, blocked_roads.
+        """
+        if spur_town not in self.to_end:
+            return None
+        towns = self._tree_towns(spur_town)
+        first_road = spur_town.neighbours[towns[1]] if len(towns) > 1 else None
+        if first_road not in blocked_roads and blocked_towns.isdisjoint(towns):
+            return towns
+
+        # A* with the exact costs of the unrestricted graph as heuristic
+        cost_type = self.cost_type
+        frontier = HeapQueue()
+        frontier.push(spur_town, self.remaining(spur_town), Node(spur_town))
+        explored = set()
+        while frontier:
+            _, node = frontier.pop()
+            self.visitor.visit(node.state)
+            if node.state == self.end:
+                return route_towns(node)
+            explored.add(node.state)
+            for neighbour, road in node.state.neighbours.items():
+                if neighbour in explored or neighbour in blocked_towns:
+                    continue
+                if node.state is spur_town and road in blocked_roads:
+                    continue
+                h = self.remaining(neighbour)
+                if h == math.inf:
+                    continue
+                path_cost = node.path_cost + edge_cost(road, cost_type)
+                if frontier.can_improve(neighbour, path_cost + h):
+                    child = Node(neighbour, node, road)
+                    child.path_cost = path_cost
+                    frontier.push(neighbour, path_cost + h, child)
+        return None
+
+    # Algorithme de Yen
+    def k_shortest(self, k):
+        """The k shortest loopless routes, by increasing cost (Yen)"""
+        first = self.shortest()
+        if first is None or k <= 0:
+            return []
+        found = [first]
+        found_towns = [route_towns(first)]
+        candidates = HeapQueue()
+        seen = {tuple(found_towns[0])}
+        while len(found) < k:
+            previous = found_towns[-1]
+            for i, spur_town in enumerate(previous[:-1]):
+                # Roads out of the spur town already taken after this root
+                blocked_roads = {
+                    spur_town.neighbours[towns[i + 1]]
+                    for towns in found_towns
+                    if towns[: i + 1] == previous[: i + 1]
+                }
+                blocked_towns = set(previous[:i])
+                spur = self._spur(spur_town, blocked_towns, blocked_roads)
+                if spur is not None:
+                    towns = tuple(previous[:i] + spur)
+                    if towns not in seen:
+                        seen.add(towns)
+                        path = _chain(towns, self.cost_type)
+                        candidates.push(towns, path.path_cost, path)
+            if not candidates:
+                break
+            _, path = candidates.pop()
+            found.append(path)
+            found_towns.append(route_towns(path))
+        return found
+
+    def from_start(self):
+        """Shortest path tree from start_town, computed on the first call"""
+        if self._from_start is None:
+            self._from_start = ucs_tree(self.start, self.cost_type, self.visitor)
+        return self._from_start
+
+    # Routes par plateaux
+    def plateaus(self, k, max_stretch=0.25, max_overlap=0.7):
+        """Up to k routes through the longest plateaus of the two trees.
+
+        A route is kept if it costs at most (1 + max_stretch) times the
+        shortest one, visits no town twice, and shares at most max_overlap
+        of its cost with each route kept before it. The shortest route
+        comes first.
+        """
+        best = self.shortest()
+        if best is None or k <= 0:
+            return []
+        forward, backward = self.from_start(), self.to_end
+        # Plateau road u -> v: u is the parent of v in the forward tree and
+        # v the parent of u in the backward one. Each town has at most one
+        # next plateau town, so plateaus are disjoint chains.
+        following = dict()
+        for town, node in forward.items():
+            parent = node.parent
+            if parent is None:
+                continue
+            back = backward.get(parent.state)
+            if back is not None and back.parent is not None:
+                if back.parent.state is town:
+                    following[parent.state] = town
+        heads = set(following) - set(following.values())
+        plateaus = []
+        for head in heads:
+            tail = head
+            while tail in following:
+                tail = following[tail]
+            length = forward[tail].path_cost - forward[head].path_cost
+            cost = forward[tail].path_cost + backward[tail].path_cost
+            plateaus.append((-length, cost, head, tail))
+        plateaus.sort(key=lambda plateau: plateau[:2])
+
+        routes = [best]
+        limit = best.path_cost * (1 + max_stretch)
+        for _, cost, head, tail in plateaus:
+            if len(routes) == k:
+                break
+            if cost > limit:
+                continue
+            towns = route_towns(forward[tail]) + self._tree_towns(tail)[1:]
+            if len(set(towns)) != len(towns):
+                continue
+            path = _chain(towns, self.cost_type)
+            if overlap(path, routes, self.cost_type) <= max_overlap:
+                routes.append(path)
+        return routes
+
+    # Routes par pénalités
+    def penalties(self, k, penalty=0.5, max_stretch=0.25, max_overlap=0.7):
+        """Up to k routes found by penalising the roads of previous routes.
+
+        After each A*, the roads of the route found cost (1 + penalty) times
+        more in the next ones. Routes are filtered like in plateaus, and the
+        search stops after 4k attempts or a route over the stretch limit.
+        """
+        best = self.shortest()
+        if best is None or k <= 0:
+            return []
+        routes = [best]
+        limit = best.path_cost * (1 + max_stretch)
+        factors = dict.fromkeys(route_roads(best), 1 + penalty)
+        for _ in range(4 * k):
+            if len(routes) == k:
+                break
+            path = self._weighted_search(factors)
+            if path is None or path.path_cost > limit:
+                break
+            if overlap(path, routes, self.cost_type) <= max_overlap:
+                routes.append(path)
+            for road in route_roads(path):
+                factors[road] = factors.get(road, 1.0) * (1 + penalty)
+        return routes
+
+    def _weighted_search(self, factors):
+        """A* with each road cost multiplied by its factor (1 by default).
+
+        Factors are at least 1, so the exact costs of the tree stay a lower
+        bound. The Node chain holds the real costs.
+        """
+        cost_type = self.cost_type
+        frontier = HeapQueue()
+        frontier.push(self.start, self.remaining(self.start), (0.0, Node(self.start)))
+        explored = set()
+        while frontier:
+            _, (weighted_cost, node) = frontier.pop()
+            self.visitor.visit(node.state)
+            if node.state == self.end:
+                return node
+            explored.add(node.state)
+            for neighbour, road in node.state.neighbours.items():
+                if neighbour in explored:
+                    continue
+                h = self.remaining(neighbour)
+                if h == math.inf:
+                    continue
+                cost = edge_cost(road, cost_type)
+                new_weighted = weighted_cost + cost * factors.get(road, 1.0)
+                priority = new_weighted + h
+                if frontier.can_improve(neighbour, priority):
+                    child = Node(neighbour, node, road)
+                    child.path_cost = node.path_cost + cost
+                    frontier.push(neighbour, priority, (new_weighted, child))
+        return None
+
+
+alternative_methods = {
+    "yen": RouteAlternatives.k_shortest,
+    "plateaus": RouteAlternatives.plateaus,
+    "penalties": RouteAlternatives.penalties,
+}
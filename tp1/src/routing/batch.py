@@ -0,0 +1,280 @@
+"""Batch route queries from the command line.
+
+The input is a CSV file (";" separated, like towns.csv) with one query per
+row: start dept_id, end dept_id, algorithm and cost. An optional header
+row start;end;algorithm;cost is skipped. The algorithm is a name of
+batch_algorithms or the index of the GUI's combobox; the cost is a name of
+graph.costs or its index.
+
+Queries are solved on the CSRGraph across a process pool. Every worker
+memory maps the same binary snapshot (see snapshot.py), so the graph is
+read once by the OS and shared read-only. Results are streamed in input
+order as CSV rows or JSON lines holding the path cost, the dept_ids of the
+path, the number of towns expanded and the time of the search.
+
+python -m src.routing.batch queries.csv --processes 8 --format jsonl
+(from tp1/)
+"""
+
+import argparse
+import csv
+import json
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from . import csr_search, search
+from .ch import ContractionHierarchy
+from .graph import ROADS_CSV, TOWNS_CSV, costs
+from .heuristics import HaversineHeuristic
+from .snapshot import SNAPSHOT_DIR, open_graph
+from .visitor import CountingVisitor
+
+batch_algorithms = (
+    "bfs",
+    "dfs",
+    "dfs_iter",
+    "ucs",
+    "greedy",
+    "a_star",
+    "bidirectional_ucs",
+    "bidirectional_a_star",
+    "ch",
+)
+csr_searches = {
+    "bfs": csr_search.bfs,
+    "dfs": csr_search.dfs,
+    "dfs_iter": csr_search.dfs_iter,
+    "ucs": csr_search.ucs,
+    "greedy": csr_search.greedy_search,
+    "a_star": csr_search.a_star,
+}
+# Searches only written for the Town/Road objects
+object_searches = {
+    "bidirectional_ucs": search.bidirectional_ucs,
+    "bidirectional_a_star": search.bidirectional_a_star,
+}
+informed_searches = ("dfs_iter", "greedy", "a_star", "bidirectional_a_star")
+FIELDS = (
+    "line",
+    "start",
+    "end",
+    "algorithm",
+    "cost",
+    "path_cost",
+    "path",
+    "expanded",
+    "time_ms",
+)
+
+
+def parse_algorithm(value):
+    """Name of batch_algorithms from a name or a combobox index of search_algorithms"""
+    value = value.strip()
+    if value.isdigit() and int(value) < len(search.search_algorithms):
+        return batch_algorithms[int(value)]
+    if value in batch_algorithms:
+        return value
+    raise ValueError(f"unknown algorithm {value!r}")
+
+
+def parse_cost(value):
+    value = value.strip()
+    if value.isdigit() and int(value) < len(costs):
+        return int(value)
+    if value in costs:
+        return costs.index(value)
+    raise ValueError(f"unknown cost {value!r}")
+
+
+def read_queries(file, dept_ids):
+    """Yield (line, start, end, algorithm, cost_type) tuples from a query file.
+
+    ValueError names the line of the first malformed row or unknown dept_id.
+    """
+    for line, row in enumerate(csv.reader(file, delimiter=";"), 1):
+        if not row or row[0].startswith("#"):
+            continue
+        if line == 1 and row[0].strip() == "start":
+            continue
+        try:
+            if len(row) != 4:
+                raise ValueError(f"expected 4 fields, got {len(row)}")
+            start, end = int(row[0]), int(row[1])
+            for dept_id in (start, end):
+                if dept_id not in dept_ids:
+                    raise ValueError(f"unknown dept_id {dept_id}")
+            yield line, start, end, parse_algorithm(row[2]), parse_cost(row[3])
+        except ValueError as error:
+            raise ValueError(f"line {line}: {error}") from None
+
+
+class BatchSolver:
+    """Answer queries on one graph, creating what each algorithm needs once"""
+
+    def __init__(self, graph):
+        self.graph = graph
+        self.heuristic = HaversineHeuristic.from_csr(graph)
+        self._towns = None
+        self._town_heuristic = None
+        self._hierarchies = dict()
+
+    def towns(self):
+        """Town objects by dept_id, built on the first object graph query"""
+        if self._towns is None:
+            self._towns, roads = self.graph.to_graph()
+            # Scaled with the roads, like the provider of the CSR searches
+            self._town_heuristic = HaversineHeuristic.from_towns(self._towns, roads)
+        return self._towns
+
+    def hierarchy(self, cost_type):
+        """Saved hierarchy of this graph, built in memory if there is none"""
+        if cost_type not in self._hierarchies:
+            hierarchy = ContractionHierarchy.load(cost_type, graph=self.graph)
+            if hierarchy is None:
+                hierarchy = ContractionHierarchy.build(self.graph, cost_type)
+            self._hierarchies[cost_type] = hierarchy
+        return self._hierarchies[cost_type]
+
+    def run(self, start, end, algorithm, cost_type, visitor):
+        """Path from dept_id start to dept_id end as a list of dept_ids and its cost"""
+        if algorithm in object_searches:
+            towns = self.towns()
+            options = dict()
+            if algorithm in informed_searches:
+                options["heuristic"] = self._town_heuristic
+            path = object_searches[algorithm](
+                towns[start], towns[end], cost_type, visitor, **options
+            )
+        else:
+            start, end = self.graph.index_of[start], self.graph.index_of[end]
+            if algorithm == "ch":
+                path = self.hierarchy(cost_type).query(start, end, visitor)
+            else:
+                options = dict()
+                if algorithm in informed_searches:
+                    options["heuristic"] = self.heuristic
+                path = csr_searches[algorithm](
+                    self.graph, start, end, cost_type, visitor, **options
+                )
+        if path is None:
+            return None, None
+        path_cost = path.path_cost
+        states = []
+        while path is not None:
+            states.append(path.state)
+            path = path.parent
+        states.reverse()
+        if algorithm in object_searches:
+            return [town.dept_id for town in states], path_cost
+        return self.graph.dept_ids[states].tolist(), path_cost
+
+    def solve(self, query):
+        line, start, end, algorithm, cost_type = query
+        # Build the object graph or the hierarchy outside of the timed search
+        if algorithm in object_searches:
+            self.towns()
+        elif algorithm == "ch":
+            self.hierarchy(cost_type)
+        visitor = CountingVisitor()
+        begin = time.perf_counter()
+        path, path_cost = self.run(start, end, algorithm, cost_type, visitor)
+        elapsed = time.perf_counter() - begin
+        return {
+            "line": line,
+            "start": start,
+            "end": end,
+            "algorithm": algorithm,
+            "cost": costs[cost_type],
+            "path_cost": path_cost,
+            "path": path,
+            "expanded": visitor.visits,
+            "time_ms": round(elapsed * 1e3, 3),
+        }
+
+
+# Worker state of the process pool, set once per process by _init_worker
+_solver = None
+
+
+def _init_worker(snapshot_dir, towns_path, roads_path):
+    global _solver
+    _solver = BatchSolver(open_graph(snapshot_dir, towns_path, roads_path))
+
+
+def _worker_solve(query):
+    return _solver.solve(query)
+
+
+def solve_all(
+    queries,
+    processes=1,
+    snapshot_dir=SNAPSHOT_DIR,
+    towns_path=TOWNS_CSV,
+    roads_path=ROADS_CSV,
+    chunksize=16,
+):
+    """Yield the result of every query, in order, as they become available"""
+    if processes is None or processes <= 1:
+        solver = BatchSolver(open_graph(snapshot_dir, towns_path, roads_path))
+        for query in queries:
+            yield solver.solve(query)
+        return
+    with ProcessPoolExecutor(
+        max_workers=processes,
+        initializer=_init_worker,
+        initargs=(snapshot_dir, towns_path, roads_path),
+    ) as pool:
+        yield from pool.map(_worker_solve, queries, chunksize=chunksize)
+
+
+def write_results(results, file, output_format="csv"):
+    """Stream results as CSV rows (path dept_ids joined by "-") or JSON lines"""
+    if output_format == "jsonl":
+        for result in results:
+            file.write(json.dumps(result) + "\n")
+            file.flush()
+        return
+    writer = csv.writer(file, delimiter=";", lineterminator="\n")
+    writer.writerow(FIELDS)
+    for result in results:
+        row = dict(result)
+        row["path"] = "" if row["path"] is None else "-".join(map(str, row["path"]))
+        if row["path_cost"] is None:
+            row["path_cost"] = ""
+        writer.writerow(row[field] for field in FIELDS)
+        file.flush()
+
+
+def main(arguments=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("queries", help='query file, "-" for stdin')
+    parser.add_argument("-o", "--output", help="result file, stdout by default")
+    parser.add_argument("-f", "--format", choices=("csv", "jsonl"), default="csv")
+    parser.add_argument("-p", "--processes", type=int, default=1)
+    parser.add_argument("--towns", default=TOWNS_CSV)
+    parser.add_argument("--roads", default=ROADS_CSV)
+    parser.add_argument("--snapshot", default=SNAPSHOT_DIR)
+    args = parser.parse_args(arguments)
+
+    # Compile the snapshot once here, so that the workers only map it
+    graph = open_graph(args.snapshot, args.towns, args.roads, recompile=True)
+    dept_ids = set(graph.dept_ids.tolist())
+    try:
+        if args.queries == "-":
+            queries = list(read_queries(sys.stdin, dept_ids))
+        else:
+            with open(args.queries, newline="") as file:
+                queries = list(read_queries(file, dept_ids))
+    except ValueError as error:
+        parser.error(f"{args.queries}: {error}")
+    results = solve_all(queries, args.processes, args.snapshot, args.towns, args.roads)
+    if args.output is None:
+        write_results(results, sys.stdout, args.format)
+    else:
+        with open(args.output, "w", newline="") as file:
+            write_results(results, file, args.format)
+
+
+if __name__ == "__main__":
+    main()
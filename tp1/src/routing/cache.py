@@ -0,0 +1,115 @@
+"""Result cache for repeated route queries.
+
+Two levels, both LRU with configurable bounds:
+- finished routes, keyed by (start, end, search method, cost type),
+- complete shortest path trees of ucs, keyed by (start, cost type). Any
+  later query from the same start town with a search returning shortest
+  paths (ucs, A*, bidirectional) is answered by reading the tree. The
+  visitor of the query that builds a tree is only told about the towns ucs
+  expands up to the end town, as if the search had stopped there.
+
+Cached Node chains are shared between callers and must not be modified.
+Call clear() after changing the graph, or subscribe the cache to the
+DynamicGraph making the changes.
+"""
+
+from collections import OrderedDict
+
+from .search import optimal_searches
+from .search import run_search
+from .search import search_functions
+from .search import ucs
+from .search import ucs_tree
+from .visitor import NULL_VISITOR, UntilVisitor
+
+
+class RouteCache:
+    def __init__(self, max_routes=1024, max_trees=16, max_tree_towns=1_000_000):
+        self.max_routes = max_routes
+        self.max_trees = max_trees
+        self.max_tree_towns = max_tree_towns  # total size of the kept trees
+        self.routes = OrderedDict()
+        self.trees = OrderedDict()
+        self.tree_towns = 0
+        self.hits = 0
+        self.tree_hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def stats(self):
+        queries = self.hits + self.tree_hits + self.misses
+        return {
+            "hits": self.hits,
+            "tree_hits": self.tree_hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_rate": (self.hits + self.tree_hits) / queries if queries else 0.0,
+            "routes": len(self.routes),
+            "trees": len(self.trees),
+            "tree_towns": self.tree_towns,
+        }
+
+    def clear(self):
+        self.routes.clear()
+        self.trees.clear()
+        self.tree_towns = 0
+
+    def road_changed(self, town1, town2):
+        """DynamicGraph listener: any change can alter cached routes"""
+        self.clear()
+
+    def _remember(self, key, path):
+        self.routes[key] = path
+        if len(self.routes) > self.max_routes:
+            self.routes.popitem(last=False)
+            self.evictions += 1
+
+    def _keep_tree(self, key, tree):
+        if len(tree) > self.max_tree_towns or self.max_trees <= 0:
+            return
+        self.trees[key] = tree
+        self.tree_towns += len(tree)
+        while len(self.trees) > self.max_trees or self.tree_towns > self.max_tree_towns:
+            _, oldest = self.trees.popitem(last=False)
+            self.tree_towns -= len(oldest)
+            self.evictions += 1
+
+    def search(
+        self,
+        search_method,
+        start_town,
+        end_town,
+        cost_type,
+        visitor=NULL_VISITOR,
+        heuristic=None,
+    ):
+        """Same as search.run_search, answered from the cache when possible"""
+        key = (start_town, end_town, search_method, cost_type)
+        if key in self.routes:
+            self.routes.move_to_end(key)
+            self.hits += 1
+            return self.routes[key]
+        if not 0 <= search_method < len(search_functions):
+            return None
+
+        search = search_functions[search_method]
+        tree_key = (start_town, cost_type)
+        if search in optimal_searches and tree_key in self.trees:
+            self.trees.move_to_end(tree_key)
+            self.tree_hits += 1
+            path = self.trees[tree_key].get(end_town)
+        elif search is ucs:
+            # Finish the search once and keep the whole tree; the visitor
+            # only sees the expansion of a ucs stopping at end_town
+            self.misses += 1
+            tree = ucs_tree(start_town, cost_type, UntilVisitor(visitor, end_town))
+            visitor.finish()
+            self._keep_tree(tree_key, tree)
+            path = tree.get(end_town)
+        else:
+            self.misses += 1
+            path = run_search(
+                search_method, start_town, end_town, cost_type, visitor, heuristic
+            )
+        self._remember(key, path)
+        return path
@@ -0,0 +1,316 @@
+"""Contraction Hierarchies for many point to point queries on a static graph.
+
+Preprocessing contracts the towns one by one, least important first. When
+a town is removed, a shortcut replaces every shortest path going through
+it between two of its remaining neighbours. A query is then a
+bidirectional Dijkstra that only climbs towards more important towns,
+which settles a handful of towns instead of a large part of the graph.
+Shortcuts remember the town they bypass so that the path can be unpacked
+into the original roads.
+
+Build and save the hierarchies with `python -m src.routing.ch` (from tp1/).
+"""
+
+import heapq
+import math
+import os
+
+import numpy as np
+
+from ..Node import Node
+from .csr import CSRGraph
+from .graph import DATA_DIR, costs
+from .visitor import NULL_VISITOR
+
+CH_FILE = os.path.join(DATA_DIR, "ch_{}.npz")
+CH_VERSION = 1
+
+
+def _witness_costs(edges, source, excluded, max_cost, max_settled):
+    """Dijkstra from source ignoring town `excluded`, stopped early"""
+    path_costs = {source: 0.0}
+    frontier = [(0.0, source)]
+    settled = 0
+    while frontier and settled < max_settled:
+        g, u = heapq.heappop(frontier)
+        if g > path_costs[u]:
+            continue
+        if g > max_cost:
+            break
+        settled += 1
+        for v, (weight, road, middle) in edges[u].items():
+            if v == excluded:
+                continue
+            new_cost = g + weight
+            if new_cost < path_costs.get(v, math.inf):
+                path_costs[v] = new_cost
+                heapq.heappush(frontier, (new_cost, v))
+    return path_costs
+
+
+def _shortcuts(edges, town, max_settled):
+    """Shortcuts (u, w, weight) needed if `town` is contracted now"""
+    neighbours = list(edges[town].items())
+    shortcuts = []
+    for i, (u, (weight_u, road, middle)) in enumerate(neighbours):
+        targets = neighbours[i + 1 :]
+        if not targets:
+            continue
+        max_cost = weight_u + max(weight for w, (weight, r, m) in targets)
+        witness = _witness_costs(edges, u, town, max_cost, max_settled)
+        for w, (weight_w, road, middle) in targets:
+            via = weight_u + weight_w
+            if witness.get(w, math.inf) > via:
+                shortcuts.append((u, w, via))
+    return shortcuts
+
+
+class ContractionHierarchy:
+    """Upward graph of one cost type.
+
+    `rank[town]` is the contraction order. For every town, the edges to
+    more important towns are up_targets[up_offsets[town]:up_offsets[town + 1]]
+    with their weight, the road id for original roads (-1 for shortcuts)
+    and the bypassed town for shortcuts (-1 for original roads).
+    """
+
+    max_settled = 50  # Witness searches stop after this many towns
+
+    def __init__(
+        self,
+        cost_type,
+        rank,
+        up_offsets,
+        up_targets,
+        up_weights,
+        up_roads,
+        up_middles,
+        fingerprint=None,
+    ):
+        self.cost_type = cost_type
+        self.rank = rank
+        self.up_offsets = up_offsets
+        self.up_targets = up_targets
+        self.up_weights = up_weights
+        self.up_roads = up_roads
+        self.up_middles = up_middles
+        self.fingerprint = fingerprint
+        self._offsets = up_offsets.tolist()
+        self._targets = up_targets.tolist()
+        self._weights = up_weights.tolist()
+        self._roads = up_roads.tolist()
+        self._middles = up_middles.tolist()
+        # (lower ranked town, higher ranked town) -> edge, to unpack shortcuts
+        self._edge_of = dict()
+        for town in range(len(rank)):
+            for edge in range(self._offsets[town], self._offsets[town + 1]):
+                self._edge_of[(town, self._targets[edge])] = edge
+
+    @property
+    def n_shortcuts(self):
+        return int(np.count_nonzero(self.up_middles >= 0))
+
+    @classmethod
+    def build(cls, graph, cost_type, max_settled=None):
+        """Order the towns by edge difference and contract them"""
+        if max_settled is None:
+            max_settled = cls.max_settled
+        n = graph.n_towns
+        offsets, targets, weights, road_ids = graph.adjacency(cost_type)
+        # Remaining graph: edges[u][v] = (weight, road id, bypassed town)
+        edges = [dict() for _ in range(n)]
+        for u in range(n):
+            for edge in range(offsets[u], offsets[u + 1]):
+                v = targets[edge]
+                if v != u and weights[edge] < edges[u].get(v, (math.inf,))[0]:
+                    edges[u][v] = (weights[edge], road_ids[edge], -1)
+        all_edges = [dict(neighbours) for neighbours in edges]
+        contracted_neighbours = [0] * n
+
+        def priority(town):
+            shortcuts = _shortcuts(edges, town, max_settled)
+            edge_difference = len(shortcuts) - len(edges[town])
+            return edge_difference + contracted_neighbours[town]
+
+        queue = [(priority(town), town) for town in range(n)]
+        heapq.heapify(queue)
+        rank = np.zeros(n, dtype=np.int32)
+        order = 0
+        while queue:
+            _, town = heapq.heappop(queue)
+            # Lazy update: the priority may be outdated by earlier contractions
+            new_priority = priority(town)
+            if queue and new_priority > queue[0][0]:
+                heapq.heappush(queue, (new_priority, town))
+                continue
+            for u, w, weight in _shortcuts(edges, town, max_settled):
+                if weight < edges[u].get(w, (math.inf,))[0]:
+                    edges[u][w] = edges[w][u] = (weight, -1, town)
+                    all_edges[u][w] = all_edges[w][u] = (weight, -1, town)
+            for neighbour in edges[town]:
+                del edges[neighbour][town]
+                contracted_neighbours[neighbour] += 1
+            edges[town] = dict()
+            rank[town] = order
+            order += 1
+
+        up_offsets = np.zeros(n + 1, dtype=np.int64)
+        up_targets, up_weights, up_roads, up_middles = [], [], [], []
+        for u in range(n):
+            for v, (weight, road, middle) in sorted(all_edges[u].items()):
+                if rank[v] > rank[u]:
+                    up_targets.append(v)
+                    up_weights.append(weight)
+                    up_roads.append(road)
+                    up_middles.append(middle)
+            up_offsets[u + 1] = len(up_targets)
+        return cls(
+            cost_type,
+            rank,
+            up_offsets,
+            np.asarray(up_targets, dtype=np.int32),
+            np.asarray(up_weights, dtype=np.float64),
+            np.asarray(up_roads, dtype=np.int64),
+            np.asarray(up_middles, dtype=np.int32),
+            graph.fingerprint(),
+        )
+
+    def save(self, path=None):
+        if path is None:
+            path = CH_FILE.format(costs[self.cost_type])
+        np.savez(
+            path,
+            version=np.asarray(CH_VERSION),
+            fingerprint=np.asarray(self.fingerprint),
+            cost_type=np.asarray(self.cost_type),
+            rank=self.rank,
+            up_offsets=self.up_offsets,
+            up_targets=self.up_targets,
+            up_weights=self.up_weights,
+            up_roads=self.up_roads,
+            up_middles=self.up_middles,
+        )
+
+    @classmethod
+    def load(cls, cost_type, path=None, graph=None):
+        """Read a saved hierarchy, None if missing or built for another graph"""
+        if path is None:
+            path = CH_FILE.format(costs[cost_type])
+        if not os.path.exists(path):
+            return None
+        with np.load(path) as data:
+            if int(data["version"]) != CH_VERSION:
+                return None
+            if int(data["cost_type"]) != cost_type:
+                return None
+            fingerprint = str(data["fingerprint"])
+            if graph is not None and fingerprint != graph.fingerprint():
+                return None
+            return cls(
+                cost_type,
+                data["rank"],
+                data["up_offsets"],
+                data["up_targets"],
+                data["up_weights"],
+                data["up_roads"],
+                data["up_middles"],
+                fingerprint,
+            )
+
+    @classmethod
+    def load_or_build(cls, graph, cost_type, path=None):
+        """Load the hierarchy file, rebuilding and saving it when stale"""
+        hierarchy = cls.load(cost_type, path, graph)
+        if hierarchy is None:
+            hierarchy = cls.build(graph, cost_type)
+            hierarchy.save(path)
+        return hierarchy
+
+    def _unpack(self, start, end):
+        """Original (town, road, weight) steps of the edge start-end, from start"""
+        steps = []
+        stack = [(start, end)]
+        while stack:
+            a, b = stack.pop()
+            edge = self._edge_of.get((a, b))
+            if edge is None:
+                edge = self._edge_of[(b, a)]
+            middle = self._middles[edge]
+            if middle == -1:
+                steps.append((b, self._roads[edge], self._weights[edge]))
+            else:
+                # a -> middle first, so it is pushed last
+                stack.append((middle, b))
+                stack.append((a, middle))
+        return steps
+
+    def query(self, start, end, visitor=NULL_VISITOR):
+        """Shortest path from start to end as an index based Node chain.
+
+        Like csr_search.ucs, states are town indices and road_to_parent holds
+        road ids, so CSRGraph.path_to_objects gives back Town/Road objects.
+        """
+        offsets, targets, weights = self._offsets, self._targets, self._weights
+        inf = math.inf
+        path_costs = ({start: 0.0}, {end: 0.0})
+        parents = ({start: -1}, {end: -1})
+        settled = (set(), set())
+        frontiers = ([(0.0, start)], [(0.0, end)])
+        best, meeting = inf, -1
+        if start == end:
+            best, meeting = 0.0, start
+
+        while frontiers[0] or frontiers[1]:
+            # Alternate between the two searches, stop once both are beyond best
+            for side in (0, 1):
+                frontier = frontiers[side]
+                if not frontier:
+                    continue
+                g, u = heapq.heappop(frontier)
+                if g > best:
+                    frontier.clear()
+                    continue
+                if u in settled[side] or g > path_costs[side][u]:
+                    continue
+                settled[side].add(u)
+                visitor.visit(u)
+                other = path_costs[1 - side].get(u)
+                if other is not None and g + other < best:
+                    best, meeting = g + other, u
+                for edge in range(offsets[u], offsets[u + 1]):
+                    v = targets[edge]
+                    new_cost = g + weights[edge]
+                    if new_cost < path_costs[side].get(v, inf):
+                        path_costs[side][v] = new_cost
+                        parents[side][v] = u
+                        heapq.heappush(frontier, (new_cost, v))
+
+        if meeting == -1:
+            return None
+        # Up path start -> meeting, then meeting -> end down the backward tree
+        chain = []
+        town = meeting
+        while town != -1:
+            chain.append(town)
+            town = parents[0][town]
+        chain.reverse()
+        town = parents[1][meeting]
+        while town != -1:
+            chain.append(town)
+            town = parents[1][town]
+
+        node = Node(start)
+        for a, b in zip(chain, chain[1:]):
+            for town, road, weight in self._unpack(a, b):
+                child = Node(town, node, road)
+                child.path_cost = node.path_cost + weight
+                node = child
+        return node
+
+
+if __name__ == "__main__":
+    graph = CSRGraph.from_csv()
+    for cost_type, name in enumerate(costs):
+        hierarchy = ContractionHierarchy.build(graph, cost_type)
+        hierarchy.save()
+        print(f"{name}: {hierarchy.n_shortcuts} raccourcis")
@@ -0,0 +1,229 @@
+import csv
+import hashlib
+
+import numpy as np
+
+from ..Node import Node
+from ..Road import Road
+from ..Town import Town
+from .graph import COST_DISTANCE, COST_TIME, ROADS_CSV, TOWNS_CSV
+from .heuristics import HaversineHeuristic
+
+
+class CSRGraph:
+    """Road network stored as compressed sparse rows.
+
+    Towns are numbered 0..n-1 in the order of towns.csv. The edges leaving
+    town u are targets[offsets[u]:offsets[u + 1]], with their weights in the
+    distances and times columns at the same positions. Every road appears
+    twice (once per direction) and road_ids gives its row in roads.csv.
+    """
+
+    def __init__(
+        self,
+        dept_ids,
+        names,
+        latitudes,
+        longitudes,
+        offsets,
+        targets,
+        distances,
+        times,
+        road_ids,
+    ):
+        self.dept_ids = dept_ids
+        self.names = names
+        self.latitudes = latitudes
+        self.longitudes = longitudes
+        self.offsets = offsets
+        self.targets = targets
+        self.distances = distances
+        self.times = times
+        self.road_ids = road_ids
+        self._index_of = None
+        self._adjacency = dict()
+        self._crow_heuristic = None
+
+    @property
+    def index_of(self):
+        """dept_id -> town index, built on first use"""
+        if self._index_of is None:
+            self._index_of = {
+                dept_id: i for i, dept_id in enumerate(self.dept_ids.tolist())
+            }
+        return self._index_of
+
+    @property
+    def n_towns(self):
+        return len(self.dept_ids)
+
+    @property
+    def n_edges(self):
+        return len(self.targets)
+
+    @property
+    def n_roads(self):
+        return len(self.road_ids) // 2
+
+    @classmethod
+    def from_edges(
+        cls, dept_ids, names, latitudes, longitudes, town1, town2, distance, time
+    ):
+        """Build the graph from town columns and one row per undirected road"""
+        n = len(dept_ids)
+        town1 = np.asarray(town1, dtype=np.int64)
+        town2 = np.asarray(town2, dtype=np.int64)
+        m = len(town1)
+        sources = np.concatenate((town1, town2))
+        order = np.argsort(sources, kind="stable")
+        offsets = np.zeros(n + 1, dtype=np.int64)
+        np.cumsum(np.bincount(sources, minlength=n), out=offsets[1:])
+        road_ids = np.concatenate((np.arange(m), np.arange(m)))[order]
+        return cls(
+            dept_ids=np.asarray(dept_ids, dtype=np.int64),
+            names=list(names),
+            latitudes=np.asarray(latitudes, dtype=np.float64),
+            longitudes=np.asarray(longitudes, dtype=np.float64),
+            offsets=offsets,
+            targets=np.concatenate((town2, town1))[order].astype(np.int32),
+            distances=np.tile(np.asarray(distance, dtype=np.float64), 2)[order],
+            times=np.tile(np.asarray(time, dtype=np.float64), 2)[order],
+            road_ids=road_ids,
+        )
+
+    @classmethod
+    def from_csv(cls, towns_path=TOWNS_CSV, roads_path=ROADS_CSV):
+        """Read towns.csv and roads.csv without creating Town/Road objects"""
+        dept_ids, names, latitudes, longitudes = [], [], [], []
+        with open(towns_path, newline="") as csvfile:
+            reader = csv.DictReader(csvfile, delimiter=";")
+            for row in reader:
+                dept_ids.append(int(row["dept_id"]))
+                names.append(row["name"])
+                latitudes.append(float(row["latitude"]))
+                longitudes.append(float(row["longitude"]))
+        index_of = {dept_id: i for i, dept_id in enumerate(dept_ids)}
+        town1, town2, distance, time = [], [], [], []
+        with open(roads_path, newline="") as csvfile:
+            reader = csv.DictReader(csvfile, delimiter=";")
+            for row in reader:
+                town1.append(index_of[int(row["town1"])])
+                town2.append(index_of[int(row["town2"])])
+                distance.append(int(row["distance"]))
+                time.append(int(row["time"]))
+        return cls.from_edges(
+            dept_ids, names, latitudes, longitudes, town1, town2, distance, time
+        )
+
+    @classmethod
+    def from_graph(cls, towns, roads):
+        """Build the graph from the (towns, roads) returned by load_graph"""
+        town_list = list(towns.values())
+        index_of = {town: i for i, town in enumerate(town_list)}
+        return cls.from_edges(
+            [town.dept_id for town in town_list],
+            [town.name for town in town_list],
+            [town.latitude for town in town_list],
+            [town.longitude for town in town_list],
+            [index_of[road.town1] for road in roads],
+            [index_of[road.town2] for road in roads],
+            [road.distance for road in roads],
+            [road.time for road in roads],
+        )
+
+    def fingerprint(self):
+        """Hash of the adjacency and weights, used to detect stale preprocessing"""
+        digest = hashlib.sha1()
+        for column in (self.offsets, self.targets, self.distances, self.times):
+            digest.update(np.ascontiguousarray(column).tobytes())
+        return digest.hexdigest()
+
+    def weights(self, cost_type):
+        """Return the weight column for a cost type"""
+        if cost_type == COST_DISTANCE:
+            return self.distances
+        elif cost_type == COST_TIME:
+            return self.times
+        else:
+            return np.ones(self.n_edges)
+
+    def adjacency(self, cost_type):
+        """Return (offsets, targets, weights, road_ids) as lists for the search loops.
+
+        Indexing a NumPy array from Python returns a boxed scalar, which is much
+        slower than a list lookup, so the columns are converted once and cached.
+        """
+        if cost_type not in self._adjacency:
+            if not self._adjacency:
+                self._offsets_list = self.offsets.tolist()
+                self._targets_list = self.targets.tolist()
+                self._road_ids_list = self.road_ids.tolist()
+            self._adjacency[cost_type] = (
+                self._offsets_list,
+                self._targets_list,
+                self.weights(cost_type).tolist(),
+                self._road_ids_list,
+            )
+        return self._adjacency[cost_type]
+
+    def crow_heuristic(self):
+        """HaversineHeuristic of the graph, built on first use.
+
+        Used by the searches given no heuristic provider: its scales give
+        the smallest road distance / crow flies distance ratio and the
+        longest road in straight line, see heuristics.cost_scales.
+        """
+        if self._crow_heuristic is None:
+            self._crow_heuristic = HaversineHeuristic.from_csr(self)
+        return self._crow_heuristic
+
+    def neighbours(self, u):
+        """Yield (neighbour, edge) for each edge leaving town u"""
+        for edge in range(self.offsets[u], self.offsets[u + 1]):
+            yield int(self.targets[edge]), edge
+
+    def to_graph(self):
+        """Create the Town and Road objects, like load_graph.
+
+        Roads are listed by road id so that road_to_parent ids index them.
+        """
+        towns = dict()
+        town_list = []
+        for i, dept_id in enumerate(self.dept_ids.tolist()):
+            town = Town(
+                dept_id=dept_id,
+                name=self.names[i],
+                latitude=float(self.latitudes[i]),
+                longitude=float(self.longitudes[i]),
+            )
+            towns[dept_id] = town
+            town_list.append(town)
+        sources = np.repeat(np.arange(self.n_towns), np.diff(self.offsets))
+        # Each road appears twice, keep its first edge
+        road_ids, first = np.unique(self.road_ids, return_index=True)
+        roads = [None] * len(road_ids)
+        for road_id, town1, town2, distance, time in zip(
+            road_ids.tolist(),
+            sources[first].tolist(),
+            self.targets[first].tolist(),
+            self.distances[first].tolist(),
+            self.times[first].tolist(),
+        ):
+            road = Road(town_list[town1], town_list[town2], distance, time)
+            roads[road_id] = road
+            road.town1.neighbours[road.town2] = road
+            road.town2.neighbours[road.town1] = road
+        return towns, roads
+
+    def path_to_objects(self, path, towns, roads):
+        """Convert an index based Node chain into one holding Town and Road objects"""
+        chain = []
+        while path is not None:
+            chain.append(path)
+            path = path.parent
+        result = None
+        for node in reversed(chain):
+            road = None if node.road_to_parent is None else roads[node.road_to_parent]
+            result = Node(towns[int(self.dept_ids[node.state])], result, road)
+            result.path_cost = node.path_cost
+        return result
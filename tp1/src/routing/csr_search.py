@@ -0,0 +1,293 @@
+"""Search algorithms running on a CSRGraph.
+
+They mirror the functions of search.py but work on town indices: start and
+end are indices into the graph, the visitor receives indices, and the
+returned Node chain holds town indices as states and road ids (rows of
+roads.csv) as road_to_parent. CSRGraph.path_to_objects converts it back to
+Town/Road objects for display_path.
+"""
+
+import heapq
+import math
+from collections import deque
+
+from .geo import EARTH_RADIUS
+from .graph import COST_DISTANCE, COST_POINTS
+from .pqueue import HeapQueue
+from .tree import SearchTree, build_path
+from .visitor import NULL_VISITOR
+
+
+def crowflies(graph, town1, town2):
+    """Haversine distance in km between two towns of a CSRGraph"""
+    lat1 = math.radians(graph.latitudes[town1])
+    lat2 = math.radians(graph.latitudes[town2])
+    dLat = lat2 - lat1
+    dLon = math.radians(graph.longitudes[town2] - graph.longitudes[town1])
+    a = (
+        math.sin(dLat / 2) ** 2
+        + math.cos(lat1) * math.cos(lat2) * math.sin(dLon / 2) ** 2
+    )
+    return EARTH_RADIUS * 2 * math.atan2(math.sqrt(a), math.sqrt(1 - a))
+
+
+def goal_heuristic(graph, end, cost_type, heuristic=None):
+    """Return a function giving the heuristic value of a town for this goal.
+
+    Same rules as search.goal_heuristic: with no provider, only the distance
+    cost gets the crow flies distance, scaled like graph.crow_heuristic().
+    """
+    if heuristic is not None:
+        return heuristic.goal_lookup(end, cost_type).__getitem__
+    if cost_type == COST_DISTANCE:
+        scale = graph.crow_heuristic().scales[COST_DISTANCE]
+        return lambda town: scale * crowflies(graph, town, end)
+    return lambda town: 0.0
+
+
+# Parcours en largeur
+def bfs(graph, start, end, cost_type, visitor=NULL_VISITOR):
+    offsets, targets, weights, road_ids = graph.adjacency(cost_type)
+    n = graph.n_towns
+    parent = [-1] * n
+    parent_road = [-1] * n
+    path_costs = [0.0] * n
+    seen = bytearray(n)
+    seen[start] = 1
+    frontier = deque([start])
+
+    while frontier:
+        u = frontier.popleft()
+        visitor.visit(u)
+        if u == end:
+            return build_path(end, parent, parent_road, path_costs)
+        for edge in range(offsets[u], offsets[u + 1]):
+            v = targets[edge]
+            if not seen[v]:
+                seen[v] = 1
+                parent[v] = u
+                parent_road[v] = road_ids[edge]
+                path_costs[v] = path_costs[u] + weights[edge]
+                frontier.append(v)
+    return None
+
+
+# Parcours en profondeur
+def dfs(graph, start, end, cost_type, visitor=NULL_VISITOR):
+    """Depth first search with an explicit stack of (town, next edge) cursors"""
+    offsets, targets, weights, road_ids = graph.adjacency(cost_type)
+    n = graph.n_towns
+    parent = [-1] * n
+    parent_road = [-1] * n
+    path_costs = [0.0] * n
+    explored = bytearray(n)
+    explored[start] = 1
+    visitor.visit(start)
+    if start == end:
+        return build_path(end, parent, parent_road, path_costs)
+    stack = [start]
+    cursor = offsets[:]  # next edge to try for each town
+
+    while stack:
+        u = stack[-1]
+        edge = cursor[u]
+        end_edge = offsets[u + 1]
+        while edge < end_edge and explored[targets[edge]]:
+            edge += 1
+        if edge == end_edge:
+            cursor[u] = edge
+            stack.pop()
+            continue
+        cursor[u] = edge + 1
+        v = targets[edge]
+        explored[v] = 1
+        parent[v] = u
+        parent_road[v] = road_ids[edge]
+        path_costs[v] = path_costs[u] + weights[edge]
+        visitor.visit(v)
+        if v == end:
+            return build_path(end, parent, parent_road, path_costs)
+        stack.append(v)
+    return None
+
+
+# Parcours en profondeur itératif
+def dfs_iter(graph, start, end, cost_type, visitor=NULL_VISITOR, heuristic=None):
+    """Iterative deepening with buffers allocated once for all depths.
+
+    Same rules as search.depth_limited_search: a town is expanded again only
+    if reached with fewer roads in the current depth, `stamp` tells which
+    depth last wrote a town's entries, and a town is not entered when its
+    depth plus a lower bound of its number of roads to the end exceeds the
+    limit. The next limit is the smallest such sum, and the deepening stops
+    when nothing was cut off. The bounds come from the points cost of the
+    heuristic provider, like search.dfs_iter, and are computed the first
+    time a town is reached.
+    """
+    offsets, targets, weights, road_ids = graph.adjacency(cost_type)
+    n = graph.n_towns
+    parent = [-1] * n
+    parent_road = [-1] * n
+    path_costs = [0.0] * n
+    stamp = [-1] * n
+    depth_of = [0] * n
+    stack_towns = []
+    stack_edges = []
+    visitor.visit(start)
+    if start == end:
+        return build_path(end, parent, parent_road, path_costs)
+    if heuristic is not None:
+        h = heuristic.goal_lookup(end, COST_POINTS).__getitem__
+    else:
+        scale = graph.crow_heuristic().scales[COST_POINTS]
+        h = lambda town: scale * crowflies(graph, town, end)
+    hops = [-1] * n
+
+    limit = hops[start] = math.ceil(h(start) - 1e-9)
+    while True:
+        next_limit = math.inf
+        stamp[start] = limit
+        depth_of[start] = 0
+        stack_towns.append(start)
+        stack_edges.append(offsets[start])
+        while stack_towns:
+            u = stack_towns[-1]
+            depth = len(stack_towns) - 1
+            edge = stack_edges[-1]
+            end_edge = offsets[u + 1]
+            while edge < end_edge:
+                v = targets[edge]
+                if stamp[v] != limit or depth_of[v] > depth + 1:
+                    hop = hops[v]
+                    if hop < 0:
+                        hop = hops[v] = math.ceil(h(v) - 1e-9)
+                    bound = depth + 1 + hop
+                    if bound <= limit:
+                        break
+                    if bound < next_limit:
+                        next_limit = bound
+                edge += 1
+            if edge == end_edge:
+                stack_towns.pop()
+                stack_edges.pop()
+                continue
+            stack_edges[-1] = edge + 1
+            stamp[v] = limit
+            depth_of[v] = depth + 1
+            parent[v] = u
+            parent_road[v] = road_ids[edge]
+            path_costs[v] = path_costs[u] + weights[edge]
+            visitor.visit(v)
+            if v == end:
+                stack_towns.clear()
+                stack_edges.clear()
+                return build_path(end, parent, parent_road, path_costs)
+            stack_towns.append(v)
+            stack_edges.append(offsets[v])
+
+        # Every reachable town was seen: the end town is unreachable
+        if next_limit == math.inf:
+            return None
+        limit = next_limit
+
+
+def _best_first(graph, start, end, cost_type, visitor, heuristic, use_cost, frontier):
+    """Shared loop of ucs, greedy_search and a_star.
+
+    The priority of a town is g + h when use_cost is set, h alone otherwise.
+    """
+    offsets, targets, weights, road_ids = graph.adjacency(cost_type)
+    n = graph.n_towns
+    inf = math.inf
+    if frontier is None:
+        frontier = HeapQueue()
+    tree = SearchTree(n)
+    parent, parent_road, path_costs = tree.parent, tree.parent_road, tree.path_costs
+    explored = bytearray(n)
+    path_costs[start] = 0.0
+    frontier.push(start, heuristic(start), start)
+
+    while frontier:
+        priority, u = frontier.pop()
+        visitor.visit(u)
+        if u == end:
+            return tree.to_node(end)
+        explored[u] = 1
+        g = path_costs[u]
+        for edge in range(offsets[u], offsets[u + 1]):
+            v = targets[edge]
+            if explored[v]:
+                continue
+            new_cost = g + weights[edge]
+            if new_cost < path_costs[v]:
+                path_costs[v] = new_cost
+                parent[v] = u
+                parent_road[v] = road_ids[edge]
+                h = heuristic(v)
+                frontier.push(v, new_cost + h if use_cost else h, v)
+    return None
+
+
+# Parcours à coût uniforme
+def ucs(graph, start, end, cost_type, visitor=NULL_VISITOR, frontier=None):
+    return _best_first(
+        graph, start, end, cost_type, visitor, lambda town: 0.0, True, frontier
+    )
+
+
+# Recherche gloutonne
+def greedy_search(
+    graph,
+    start,
+    end,
+    cost_type,
+    visitor=NULL_VISITOR,
+    heuristic=None,
+    frontier=None,
+):
+    h = goal_heuristic(graph, end, cost_type, heuristic)
+    return _best_first(graph, start, end, cost_type, visitor, h, False, frontier)
+
+
+# A-Star
+def a_star(
+    graph,
+    start,
+    end,
+    cost_type,
+    visitor=NULL_VISITOR,
+    heuristic=None,
+    frontier=None,
+):
+    h = goal_heuristic(graph, end, cost_type, heuristic)
+    return _best_first(graph, start, end, cost_type, visitor, h, True, frontier)
+
+
+def shortest_path_tree(graph, source, cost_type):
+    """One to all Dijkstra from `source`.
+
+    Return the (path_costs, parent, parent_road) arrays of a SearchTree,
+    indexed by town, with math.inf and -1 for the towns that cannot be reached.
+    """
+    offsets, targets, weights, road_ids = graph.adjacency(cost_type)
+    n = graph.n_towns
+    tree = SearchTree(n)
+    parent, parent_road, path_costs = tree.parent, tree.parent_road, tree.path_costs
+    explored = bytearray(n)
+    path_costs[source] = 0.0
+    frontier = [(0.0, source)]
+
+    while frontier:
+        g, u = heapq.heappop(frontier)
+        if explored[u]:
+            continue
+        explored[u] = 1
+        for edge in range(offsets[u], offsets[u + 1]):
+            v = targets[edge]
+            new_cost = g + weights[edge]
+            if new_cost < path_costs[v]:
+                path_costs[v] = new_cost
+                parent[v] = u
+                parent_road[v] = road_ids[edge]
+                heapq.heappush(frontier, (new_cost, v))
+    return path_costs, parent, parent_road
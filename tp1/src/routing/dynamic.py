@@ -0,0 +1,194 @@
+"""Road network that changes over time, and incremental re-routing.
+
+DynamicGraph wraps the (towns, roads) of load_graph and is the only place
+that should modify them: it updates a road's distance or time, closes a
+road or opens one, and tells its listeners which pair of towns changed.
+
+LPAStar (Lifelong Planning A*, Koenig and Likhachev) is such a listener.
+It keeps, for one start and one end town, the cost g of every town it has
+settled and its one step lookahead rhs (the best g of a neighbour plus the
+road to it). After a change only the towns whose rhs no longer matches g
+go back in the frontier, so the repaired route usually expands a small
+part of what a new a_star would.
+"""
+
+import math
+
+from ..Node import Node
+from .graph import edge_cost
+from .heuristics import forget_scales
+from .pqueue import HeapQueue
+from .search import goal_heuristic
+from .visitor import NULL_VISITOR
+
+
+class DynamicGraph:
+    """Mutable view of the Town/Road graph that notifies its listeners.
+
+    A listener has a road_changed(town1, town2) method, called after every
+    change of the road between these two towns. Parallel roads between the
+    same towns (roads.csv has one) are kept aside: like load_graph, the last
+    one listed is used, and the next one takes over when it is closed.
+    """
+
+    def __init__(self, towns, roads):
+        self.towns = towns
+        self.roads = list(roads)
+        self.listeners = []
+        self._parallel = dict()
+        for road in self.roads:
+            self._parallel.setdefault(self._pair(road), []).append(road)
+
+    @staticmethod
+    def _pair(road):
+        return frozenset((road.town1, road.town2))
+
+    def subscribe(self, listener):
+        self.listeners.append(listener)
+
+    def unsubscribe(self, listener):
+        self.listeners.remove(listener)
+
+    def _notify(self, road):
+        forget_scales()
+        for listener in self.listeners:
+            listener.road_changed(road.town1, road.town2)
+
+    def update_road(self, road, distance=None, time=None):
+        """Change the distance and/or time of a road"""
+        if distance is not None:
+            road.distance = distance
+        if time is not None:
+            road.time = time
+        self._notify(road)
+
+    def remove_road(self, road):
+        """Close a road, the towns stay in the graph"""
+        parallel = self._parallel[self._pair(road)]
+        parallel.remove(road)
+        self.roads.remove(road)
+        if road.town1.neighbours.get(road.town2) is road:
+            del road.town1.neighbours[road.town2]
+            del road.town2.neighbours[road.town1]
+            if parallel:
+                self._link(parallel[-1])
+        self._notify(road)
+
+    def add_road(self, road):
+        """Open a new road, or reopen one closed by remove_road"""
+        self._parallel.setdefault(self._pair(road), []).append(road)
+        self.roads.append(road)
+        self._link(road)
+        self._notify(road)
+
+    @staticmethod
+    def _link(road):
+        road.town1.neighbours[road.town2] = road
+        road.town2.neighbours[road.town1] = road
+
+
+def _no_heuristic(town):
+    return 0.0
+
+
+# Planification A* incrémentale
+class LPAStar:
+    """Shortest path between two fixed towns, repaired after graph changes.
+
+    Subscribe the planner to the DynamicGraph, then call compute() after
+    any number of changes to get the current shortest path as a Node chain
+    (None when the end town cannot be reached). As with a_star, the result
+    is optimal when the heuristic is a lower bound of the cost; if a change
+    makes a road cheaper than that bound, the planner falls back to h = 0.
+    """
+
+    def __init__(self, start_town, end_town, cost_type, heuristic=None):
+        self.start = start_town
+        self.end = end_town
+        self.cost_type = cost_type
+        self.h = goal_heuristic(end_town, cost_type, heuristic)
+        self.g = dict()
+        self.rhs = {start_town: 0.0}
+        self.frontier = HeapQueue()
+        self.frontier.push(start_town, self._key(start_town), start_town)
+        self.expanded = 0  # towns expanded by the last compute()
+
+    def _key(self, town):
+        best = min(self.g.get(town, math.inf), self.rhs.get(town, math.inf))
+        return (best + self.h(town), best)
+
+    def _update(self, town):
+        """Recompute rhs of town and put it in the frontier iff inconsistent"""
+        if town is not self.start:
+            best = math.inf
+            g = self.g
+            cost_type = self.cost_type
+            for neighbour, road in town.neighbours.items():
+                cost = g.get(neighbour, math.inf) + edge_cost(road, cost_type)
+                if cost < best:
+                    best = cost
+            self.rhs[town] = best
+        self.frontier.remove(town)
+        if self.g.get(town, math.inf) != self.rhs.get(town, math.inf):
+            self.frontier.push(town, self._key(town), town)
+
+    def road_changed(self, town1, town2):
+        road = town1.neighbours.get(town2)
+        if road is not None and self.h is not _no_heuristic:
+            if abs(self.h(town1) - self.h(town2)) > edge_cost(road, self.cost_type):
+                self._drop_heuristic()
+        self._update(town1)
+        self._update(town2)
+
+    def _drop_heuristic(self):
+        """Switch to h = 0, which changes the key of every town in the frontier"""
+        self.h = _no_heuristic
+        frontier = HeapQueue()
+        while self.frontier:
+            _, town = self.frontier.pop()
+            frontier.push(town, self._key(town), town)
+        self.frontier = frontier
+
+    def compute(self, visitor=NULL_VISITOR):
+        """Repair the g values, then return the shortest path to the end town"""
+        frontier = self.frontier
+        g, rhs = self.g, self.rhs
+        inf = math.inf
+        self.expanded = 0
+        while frontier and (
+            frontier.min_priority() < self._key(self.end)
+            or rhs.get(self.end, inf) != g.get(self.end, inf)
+        ):
+            _, town = frontier.pop()
+            visitor.visit(town)
+            self.expanded += 1
+            if g.get(town, inf) > rhs.get(town, inf):
+                g[town] = rhs[town]  # Over-consistent: settle it
+            else:
+                g[town] = inf  # Under-consistent: a road got worse
+                self._update(town)
+            for neighbour in town.neighbours:
+                self._update(neighbour)
+        return self.path()
+
+    def path(self):
+        """Node chain of the current shortest path, following the g values back"""
+        inf = math.inf
+        if self.g.get(self.end, inf) == inf:
+            return None
+        chain = [(self.end, None)]
+        town = self.end
+        while town is not self.start:
+            best, previous = inf, None
+            for neighbour, road in town.neighbours.items():
+                cost = self.g.get(neighbour, inf) + edge_cost(road, self.cost_type)
+                if cost < best:
+                    best, previous = cost, (neighbour, road)
+            chain[-1] = (town, previous[1])
+            chain.append((previous[0], None))
+            town = previous[0]
+        node = None
+        for town, road in reversed(chain):
+            node = Node(town, node, road)
+            node.path_cost = self.g[town]
+        return node
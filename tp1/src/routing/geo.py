@@ -0,0 +1,25 @@
+import math
+
+EARTH_RADIUS = 6371  # Radius of the earth in km
+
+
+def deg2rad(deg):
+    return deg * (math.pi / 180)
+
+
+# Distance vol d'oiseau
+def crowfliesdistance(town1, town2):
+    lat1 = town1.latitude
+    lon1 = town1.longitude
+    lat2 = town2.latitude
+    lon2 = town2.longitude
+
+    dLat = deg2rad(lat2 - lat1)
+    dLon = deg2rad(lon2 - lon1)
+    a = math.sin(dLat / 2) * math.sin(dLat / 2) + math.cos(deg2rad(lat1)) * math.cos(
+        deg2rad(lat2)
+    ) * math.sin(dLon / 2) * math.sin(dLon / 2)
+    c = 2 * math.atan2(math.sqrt(a), math.sqrt(1 - a))
+
+    return EARTH_RADIUS * c
+    # distance in km
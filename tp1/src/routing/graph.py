@@ -0,0 +1,66 @@
+import csv
+import hashlib
+import os
+
+from ..Road import Road
+from ..Town import Town
+
+DATA_DIR = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))), "data"
+)
+TOWNS_CSV = os.path.join(DATA_DIR, "towns.csv")
+ROADS_CSV = os.path.join(DATA_DIR, "roads.csv")
+
+costs = ("distance", "temps", "points")
+COST_DISTANCE = 0
+COST_TIME = 1
+COST_POINTS = 2
+
+
+def edge_cost(road, cost_type):
+    """Return the cost of a road for the given cost type"""
+    if cost_type == COST_DISTANCE:
+        return road.distance
+    elif cost_type == COST_TIME:
+        return road.time
+    else:
+        return 1
+
+
+def files_hash(*paths):
+    """SHA-1 of the content of the given files"""
+    digest = hashlib.sha1()
+    for path in paths:
+        with open(path, "rb") as file:
+            for block in iter(lambda: file.read(1 << 20), b""):
+                digest.update(block)
+    return digest.hexdigest()
+
+
+# Read towns and roads csv and create relative objects
+def load_graph(towns_path=TOWNS_CSV, roads_path=ROADS_CSV):
+    """Load the road network, return (towns by dept_id, list of roads)"""
+    towns = dict()
+    roads = list()
+    with open(towns_path, newline="") as csvfile:
+        reader = csv.DictReader(csvfile, delimiter=";")
+        for row in reader:
+            towns[int(row["dept_id"])] = Town(
+                dept_id=int(row["dept_id"]),
+                name=row["name"],
+                latitude=float(row["latitude"]),
+                longitude=float(row["longitude"]),
+            )
+    with open(roads_path, newline="") as csvfile:
+        reader = csv.DictReader(csvfile, delimiter=";")
+        for row in reader:
+            road = Road(
+                town1=towns[int(row["town1"])],
+                town2=towns[int(row["town2"])],
+                distance=int(row["distance"]),
+                time=int(row["time"]),
+            )
+            roads.append(road)
+            road.town1.neighbours[road.town2] = road
+            road.town2.neighbours[road.town1] = road
+    return towns, roads
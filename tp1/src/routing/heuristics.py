@@ -0,0 +1,207 @@
+import weakref
+
+import numpy as np
+
+from .geo import EARTH_RADIUS
+from .graph import COST_DISTANCE, COST_POINTS, COST_TIME
+
+
+def haversine_vector(lat_rad, lon_rad, cos_lat, sources, goal):
+    """Crow flies distance in km from town(s) `sources` to town(s) `goal`.
+
+    Takes the latitudes/longitudes already converted to radians and the
+    cosine of the latitudes so that a query only costs a few array ops.
+    `sources` and `goal` are indices or index arrays (slice(None) for all).
+    """
+    half_dlat = (lat_rad[sources] - lat_rad[goal]) / 2
+    half_dlon = (lon_rad[sources] - lon_rad[goal]) / 2
+    a = (
+        np.sin(half_dlat) ** 2
+        + cos_lat[sources] * cos_lat[goal] * np.sin(half_dlon) ** 2
+    )
+    return EARTH_RADIUS * 2 * np.arctan2(np.sqrt(a), np.sqrt(1 - a))
+
+
+def cost_scales(crow, distance, time):
+    """Factors turning a crow flies distance into an admissible cost bound.
+
+    Every road must cost at least factor * crow flies length of the road for
+    each cost type. By the triangle inequality the bound then also holds
+    between any two towns, and the heuristic is consistent:
+    - distance: 1, or less if a road is shorter than the straight line,
+    - temps: minutes per km at the highest straight line speed of a road,
+    - points: one hop per longest road (in straight line).
+    """
+    scales = [1.0, 0.0, 0.0]
+    mask = crow > 0
+    if mask.any():
+        crow = crow[mask]
+        scales[COST_DISTANCE] = min(1.0, float(np.min(distance[mask] / crow)))
+        scales[COST_TIME] = float(np.min(time[mask] / crow))
+        scales[COST_POINTS] = 1 / float(np.max(crow))
+    return tuple(scales)
+
+
+# Scales of the roads reachable from a Town, the same tuple for every town
+# of its connected component, see component_scales
+_component_scales = weakref.WeakKeyDictionary()
+
+
+def component_scales(town):
+    """cost_scales of the roads that can be reached from a Town object.
+
+    Used by the object searches given no heuristic provider. The component
+    is walked and its roads measured (in one haversine_vector call) on the
+    first query only: every town of it then maps to the scales, so the next
+    queries on the same graph read them in constant time. forget_scales
+    must be called after a road changes.
+    """
+    scales = _component_scales.get(town)
+    if scales is None:
+        component = [town]
+        index_of = {town: 0}
+        town1, town2, distance, time = [], [], [], []
+        for current in component:
+            for neighbour, road in current.neighbours.items():
+                if neighbour not in index_of:
+                    index_of[neighbour] = len(component)
+                    component.append(neighbour)
+                town1.append(index_of[current])
+                town2.append(index_of[neighbour])
+                distance.append(road.distance)
+                time.append(road.time)
+        lat_rad = np.radians([town.latitude for town in component])
+        lon_rad = np.radians([town.longitude for town in component])
+        crow = haversine_vector(
+            lat_rad,
+            lon_rad,
+            np.cos(lat_rad),
+            np.array(town1, dtype=np.intp),
+            np.array(town2, dtype=np.intp),
+        )
+        scales = cost_scales(crow, np.array(distance), np.array(time))
+        for current in component:
+            _component_scales[current] = scales
+    return scales
+
+
+def forget_scales():
+    """Drop the scales of component_scales, after a road of a graph changed"""
+    _component_scales.clear()
+
+
+class HaversineHeuristic:
+    """Straight line heuristic with the trigonometry precomputed.
+
+    Radians and cosines are computed once per town; each query then computes
+    the distance from every town to the goal in a single NumPy call. For
+    graphs of at most `pairwise_limit` towns, the full distance matrix is
+    built on the first query and later queries just read one of its rows.
+
+    The distance is then scaled into the unit of the cost type (km, minutes
+    or hops) with the factors of cost_scales, computed from the roads given
+    as `edges` = (town1 rows, town2 rows, distances, times). Without edges
+    the distance cost gets the raw crow flies distance, which overestimates
+    as soon as a road is shorter than the straight line, and the others fall
+    back to 0: from_towns and from_csr always give the edges.
+
+    `keys` maps the towns given to the searches to rows: None for a CSRGraph
+    (towns are already indices), a list of Town objects for the object graph.
+    """
+
+    pairwise_limit = 1000
+
+    def __init__(
+        self, latitudes, longitudes, keys=None, edges=None, pairwise_limit=None
+    ):
+        self.lat_rad = np.radians(np.asarray(latitudes, dtype=np.float64))
+        self.lon_rad = np.radians(np.asarray(longitudes, dtype=np.float64))
+        self.cos_lat = np.cos(self.lat_rad)
+        self.keys = keys
+        self.index_of = None
+        if keys is not None:
+            self.index_of = {key: i for i, key in enumerate(keys)}
+        if pairwise_limit is not None:
+            self.pairwise_limit = pairwise_limit
+        self.scales = (1.0, 0.0, 0.0)
+        if edges is not None:
+            town1, town2, distance, time = (np.asarray(column) for column in edges)
+            town1, town2 = town1.astype(np.intp), town2.astype(np.intp)
+            crow = haversine_vector(
+                self.lat_rad, self.lon_rad, self.cos_lat, town1, town2
+            )
+            self.scales = cost_scales(crow, distance, time)
+        self.matrix = None
+        self._last_query = None
+        self._last_lookup = None
+
+    @classmethod
+    def from_towns(cls, towns, roads=None, pairwise_limit=None):
+        """Provider for the Town objects returned by load_graph.
+
+        Without `roads`, the scales are computed from the roads found in the
+        neighbours of the towns.
+        """
+        keys = list(towns.values())
+        if roads is None:
+            roads = dict.fromkeys(
+                road for town in keys for road in town.neighbours.values()
+            )
+        index_of = {town: i for i, town in enumerate(keys)}
+        edges = (
+            [index_of[road.town1] for road in roads],
+            [index_of[road.town2] for road in roads],
+            [road.distance for road in roads],
+            [road.time for road in roads],
+        )
+        return cls(
+            [town.latitude for town in keys],
+            [town.longitude for town in keys],
+            keys,
+            edges,
+            pairwise_limit,
+        )
+
+    @classmethod
+    def from_csr(cls, graph, pairwise_limit=None):
+        """Provider for a CSRGraph, towns are indices"""
+        sources = np.repeat(np.arange(graph.n_towns), np.diff(graph.offsets))
+        edges = (sources, graph.targets, graph.distances, graph.times)
+        return cls(graph.latitudes, graph.longitudes, None, edges, pairwise_limit)
+
+    def __len__(self):
+        return len(self.lat_rad)
+
+    def pairwise(self):
+        """Return the full matrix of crow flies distances, computing it once"""
+        if self.matrix is None:
+            rows = np.arange(len(self))[:, None]
+            self.matrix = haversine_vector(
+                self.lat_rad, self.lon_rad, self.cos_lat, rows, rows.T
+            )
+        return self.matrix
+
+    def distances_to(self, goal):
+        """Return the NumPy vector of distances from every town to `goal`"""
+        goal = goal if self.index_of is None else self.index_of[goal]
+        if self.matrix is not None or len(self) <= self.pairwise_limit:
+            return self.pairwise()[goal]
+        return haversine_vector(
+            self.lat_rad, self.lon_rad, self.cos_lat, slice(None), goal
+        )
+
+    def goal_lookup(self, goal, cost_type=COST_DISTANCE):
+        """Return a table `h` such that h[town] is a lower bound of the cost to goal.
+
+        A list for index based graphs, a dict keyed by Town otherwise. The last
+        table is kept so that repeated queries to the same goal are free.
+        """
+        query = (goal, cost_type)
+        if self._last_lookup is None or query != self._last_query:
+            distances = (self.distances_to(goal) * self.scales[cost_type]).tolist()
+            if self.keys is None:
+                self._last_lookup = distances
+            else:
+                self._last_lookup = dict(zip(self.keys, distances))
+            self._last_query = query
+        return self._last_lookup
@@ -0,0 +1,139 @@
+"""Many to many cost matrices (origin x destination tables).
+
+One one-to-all Dijkstra per source replaces len(sources) * len(targets)
+point to point searches. The sources can be split across a process pool,
+and full matrices computed from the CSV files are cached on disk under a
+key made of the hash of towns.csv and roads.csv.
+"""
+
+import heapq
+import math
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from .csr import CSRGraph
+from .graph import DATA_DIR, ROADS_CSV, TOWNS_CSV, costs, files_hash
+
+CACHE_DIR = os.path.join(DATA_DIR, "cache")
+
+
+class OneToAll:
+    """Dijkstra from one source to every town, reusing its buffers.
+
+    The cost and settled arrays are allocated once and reset in place before
+    each run, so a matrix of thousands of rows does not allocate thousands of
+    town sized lists.
+    """
+
+    def __init__(self, graph, cost_type):
+        self.offsets, self.targets, self.weights, _ = graph.adjacency(cost_type)
+        n = graph.n_towns
+        self._unreached = [math.inf] * n
+        self._unsettled = bytes(n)
+        self.path_costs = [math.inf] * n
+        self.settled = bytearray(n)
+        self.frontier = []
+
+    def run(self, source):
+        """Fill path_costs with the cost from source to every town"""
+        offsets, targets, weights = self.offsets, self.targets, self.weights
+        path_costs = self.path_costs
+        settled = self.settled
+        path_costs[:] = self._unreached
+        settled[:] = self._unsettled
+        frontier = self.frontier
+        frontier.clear()
+        path_costs[source] = 0.0
+        frontier.append((0.0, source))
+
+        while frontier:
+            g, u = heapq.heappop(frontier)
+            if settled[u]:
+                continue
+            settled[u] = 1
+            for edge in range(offsets[u], offsets[u + 1]):
+                v = targets[edge]
+                new_cost = g + weights[edge]
+                if new_cost < path_costs[v]:
+                    path_costs[v] = new_cost
+                    heapq.heappush(frontier, (new_cost, v))
+        return path_costs
+
+    def rows(self, sources, targets=None):
+        """Matrix of the costs from each source to each target (all by default)"""
+        matrix = np.empty(
+            (len(sources), len(self.path_costs) if targets is None else len(targets))
+        )
+        for i, source in enumerate(sources):
+            row = np.asarray(self.run(source))
+            matrix[i] = row if targets is None else row[targets]
+        return matrix
+
+
+# Worker state of the process pool, set once per process by _init_worker
+_worker = None
+
+
+def _init_worker(graph, cost_type):
+    global _worker
+    _worker = OneToAll(graph, cost_type)
+
+
+def _worker_rows(sources, targets):
+    return _worker.rows(sources, targets)
+
+
+def cost_matrix(graph, cost_type, sources=None, targets=None, processes=1):
+    """Costs from every source to every target of a CSRGraph, as a NumPy array.
+
+    sources and targets are town indices (all towns by default). Unreachable
+    pairs are math.inf. With processes > 1 the sources are split in chunks
+    solved by a pool whose workers each receive the graph once.
+    """
+    if sources is None:
+        sources = range(graph.n_towns)
+    sources = list(sources)
+    if targets is not None:
+        targets = np.asarray(targets, dtype=np.int64)
+    if processes is None or processes <= 1 or len(sources) < 2:
+        return OneToAll(graph, cost_type).rows(sources, targets)
+
+    chunk = max(1, math.ceil(len(sources) / (processes * 4)))
+    chunks = [sources[i : i + chunk] for i in range(0, len(sources), chunk)]
+    with ProcessPoolExecutor(
+        max_workers=processes, initializer=_init_worker, initargs=(graph, cost_type)
+    ) as pool:
+        parts = pool.map(_worker_rows, chunks, [targets] * len(chunks))
+        return np.concatenate(list(parts))
+
+
+def load_cost_matrix(
+    cost_type,
+    towns_path=TOWNS_CSV,
+    roads_path=ROADS_CSV,
+    cache_dir=CACHE_DIR,
+    processes=1,
+):
+    """Full town x town matrix for the CSV files, read from the cache if possible.
+
+    Rows and columns follow the order of towns.csv (CSRGraph indices).
+    """
+    key = files_hash(towns_path, roads_path)
+    path = os.path.join(cache_dir, f"matrix_{costs[cost_type]}_{key}.npy")
+    if os.path.exists(path):
+        return np.load(path)
+    graph = CSRGraph.from_csv(towns_path, roads_path)
+    matrix = cost_matrix(graph, cost_type, processes=processes)
+    os.makedirs(cache_dir, exist_ok=True)
+    # Write then rename, so that a crash never leaves a truncated cache file
+    temporary = path + ".tmp.npy"
+    np.save(temporary, matrix)
+    os.replace(temporary, path)
+    return matrix
+
+
+def load_cost_matrices(**options):
+    """Distance, time and hop matrices, in the order of graph.costs"""
+    return [load_cost_matrix(cost_type, **options) for cost_type in range(len(costs))]
@@ -0,0 +1,202 @@
+"""Single threaded priority queues for the search frontiers.
+
+queue.PriorityQueue takes a lock on every put/get and forces the searches
+to push duplicates and skip them later. Both queues here are keyed by town:
+push(key, priority, item) only keeps the best priority of each key.
+
+- HeapQueue uses heapq with lazy deletion: an improved priority pushes a
+  new entry and the outdated one is dropped when it reaches the top.
+- IndexedHeap is a binary heap that knows the position of every key and
+  moves it up in place (decrease-key), so it never holds stale entries.
+
+Both count pushes, pops, stale pops, decrease-keys and the peak number of
+entries held, readable with counters().
+"""
+
+import heapq
+
+
+class FrontierCounters:
+    def __init__(self):
+        self.pushes = 0
+        self.pops = 0
+        self.stale_pops = 0
+        self.decrease_keys = 0
+        self.peak_size = 0
+
+    def counters(self):
+        return {
+            "pushes": self.pushes,
+            "pops": self.pops,
+            "stale_pops": self.stale_pops,
+            "decrease_keys": self.decrease_keys,
+            "peak_size": self.peak_size,
+        }
+
+
+class HeapQueue(FrontierCounters):
+    """heapq based frontier with lazy deletion of outdated entries"""
+
+    def __init__(self):
+        super().__init__()
+        self._heap = []
+        self._best = dict()
+        self._counter = 0  # Tie break, keeps heapq from comparing items
+
+    def __len__(self):
+        return len(self._best)
+
+    def __contains__(self, key):
+        return key in self._best
+
+    def can_improve(self, key, priority):
+        """True if push(key, priority, ...) would change the queue"""
+        best = self._best.get(key)
+        return best is None or priority < best[0]
+
+    def push(self, key, priority, item):
+        """Add key or lower its priority, return False if it already had better"""
+        best = self._best.get(key)
+        if best is not None:
+            if best[0] <= priority:
+                return False
+            self.decrease_keys += 1
+        self._best[key] = (priority, self._counter)
+        heapq.heappush(self._heap, (priority, self._counter, key, item))
+        self._counter += 1
+        self.pushes += 1
+        if len(self._heap) > self.peak_size:
+            self.peak_size = len(self._heap)
+        return True
+
+    def _drop_stale(self):
+        heap = self._heap
+        while heap and self._best.get(heap[0][2]) != heap[0][:2]:
+            heapq.heappop(heap)
+            self.stale_pops += 1
+
+    def pop(self):
+        """Remove and return (priority, item) with the smallest priority"""
+        self._drop_stale()
+        priority, _, key, item = heapq.heappop(self._heap)
+        del self._best[key]
+        self.pops += 1
+        return priority, item
+
+    def min_priority(self):
+        """Smallest priority in the queue, IndexError if empty"""
+        self._drop_stale()
+        return self._heap[0][0]
+
+    def remove(self, key):
+        """Take key out of the queue if it is there, its heap entry goes stale"""
+        self._best.pop(key, None)
+
+
+class IndexedHeap(FrontierCounters):
+    """Binary heap with a key -> position index for in place decrease-key"""
+
+    def __init__(self):
+        super().__init__()
+        self._keys = []  # heap order
+        self._entries = dict()  # key -> [priority, tie break, item]
+        self._position = dict()
+        self._counter = 0
+
+    def __len__(self):
+        return len(self._keys)
+
+    def __contains__(self, key):
+        return key in self._position
+
+    def _less(self, i, j):
+        a = self._entries[self._keys[i]]
+        b = self._entries[self._keys[j]]
+        return a[0] < b[0] or (a[0] == b[0] and a[1] < b[1])
+
+    def _swap(self, i, j):
+        keys = self._keys
+        keys[i], keys[j] = keys[j], keys[i]
+        self._position[keys[i]] = i
+        self._position[keys[j]] = j
+
+    def _sift_up(self, i):
+        while i > 0:
+            up = (i - 1) >> 1
+            if not self._less(i, up):
+                break
+            self._swap(i, up)
+            i = up
+
+    def _sift_down(self, i):
+        n = len(self._keys)
+        while True:
+            smallest = i
+            for child in (2 * i + 1, 2 * i + 2):
+                if child < n and self._less(child, smallest):
+                    smallest = child
+            if smallest == i:
+                return
+            self._swap(i, smallest)
+            i = smallest
+
+    def can_improve(self, key, priority):
+        """True if push(key, priority, ...) would change the queue"""
+        entry = self._entries.get(key)
+        return entry is None or priority < entry[0]
+
+    def push(self, key, priority, item):
+        """Add key or lower its priority, return False if it already had better"""
+        entry = self._entries.get(key)
+        if entry is not None:
+            if entry[0] <= priority:
+                return False
+            entry[0] = priority
+            entry[2] = item
+            self.decrease_keys += 1
+            self.pushes += 1
+            self._sift_up(self._position[key])
+            return True
+        self._entries[key] = [priority, self._counter, item]
+        self._counter += 1
+        self._position[key] = len(self._keys)
+        self._keys.append(key)
+        self._sift_up(len(self._keys) - 1)
+        self.pushes += 1
+        if len(self._keys) > self.peak_size:
+            self.peak_size = len(self._keys)
+        return True
+
+    def pop(self):
+        """Remove and return (priority, item) with the smallest priority"""
+        if not self._keys:
+            raise IndexError("pop from an empty priority queue")
+        key = self._keys[0]
+        self._swap(0, len(self._keys) - 1)
+        self._keys.pop()
+        del self._position[key]
+        if self._keys:
+            self._sift_down(0)
+        priority, _, item = self._entries.pop(key)
+        self.pops += 1
+        return priority, item
+
+    def min_priority(self):
+        """Smallest priority in the queue, IndexError if empty"""
+        return self._entries[self._keys[0]][0]
+
+    def remove(self, key):
+        """Take key out of the queue if it is there"""
+        position = self._position.pop(key, None)
+        if position is None:
+            return
+        del self._entries[key]
+        last = self._keys.pop()
+        if position < len(self._keys):
+            self._keys[position] = last
+            self._position[last] = position
+            self._sift_up(position)
+            self._sift_down(self._position[last])
+
+
+frontier_types = {"heapq": HeapQueue, "indexed": IndexedHeap}
@@ -0,0 +1,483 @@
+import math
+from collections import deque
+
+from ..Node import Node
+from .geo import crowfliesdistance
+from .graph import COST_DISTANCE, COST_POINTS, edge_cost
+from .heuristics import component_scales
+from .pqueue import HeapQueue
+from .visitor import NULL_VISITOR
+
+
+def goal_heuristic(end_town, cost_type, heuristic=None):
+    """Return a function giving the heuristic value of a town for this goal.
+
+    The value is a lower bound of the cost to the goal in the unit of
+    cost_type. Without a heuristic provider, the distance cost gets
+    crowfliesdistance scaled by heuristics.component_scales, and the other
+    costs get 0.
+    """
+    if heuristic is not None:
+        return heuristic.goal_lookup(end_town, cost_type).__getitem__
+    if cost_type == COST_DISTANCE:
+        scale = component_scales(end_town)[COST_DISTANCE]
+        return lambda town: scale * crowfliesdistance(town, end_town)
+    return lambda town: 0
+
+
+search_algorithms = (
+    "Parcours en largeur",
+    "Parcours en profondeur",
+    "Parcours en profondeur itératif",
+    "Recherche à coût Uniforme",
+    "Recherche gloutonne",
+    "A*",
+    "Dijkstra bidirectionnel",
+    "A* bidirectionnel",
+)
+
+
+# A-Star
+def a_star(
+    start_town,
+    end_town,
+    cost_type,
+    visitor=NULL_VISITOR,
+    heuristic=None,
+    frontier=None,
+):
+    h = goal_heuristic(end_town, cost_type, heuristic)
+    if frontier is None:
+        frontier = HeapQueue()
+    start_node = Node(start_town)
+    frontier.push(start_town, h(start_town), start_node)
+    visitor.push(start_town, 1)
+    explored = set()
+
+    while frontier:
+        node_cost, node = frontier.pop()  # lowest heuristic + actual cost
+        visitor.visit(node.state)
+
+        if node.state == end_town:
+            return node
+
+        explored.add(node.state)
+        for neighbour, road in node.state.neighbours.items():
+            if neighbour in explored:
+                continue
+
+            new_actual_cost = node.path_cost + edge_cost(road, cost_type)
+            # Use heuristic from child to goal for priority + actual path cost
+            # Same as greedy but the heuristic is not alone == find the optimal path
+            priority = h(neighbour) + new_actual_cost
+            # skip if a better path to this town is already in the frontier
+            if frontier.can_improve(neighbour, priority):
+                child = Node(neighbour, node, road)
+                child.path_cost = new_actual_cost
+                frontier.push(neighbour, priority, child)
+                visitor.push(neighbour, len(frontier))
+
+
+# Recherche gloutonne
+def greedy_search(
+    start_town,
+    end_town,
+    cost_type,
+    visitor=NULL_VISITOR,
+    heuristic=None,
+    frontier=None,
+):
+    h = goal_heuristic(end_town, cost_type, heuristic)
+    if frontier is None:
+        frontier = HeapQueue()
+    start_node = Node(start_town)
+    frontier.push(start_town, h(start_town), start_node)
+    visitor.push(start_town, 1)
+    explored = set()
+
+    while frontier:
+        node_cost, node = frontier.pop()  # get the node with the lowest heuristic cost
+        visitor.visit(node.state)
+
+        if node.state == end_town:
+            return node
+
+        explored.add(node.state)
+        for neighbour, road in node.state.neighbours.items():
+            # Use heuristic from child to goal for priority
+            if neighbour in explored or neighbour in frontier:
+                continue
+
+            child = Node(neighbour, node, road)
+            child.path_cost = node.path_cost + edge_cost(road, cost_type)
+            frontier.push(neighbour, h(neighbour), child)
+            visitor.push(neighbour, len(frontier))
+
+    return None  # No path found (greedy is not complete)
+
+
+# Parcours à coût uniforme
+def ucs(start_town, end_town, cost_type, visitor=NULL_VISITOR, frontier=None):
+    if frontier is None:
+        frontier = HeapQueue()
+    start_node = Node(start_town)
+    frontier.push(start_town, start_node.path_cost, start_node)
+    visitor.push(start_town, 1)
+    explored = set()
+
+    while frontier:
+        node_cost, node = frontier.pop()  # get the node with the lowest cost
+        visitor.visit(node.state)
+
+        if node.state == end_town:
+            return node
+
+        explored.add(node.state)
+        for neighbour, road in node.state.neighbours.items():
+            if neighbour in explored:
+                continue
+
+            path_cost = node.path_cost + edge_cost(road, cost_type)
+            # skip if a better path to this town is already in the frontier
+            if frontier.can_improve(neighbour, path_cost):
+                child = Node(neighbour, node, road)
+                child.path_cost = path_cost
+                frontier.push(neighbour, path_cost, child)
+                visitor.push(neighbour, len(frontier))
+
+
+def ucs_tree(start_town, cost_type, visitor=NULL_VISITOR, frontier=None):
+    """Run ucs until the frontier is empty: the complete shortest path tree.
+
+    Returns a dict town -> Node of the shortest path from start_town to it,
+    for every reachable town.
+    """
+    if frontier is None:
+        frontier = HeapQueue()
+    start_node = Node(start_town)
+    frontier.push(start_town, start_node.path_cost, start_node)
+    visitor.push(start_town, 1)
+    tree = dict()
+
+    while frontier:
+        node_cost, node = frontier.pop()
+        visitor.visit(node.state)
+        tree[node.state] = node
+        for neighbour, road in node.state.neighbours.items():
+            if neighbour in tree:
+                continue
+            path_cost = node.path_cost + edge_cost(road, cost_type)
+            if frontier.can_improve(neighbour, path_cost):
+                child = Node(neighbour, node, road)
+                child.path_cost = path_cost
+                frontier.push(neighbour, path_cost, child)
+                visitor.push(neighbour, len(frontier))
+    return tree
+
+
+def depth_limited_search(
+    start_town,
+    end_town,
+    cost_type,
+    limit,
+    visitor=NULL_VISITOR,
+    buffers=None,
+    hops=None,
+):
+    """Depth first search down to `limit` roads, with an explicit stack.
+
+    A town is expanded again only when it is reached with fewer roads than
+    before in this search, so every town within `limit` roads is found.
+    `hops(town)` is a lower bound of the number of roads from town to
+    end_town (0 by default): a town whose depth plus this bound exceeds the
+    limit is not entered, since the end town cannot be reached through it
+    in time. Returns (path or None, next_limit) where next_limit is the
+    smallest such sum, the first limit at which a deeper search could find
+    something new (math.inf if nothing was cut off).
+
+    `buffers` = (stamp, depth_of, stack) can be passed by dfs_iter to reuse
+    the same dicts and list from one depth to the next: a town's depth_of is
+    only trusted when its stamp equals `limit`, so nothing has to be cleared.
+    """
+    if buffers is None:
+        buffers = (dict(), dict(), [])
+    if hops is None:
+        hops = lambda town: 0
+    stamp, depth_of, stack = buffers
+    stack.clear()
+    next_limit = math.inf
+
+    start_node = Node(start_town)
+    stamp[start_town] = limit
+    depth_of[start_town] = 0
+    visitor.visit(start_town)
+    if start_town == end_town:
+        return start_node, math.inf
+    stack.append((start_node, 0, iter(start_town.neighbours.items())))
+    visitor.push(start_town, 1)
+
+    while stack:
+        node, depth, neighbours = stack[-1]
+        for neighbour, road in neighbours:
+            if stamp.get(neighbour) == limit and depth_of[neighbour] <= depth + 1:
+                continue
+            bound = depth + 1 + hops(neighbour)
+            if bound > limit:
+                next_limit = min(next_limit, bound)
+                continue
+            stamp[neighbour] = limit
+            depth_of[neighbour] = depth + 1
+            child = Node(neighbour, node, road)
+            child.path_cost = node.path_cost + edge_cost(road, cost_type)
+            visitor.visit(neighbour)
+            if neighbour == end_town:
+                return child, math.inf
+            stack.append((child, depth + 1, iter(neighbour.neighbours.items())))
+            visitor.push(neighbour, len(stack))
+            break
+        else:
+            stack.pop()
+    return None, next_limit
+
+
+# Parcours en profondeur itératif
+def dfs_iter(start_town, end_town, cost_type, visitor=NULL_VISITOR, heuristic=None):
+    """Iterative deepening, the limit jumping to the next useful depth.
+
+    Depths are bounded below by the points cost (number of roads) of the
+    heuristic provider, or without one by the crow flies distance to the
+    end town divided by the longest road (in straight line), so the first
+    limit and the following ones skip the depths at which the end town
+    cannot be reached yet. The bounds are computed for the towns reached
+    only, once per query; an ALTHeuristic gives much tighter ones than the
+    straight line, and with them far fewer depths to try.
+    """
+    buffers = (dict(), dict(), [])
+    if heuristic is not None:
+        h = heuristic.goal_lookup(end_town, COST_POINTS).__getitem__
+    else:
+        scale = component_scales(end_town)[COST_POINTS]
+        h = lambda town: scale * crowfliesdistance(town, end_town)
+    bounds = dict()
+
+    def hops(town):
+        bound = bounds.get(town)
+        if bound is None:
+            bound = bounds[town] = math.ceil(h(town) - 1e-9)
+        return bound
+
+    limit = hops(start_town)
+    while True:
+        result, next_limit = depth_limited_search(
+            start_town, end_town, cost_type, limit, visitor, buffers, hops
+        )
+        if result is not None:
+            return result
+        # Every reachable town was seen: the end town is unreachable
+        if next_limit == math.inf:
+            return None
+        limit = next_limit
+
+
+# Parcours en profondeur
+def dfs(start_town, end_town, cost_type, visitor=NULL_VISITOR):
+    """Depth first search with an explicit stack of neighbour iterators"""
+    start_node = Node(start_town)
+    visitor.visit(start_town)
+    if start_town == end_town:
+        return start_node
+    explored = {start_town}
+    stack = [(start_node, iter(start_town.neighbours.items()))]
+    visitor.push(start_town, 1)
+
+    while stack:
+        node, neighbours = stack[-1]
+        for neighbour, road in neighbours:
+            if neighbour not in explored:
+                child = Node(neighbour, node, road)
+                child.path_cost = node.path_cost + edge_cost(road, cost_type)
+                visitor.visit(neighbour)
+                if neighbour == end_town:
+                    return child
+                explored.add(neighbour)
+                stack.append((child, iter(neighbour.neighbours.items())))
+                visitor.push(neighbour, len(stack))
+                break
+        else:
+            stack.pop()
+    return None
+
+
+# Parcours en largeur
+def bfs(start_town, end_town, cost_type, visitor=NULL_VISITOR):
+    start_node = Node(start_town)
+    frontier = deque([start_node])  # queue.Queue would lock on every put/get
+    visitor.push(start_town, 1)
+    explored = set()
+
+    while frontier:
+        node = frontier.popleft()
+        visitor.visit(node.state)
+
+        if node.state == end_town:
+            return node
+
+        if node.state not in explored:
+            explored.add(node.state)
+            for neighbour, road in node.state.neighbours.items():
+                child = Node(neighbour, node, road)
+                child.path_cost = node.path_cost + edge_cost(road, cost_type)
+                frontier.append(child)
+                visitor.push(neighbour, len(frontier))
+
+
+def _join_paths(forward_node, backward_node, cost_type):
+    """Extend the forward chain with the roads of the backward one"""
+    node = forward_node
+    while backward_node.parent is not None:
+        road = backward_node.road_to_parent
+        child = Node(backward_node.parent.state, node, road)
+        child.path_cost = node.path_cost + edge_cost(road, cost_type)
+        node = child
+        backward_node = backward_node.parent
+    return node
+
+
+def _bidirectional(
+    start_town, end_town, cost_type, visitor, potential, frontier_type=HeapQueue
+):
+    """Bidirectional Dijkstra on costs reduced by a potential function.
+
+    The forward search orders towns by g + potential(town) and the backward
+    one by g - potential(town). With potential = 0 this is plain
+    bidirectional Dijkstra. Since roads are undirected the backward search
+    walks the same neighbours dicts from end_town. The search stops when the
+    two smallest keys add up to the best path found so far.
+    """
+    if start_town == end_town:
+        return Node(start_town)
+
+    # Index 0: forward search from start_town, index 1: backward from end_town
+    signs = (1, -1)
+    frontiers = (frontier_type(), frontier_type())
+    best_nodes = ({start_town: Node(start_town)}, {end_town: Node(end_town)})
+    explored = (set(), set())
+    frontiers[0].push(start_town, potential(start_town), best_nodes[0][start_town])
+    frontiers[1].push(end_town, -potential(end_town), best_nodes[1][end_town])
+    visitor.push(start_town, 1)
+    visitor.push(end_town, 2)
+    best_cost = math.inf
+    meeting = None
+
+    while frontiers[0] and frontiers[1]:
+        forward_key = frontiers[0].min_priority()
+        backward_key = frontiers[1].min_priority()
+        if forward_key + backward_key >= best_cost:
+            break
+        # Expand the side with the smallest key
+        side = 0 if forward_key <= backward_key else 1
+        node_cost, node = frontiers[side].pop()
+        explored[side].add(node.state)
+        visitor.visit(node.state)
+
+        other_nodes = best_nodes[1 - side]
+        for neighbour, road in node.state.neighbours.items():
+            if neighbour in explored[side]:
+                continue
+            new_cost = node.path_cost + edge_cost(road, cost_type)
+            priority = new_cost + signs[side] * potential(neighbour)
+            if not frontiers[side].can_improve(neighbour, priority):
+                continue
+            child = Node(neighbour, node, road)
+            child.path_cost = new_cost
+            best_nodes[side][neighbour] = child
+            frontiers[side].push(neighbour, priority, child)
+            visitor.push(neighbour, len(frontiers[0]) + len(frontiers[1]))
+
+            # Both searches reached this town: candidate path
+            if neighbour in other_nodes:
+                total = new_cost + other_nodes[neighbour].path_cost
+                if total < best_cost:
+                    best_cost = total
+                    if side == 0:
+                        meeting = (child, other_nodes[neighbour])
+                    else:
+                        meeting = (other_nodes[neighbour], child)
+
+    if meeting is None:
+        return None
+    return _join_paths(meeting[0], meeting[1], cost_type)
+
+
+# Dijkstra bidirectionnel
+def bidirectional_ucs(
+    start_town, end_town, cost_type, visitor=NULL_VISITOR, frontier_type=HeapQueue
+):
+    return _bidirectional(
+        start_town, end_town, cost_type, visitor, lambda town: 0, frontier_type
+    )
+
+
+# A* bidirectionnel
+def bidirectional_a_star(
+    start_town,
+    end_town,
+    cost_type,
+    visitor=NULL_VISITOR,
+    heuristic=None,
+    frontier_type=HeapQueue,
+):
+    """Bidirectional A* with the average potential of Ikeda et al.
+
+    p(town) = (h_end(town) - h_start(town)) / 2 keeps the reduced costs of
+    both searches non negative when the heuristic is consistent, so the
+    plain bidirectional Dijkstra stopping rule stays exact.
+    """
+    h_end = goal_heuristic(end_town, cost_type, heuristic)
+    h_start = goal_heuristic(start_town, cost_type, heuristic)
+
+    def potential(town):
+        return (h_end(town) - h_start(town)) / 2
+
+    return _bidirectional(
+        start_town, end_town, cost_type, visitor, potential, frontier_type
+    )
+
+
+# Same order as search_algorithms
+search_functions = (
+    bfs,
+    dfs,
+    dfs_iter,
+    ucs,
+    greedy_search,
+    a_star,
+    bidirectional_ucs,
+    bidirectional_a_star,
+)
+informed_searches = (dfs_iter, greedy_search, a_star, bidirectional_a_star)
+# Searches returning a shortest path for the cost type
+optimal_searches = (ucs, a_star, bidirectional_ucs, bidirectional_a_star)
+
+
+def run_search(
+    search_method,
+    start_town,
+    end_town,
+    cost_type,
+    visitor=NULL_VISITOR,
+    heuristic=None,
+):
+    """Run the search algorithm at index `search_method` of search_algorithms.
+
+    `heuristic` is an optional HaversineHeuristic given to the informed searches.
+    """
+    if not 0 <= search_method < len(search_functions):
+        return None
+    search = search_functions[search_method]
+    if search in informed_searches:
+        path = search(start_town, end_town, cost_type, visitor, heuristic)
+    else:
+        path = search(start_town, end_town, cost_type, visitor)
+    visitor.finish()
+    return path
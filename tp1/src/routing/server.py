@@ -0,0 +1,289 @@
+"""Asynchronous route server over HTTP (TCP or Unix socket).
+
+GET /route?start=<dept_id>&end=<dept_id>[&algorithm=a_star][&cost=distance]
+[&budget=<towns>] answers a JSON object with the status ("found",
+"unreachable" or "budget_exceeded"), the path cost, the dept_ids of the
+path, the number of towns expanded and the search time. start and end
+may also be given as <latitude>,<longitude>: the nearest town is used.
+GET /stats returns the server counters.
+
+The event loop only parses requests: searches run in a worker pool on the
+Town/Road graph through search.run_search, with the same algorithm and cost
+names as the batch mode. Identical queries arriving while one is already
+being solved wait for that search instead of starting another one, and
+each search is stopped by a BudgetVisitor after `budget` expanded towns
+(at most the server's --budget, which is also the default).
+
+python -m src.routing.server --port 8080 --workers 4 (from tp1/)
+"""
+
+import argparse
+import asyncio
+import json
+import multiprocessing
+import time
+from concurrent.futures import ProcessPoolExecutor
+from urllib.parse import parse_qs, urlsplit
+
+from .batch import batch_algorithms, parse_algorithm, parse_cost
+from .graph import ROADS_CSV, TOWNS_CSV, costs
+from .heuristics import HaversineHeuristic
+from .search import run_search
+from .snapshot import SNAPSHOT_DIR, open_graph
+from .spatial import TownIndex
+from .visitor import BudgetExceeded, BudgetVisitor
+
+DEFAULT_BUDGET = 100_000
+MAX_REQUEST_LINE = 8192
+
+# Worker state, set once per process by _init_worker
+_towns = None
+_heuristic = None
+
+
+def _init_worker(snapshot_dir, towns_path, roads_path):
+    global _towns, _heuristic
+    _towns, roads = open_graph(snapshot_dir, towns_path, roads_path).to_graph()
+    _heuristic = HaversineHeuristic.from_towns(_towns, roads)
+
+
+def _worker_route(query):
+    """Solve one (start, end, algorithm, cost_type, budget) query in a worker"""
+    start, end, algorithm, cost_type, budget = query
+    visitor = BudgetVisitor(budget)
+    begin = time.perf_counter()
+    result = {"status": "found", "path_cost": None, "path": None}
+    try:
+        path = run_search(
+            batch_algorithms.index(algorithm),
+            _towns[start],
+            _towns[end],
+            cost_type,
+            visitor,
+            _heuristic,
+        )
+    except BudgetExceeded:
+        result["status"] = "budget_exceeded"
+    else:
+        if path is None:
+            result["status"] = "unreachable"
+        else:
+            result["path_cost"] = path.path_cost
+            steps = []
+            while path is not None:
+                steps.append(path.state.dept_id)
+                path = path.parent
+            result["path"] = steps[::-1]
+    result["expanded"] = visitor.visits
+    result["time_ms"] = round((time.perf_counter() - begin) * 1e3, 3)
+    return result
+
+
+class RouteServer:
+    """HTTP front end dispatching route queries to an executor.
+
+    The executor must run _worker_route with the worker state initialised,
+    see make_executor. `in_flight` maps a query to the future of the search
+    solving it, shared by every request for that query. `index` is a
+    TownIndex keyed by dept_id, which snaps coordinates given as start or
+    end to a town; without it only dept_ids are accepted.
+    """
+
+    def __init__(self, executor, dept_ids, max_budget=DEFAULT_BUDGET, index=None):
+        self.executor = executor
+        self.dept_ids = set(dept_ids)
+        self.max_budget = max_budget
+        self.index = index
+        self.in_flight = dict()
+        self.requests = 0
+        self.searches = 0
+        self.coalesced = 0
+        self.budget_exceeded = 0
+        self.errors = 0
+
+    def stats(self):
+        return {
+            "requests": self.requests,
+            "searches": self.searches,
+            "coalesced": self.coalesced,
+            "budget_exceeded": self.budget_exceeded,
+            "errors": self.errors,
+            "in_flight": len(self.in_flight),
+        }
+
+    def parse_query(self, parameters):
+        """(start, end, algorithm, cost_type, budget) from the query string"""
+
+        def get(name, default=None):
+            values = parameters.get(name)
+            if not values:
+                if default is None:
+                    raise ValueError(f"missing parameter {name!r}")
+                return default
+            return values[0]
+
+        start, end = self.parse_town(get("start")), self.parse_town(get("end"))
+        algorithm = parse_algorithm(get("algorithm", "a_star"))
+        if algorithm == "ch":
+            raise ValueError("ch is only available in batch mode")
+        cost_type = parse_cost(get("cost", costs[0]))
+        budget = min(int(get("budget", str(self.max_budget))), self.max_budget)
+        if budget <= 0:
+            raise ValueError("budget must be positive")
+        return start, end, algorithm, cost_type, budget
+
+    def parse_town(self, value):
+        """dept_id given as such, or of the town nearest to latitude,longitude"""
+        if "," in value and self.index is not None:
+            latitude, longitude = (float(part) for part in value.split(","))
+            if not (-90 <= latitude <= 90 and -180 <= longitude <= 180):
+                raise ValueError(f"invalid coordinates {value!r}")
+            return self.index.nearest(latitude, longitude)
+        dept_id = int(value)
+        if dept_id not in self.dept_ids:
+            raise ValueError(f"unknown dept_id {dept_id}")
+        return dept_id
+
+    async def route(self, query):
+        """Result of a query, sharing the search of an identical one in flight"""
+        future = self.in_flight.get(query)
+        if future is None:
+            loop = asyncio.get_running_loop()
+            future = loop.run_in_executor(self.executor, _worker_route, query)
+            self.in_flight[query] = future
+            future.add_done_callback(lambda done: self.in_flight.pop(query, None))
+            self.searches += 1
+        else:
+            self.coalesced += 1
+        # A client going away must not cancel the search others are waiting on
+        return await asyncio.shield(future)
+
+    async def dispatch(self, method, target):
+        """Return (HTTP status, JSON body) for one request"""
+        if method != "GET":
+            return 405, {"error": "only GET is supported"}
+        url = urlsplit(target)
+        if url.path == "/stats":
+            return 200, self.stats()
+        if url.path != "/route":
+            return 404, {"error": f"no route {url.path}"}
+        try:
+            query = self.parse_query(parse_qs(url.query))
+        except ValueError as error:
+            self.errors += 1
+            return 400, {"error": str(error)}
+        result = await self.route(query)
+        if result["status"] == "budget_exceeded":
+            self.budget_exceeded += 1
+        return 200, result
+
+    async def handle(self, reader, writer):
+        """Serve the requests of one connection, keeping it alive if asked"""
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line:
+                    break
+                if len(request_line) > MAX_REQUEST_LINE:
+                    break
+                keep_alive = request_line.rstrip().endswith(b"HTTP/1.1")
+                while True:
+                    header = await reader.readline()
+                    if header in (b"\r\n", b"\n", b""):
+                        break
+                    name, _, value = header.decode("latin-1").partition(":")
+                    if name.strip().lower() == "connection":
+                        keep_alive = value.strip().lower() == "keep-alive"
+                self.requests += 1
+                try:
+                    method, target, _ = request_line.decode("latin-1").split()
+                except ValueError:
+                    status, body = 400, {"error": "malformed request line"}
+                else:
+                    status, body = await self.dispatch(method, target)
+                payload = json.dumps(body).encode()
+                writer.write(
+                    f"HTTP/1.1 {status} {_reasons.get(status, '')}\r\n"
+                    f"Content-Type: application/json\r\n"
+                    f"Content-Length: {len(payload)}\r\n"
+                    f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n"
+                    f"\r\n".encode() + payload
+                )
+                await writer.drain()
+                if not keep_alive:
+                    break
+        except (ConnectionError, ValueError):
+            pass  # Client gone, or a line longer than the stream limit
+        finally:
+            writer.close()
+
+    async def start(self, host="127.0.0.1", port=8080, unix_path=None):
+        """Listen on a TCP port, or on a Unix socket if unix_path is given"""
+        if unix_path is not None:
+            return await asyncio.start_unix_server(self.handle, unix_path)
+        return await asyncio.start_server(self.handle, host, port)
+
+
+_reasons = {200: "OK", 400: "Bad Request", 404: "Not Found", 405: "Method Not Allowed"}
+
+
+def make_executor(
+    workers=1, snapshot_dir=SNAPSHOT_DIR, towns_path=TOWNS_CSV, roads_path=ROADS_CSV
+):
+    """Process pool whose workers each load the Town/Road graph once.
+
+    The workers only start with the first search, inside handle: forked from
+    the server, they would inherit the open client sockets and keep those
+    connections from ever closing. They are started from a forkserver
+    instead, which holds no socket.
+    """
+    return ProcessPoolExecutor(
+        max_workers=workers,
+        mp_context=multiprocessing.get_context("forkserver"),
+        initializer=_init_worker,
+        initargs=(snapshot_dir, towns_path, roads_path),
+    )
+
+
+def create_server(
+    workers=1,
+    budget=DEFAULT_BUDGET,
+    snapshot_dir=SNAPSHOT_DIR,
+    towns_path=TOWNS_CSV,
+    roads_path=ROADS_CSV,
+):
+    """RouteServer with its worker pool, compiling the snapshot if needed"""
+    graph = open_graph(snapshot_dir, towns_path, roads_path, recompile=True)
+    executor = make_executor(workers, snapshot_dir, towns_path, roads_path)
+    dept_ids = graph.dept_ids.tolist()
+    index = TownIndex(graph.latitudes, graph.longitudes, dept_ids)
+    return RouteServer(executor, dept_ids, budget, index)
+
+
+async def serve(route_server, host, port, unix_path=None):
+    server = await route_server.start(host, port, unix_path)
+    where = unix_path or f"http://{host}:{port}"
+    print(f"Itineria: {where}", flush=True)
+    async with server:
+        await server.serve_forever()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8080)
+    parser.add_argument("--unix", help="Unix socket path instead of TCP")
+    parser.add_argument("-w", "--workers", type=int, default=1)
+    parser.add_argument("--budget", type=int, default=DEFAULT_BUDGET)
+    parser.add_argument("--towns", default=TOWNS_CSV)
+    parser.add_argument("--roads", default=ROADS_CSV)
+    parser.add_argument("--snapshot", default=SNAPSHOT_DIR)
+    args = parser.parse_args()
+    route_server = create_server(
+        args.workers, args.budget, args.snapshot, args.towns, args.roads
+    )
+    with route_server.executor:
+        try:
+            asyncio.run(serve(route_server, args.host, args.port, args.unix))
+        except KeyboardInterrupt:
+            pass
@@ -0,0 +1,221 @@
+"""Binary snapshot of the road network for fast startup.
+
+compile_snapshot turns towns.csv and roads.csv into a directory of .npy
+arrays (coordinates, CSR adjacency, weight columns, UTF-8 name table) plus
+a meta.json holding the format version, the size, mtime and SHA-1 of both
+CSV files and the generation of the arrays. load_snapshot opens the arrays
+with mmap, so a CSRGraph is ready without parsing anything; pages are read
+from disk when a search first touches them.
+
+Each compilation writes its arrays to a new generation subdirectory and
+only then replaces meta.json, which names it, so a reader never sees
+arrays being written or arrays of another compilation than its meta.json.
+Generations are named after their start time. The previous one is kept
+for the readers that have just read the old meta.json, and the older ones
+are removed (not the newer ones, another compilation may be writing them).
+
+open_graph is the entry point: it uses the snapshot when it is up to date
+with the CSV files and reads the CSV files otherwise.
+
+Compile the default snapshot with `python -m src.routing.snapshot` (from tp1/).
+"""
+
+import json
+import os
+import shutil
+import time
+import uuid
+
+import numpy as np
+
+from .csr import CSRGraph
+from .graph import DATA_DIR, ROADS_CSV, TOWNS_CSV, files_hash
+
+SNAPSHOT_DIR = os.path.join(DATA_DIR, "snapshot")
+SNAPSHOT_VERSION = 2
+ARRAYS = (
+    "dept_ids",
+    "latitudes",
+    "longitudes",
+    "offsets",
+    "targets",
+    "distances",
+    "times",
+    "road_ids",
+    "name_offsets",
+    "name_bytes",
+)
+
+
+class StringTable:
+    """Read only sequence of strings stored as one UTF-8 buffer and offsets"""
+
+    def __init__(self, offsets, data):
+        self.offsets = offsets
+        self.data = data
+
+    @classmethod
+    def from_strings(cls, strings):
+        encoded = [string.encode("utf-8") for string in strings]
+        offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+        np.cumsum([len(string) for string in encoded], out=offsets[1:])
+        data = np.frombuffer(b"".join(encoded), dtype=np.uint8)
+        return cls(offsets, data)
+
+    def __len__(self):
+        return len(self.offsets) - 1
+
+    def __getitem__(self, i):
+        if i < 0:
+            i += len(self)
+        start, end = int(self.offsets[i]), int(self.offsets[i + 1])
+        return self.data[start:end].tobytes().decode("utf-8")
+
+    def __iter__(self):
+        for i in range(len(self)):
+            yield self[i]
+
+
+def _source_stamp(path):
+    stat = os.stat(path)
+    return {"size": stat.st_size, "mtime_ns": stat.st_mtime_ns}
+
+
+def compile_snapshot(
+    snapshot_dir=SNAPSHOT_DIR, towns_path=TOWNS_CSV, roads_path=ROADS_CSV
+):
+    """Parse the CSV files once and write the snapshot, return the CSRGraph"""
+    graph = CSRGraph.from_csv(towns_path, roads_path)
+    names = StringTable.from_strings(graph.names)
+    arrays = {
+        "dept_ids": graph.dept_ids,
+        "latitudes": graph.latitudes,
+        "longitudes": graph.longitudes,
+        "offsets": graph.offsets,
+        "targets": graph.targets,
+        "distances": graph.distances,
+        "times": graph.times,
+        "road_ids": graph.road_ids,
+        "name_offsets": names.offsets,
+        "name_bytes": names.data,
+    }
+    previous = read_meta(snapshot_dir)
+    generation = f"{time.time_ns():016x}-{uuid.uuid4().hex[:8]}"
+    os.makedirs(os.path.join(snapshot_dir, generation))
+    for name in ARRAYS:
+        np.save(os.path.join(snapshot_dir, generation, name + ".npy"), arrays[name])
+    meta = {
+        "version": SNAPSHOT_VERSION,
+        "generation": generation,
+        "n_towns": graph.n_towns,
+        "n_edges": graph.n_edges,
+        "towns": _source_stamp(towns_path),
+        "roads": _source_stamp(roads_path),
+        "sha1": files_hash(towns_path, roads_path),
+    }
+    # meta.json is written last: it only ever names complete arrays
+    temporary = os.path.join(snapshot_dir, f"meta.json.{generation}.tmp")
+    with open(temporary, "w") as file:
+        json.dump(meta, file, indent=2)
+    os.replace(temporary, os.path.join(snapshot_dir, "meta.json"))
+    _remove_old_generations(snapshot_dir, _generation(previous) or generation)
+    return graph
+
+
+def _generation(meta):
+    if meta is None or meta.get("version") != SNAPSHOT_VERSION:
+        return None
+    return meta["generation"]
+
+
+def _remove_old_generations(snapshot_dir, oldest_kept):
+    """Remove the generations started before oldest_kept"""
+    for entry in os.scandir(snapshot_dir):
+        if entry.is_dir():
+            if entry.name < oldest_kept:
+                shutil.rmtree(entry.path, ignore_errors=True)
+        elif entry.name.endswith(".npy"):
+            os.remove(entry.path)  # Arrays of the version 1 layout
+
+
+def read_meta(snapshot_dir=SNAPSHOT_DIR):
+    path = os.path.join(snapshot_dir, "meta.json")
+    if not os.path.exists(path):
+        return None
+    with open(path) as file:
+        return json.load(file)
+
+
+def is_fresh(meta, towns_path=TOWNS_CSV, roads_path=ROADS_CSV):
+    """True if the snapshot described by meta matches the CSV files.
+
+    Size and mtime are compared first; the SHA-1 is only computed when they
+    differ (e.g. after a checkout that rewrote identical files).
+    """
+    if meta is None or meta.get("version") != SNAPSHOT_VERSION:
+        return False
+    if not (os.path.exists(towns_path) and os.path.exists(roads_path)):
+        return True  # Only the snapshot was shipped
+    if meta["towns"] == _source_stamp(towns_path) and meta["roads"] == _source_stamp(
+        roads_path
+    ):
+        return True
+    return meta["sha1"] == files_hash(towns_path, roads_path)
+
+
+def load_snapshot(snapshot_dir=SNAPSHOT_DIR, meta=None):
+    """Memory map the snapshot arrays into a CSRGraph, without checking freshness.
+
+    `meta` is the content of meta.json, read again when not given: the
+    arrays loaded are those of the generation it names.
+    """
+    if meta is None:
+        meta = read_meta(snapshot_dir)
+    generation = _generation(meta)
+    if generation is None:
+        raise FileNotFoundError(f"no snapshot in {snapshot_dir}")
+    arrays = {
+        name: np.load(
+            os.path.join(snapshot_dir, generation, name + ".npy"), mmap_mode="r"
+        )
+        for name in ARRAYS
+    }
+    return CSRGraph(
+        dept_ids=arrays["dept_ids"],
+        names=StringTable(arrays["name_offsets"], arrays["name_bytes"]),
+        latitudes=arrays["latitudes"],
+        longitudes=arrays["longitudes"],
+        offsets=arrays["offsets"],
+        targets=arrays["targets"],
+        distances=arrays["distances"],
+        times=arrays["times"],
+        road_ids=arrays["road_ids"],
+    )
+
+
+def open_graph(
+    snapshot_dir=SNAPSHOT_DIR,
+    towns_path=TOWNS_CSV,
+    roads_path=ROADS_CSV,
+    recompile=False,
+):
+    """CSRGraph from the snapshot if it is fresh, from the CSV files otherwise.
+
+    With recompile set, a stale or missing snapshot is rebuilt on the way.
+    """
+    for _ in range(3):
+        meta = read_meta(snapshot_dir)
+        if not is_fresh(meta, towns_path, roads_path):
+            break
+        try:
+            return load_snapshot(snapshot_dir, meta)
+        except FileNotFoundError:
+            continue  # Generation removed by two newer compilations meanwhile
+    if recompile:
+        return compile_snapshot(snapshot_dir, towns_path, roads_path)
+    return CSRGraph.from_csv(towns_path, roads_path)
+
+
+if __name__ == "__main__":
+    graph = compile_snapshot()
+    print(f"{graph.n_towns} villes, {graph.n_roads} routes -> {SNAPSHOT_DIR}")
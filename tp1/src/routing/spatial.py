@@ -0,0 +1,369 @@
+"""Nearest town of arbitrary coordinates.
+
+TownIndex is a k-d tree over the towns placed on the unit sphere: a
+latitude/longitude becomes a 3D unit vector, and the straight (chord)
+distance between two such vectors grows with their great circle distance,
+so the nearest town in 3D is the nearest town by haversine, without the
+distortion of a latitude/longitude grid. Distances are returned in km.
+
+The tree is implicit: towns are reordered so that every node covers a
+contiguous range, split at the median along the axis where its towns are
+the most spread out, and each node keeps the bounding box of its towns.
+Queries are answered in bulk with NumPy, one tree level at a time for
+every point of a chunk. Each point first goes down to its leaf; when the
+ball around it reaching its k-th nearest town of that leaf does not cross
+any splitting plane, those towns are the answer. Otherwise the ball
+bounds the search, and only the leaves whose box intersects it are
+scanned. Single points (nearest, k_nearest) walk the same tree in plain
+Python instead, on lists made on the first such query.
+
+Snap a CSV file of latitude;longitude rows with
+`python -m src.routing.spatial points.csv -o snapped.csv` (from tp1/).
+"""
+
+import argparse
+import contextlib
+import csv
+import heapq
+import math
+import sys
+
+import numpy as np
+
+from .geo import EARTH_RADIUS
+from .graph import ROADS_CSV, TOWNS_CSV
+from .snapshot import SNAPSHOT_DIR, open_graph
+
+CHUNK = 16_384
+
+
+def unit_vectors(latitudes, longitudes):
+    """(n, 3) array of the points on the unit sphere, from degrees"""
+    lat = np.radians(np.asarray(latitudes, dtype=np.float64))
+    lon = np.radians(np.asarray(longitudes, dtype=np.float64))
+    cos_lat = np.cos(lat)
+    return np.stack((cos_lat * np.cos(lon), cos_lat * np.sin(lon), np.sin(lat)), 1)
+
+
+def chord_to_km(chord2):
+    """Great circle distance in km from the squared chord on the unit sphere"""
+    return 2 * EARTH_RADIUS * np.arcsin(np.minimum(np.sqrt(chord2) / 2, 1.0))
+
+
+class TownIndex:
+    """k-d tree answering nearest and k nearest town queries.
+
+    Like HaversineHeuristic, `keys` maps the rows of the coordinates to the
+    towns returned by nearest and k_nearest: None for a CSRGraph (towns are
+    indices), a list of Town objects for the object graph, or any list such
+    as the dept_ids. snap always works on rows.
+    """
+
+    leaf_size = 16
+
+    def __init__(self, latitudes, longitudes, keys=None, leaf_size=None):
+        if leaf_size is not None:
+            self.leaf_size = leaf_size
+        points = unit_vectors(latitudes, longitudes)
+        n = len(points)
+        if n == 0:
+            raise ValueError("TownIndex needs at least one town")
+        self.keys = keys
+        # Deepest level whose nodes still hold at least one town each
+        depth = 0
+        while -(-n >> depth) > self.leaf_size and n >> (depth + 1) >= 1:
+            depth += 1
+        self.depth = depth
+
+        order = np.arange(n)
+        split_axis = np.zeros(2**depth - 1, dtype=np.int64)
+        split_value = np.zeros(2**depth - 1)
+        starts = [0]
+        ends = [n]
+        bounds = np.array([0, n])
+        for level in range(depth):
+            middles = (bounds[:-1] + bounds[1:]) // 2
+            first = 2**level - 1
+            for j, (lo, middle, hi) in enumerate(
+                zip(bounds[:-1].tolist(), middles.tolist(), bounds[1:].tolist())
+            ):
+                block = points[order[lo:hi]]
+                axis = int(np.argmax(np.ptp(block, axis=0)))
+                part = np.argpartition(block[:, axis], middle - lo)
+                order[lo:hi] = order[lo:hi][part]
+                split_axis[first + j] = axis
+                split_value[first + j] = points[order[middle], axis]
+            next_bounds = np.empty(2 * len(bounds) - 1, dtype=np.int64)
+            next_bounds[0::2] = bounds
+            next_bounds[1::2] = middles
+            bounds = next_bounds
+            starts.extend(bounds[:-1].tolist())
+            ends.extend(bounds[1:].tolist())
+
+        self.rows = order
+        self.points = points[order]
+        self.split_axis = split_axis
+        self.split_value = split_value
+        self.starts = np.asarray(starts, dtype=np.int64)
+        self.ends = np.asarray(ends, dtype=np.int64)
+        # Bounding boxes, from the leaves up
+        box_low = np.empty((len(starts), 3))
+        box_high = np.empty((len(starts), 3))
+        leaves = slice(2**depth - 1, 2 ** (depth + 1) - 1)
+        box_low[leaves] = np.minimum.reduceat(self.points, bounds[:-1], axis=0)
+        box_high[leaves] = np.maximum.reduceat(self.points, bounds[:-1], axis=0)
+        for level in range(depth - 1, -1, -1):
+            nodes = np.arange(2**level - 1, 2 ** (level + 1) - 1)
+            box_low[nodes] = np.minimum(box_low[2 * nodes + 1], box_low[2 * nodes + 2])
+            box_high[nodes] = np.maximum(
+                box_high[2 * nodes + 1], box_high[2 * nodes + 2]
+            )
+        self.box_low = box_low
+        self.box_high = box_high
+        self._tree_lists = None
+
+    @classmethod
+    def from_towns(cls, towns, leaf_size=None):
+        """Index of the Town objects returned by load_graph"""
+        keys = list(towns.values())
+        return cls(
+            [town.latitude for town in keys],
+            [town.longitude for town in keys],
+            keys,
+            leaf_size,
+        )
+
+    @classmethod
+    def from_csr(cls, graph, leaf_size=None):
+        """Index of a CSRGraph, towns are indices"""
+        return cls(graph.latitudes, graph.longitudes, None, leaf_size)
+
+    def __len__(self):
+        return len(self.rows)
+
+    def _scan(self, queries, nodes):
+        """Squared chords from each query to the towns of its node, inf padded"""
+        starts, ends = self.starts[nodes], self.ends[nodes]
+        width = int(np.max(ends - starts))
+        positions = starts[:, None] + np.arange(width)
+        valid = positions < ends[:, None]
+        positions = np.minimum(positions, len(self.rows) - 1)
+        chord2 = ((self.points[positions] - queries[:, None, :]) ** 2).sum(axis=2)
+        chord2[~valid] = np.inf
+        return positions, chord2
+
+    def _query(self, queries, k):
+        """(rows, squared chords) of the k nearest towns of each query, sorted"""
+        m = len(queries)
+        everyone = np.arange(m)
+        # Candidates: the towns of the deepest node holding k towns, going
+        # down the splits, and the distance to the nearest splitting plane
+        nodes = np.zeros(m, dtype=np.int64)
+        margin = np.full(m, np.inf)
+        for level in range(self.depth):
+            if len(self) >> (level + 1) < k:
+                break
+            offset = queries[everyone, self.split_axis[nodes]] - self.split_value[nodes]
+            margin = np.minimum(margin, offset**2)
+            nodes = 2 * nodes + 1 + (offset >= 0)
+        positions, chord2 = self._scan(queries, nodes)
+        best = np.argsort(chord2, axis=1)[:, :k]
+        rows = self.rows[np.take_along_axis(positions, best, axis=1)]
+        chord2 = np.take_along_axis(chord2, best, axis=1)
+        # A ball around the query that stays inside its cell holds the answer
+        unsettled = np.flatnonzero(chord2[:, -1] >= margin)
+        if len(unsettled):
+            rows[unsettled], chord2[unsettled] = self._search(
+                queries[unsettled], chord2[unsettled, -1], k
+            )
+        return rows, chord2
+
+    def _search(self, queries, radius, k):
+        """Same as _query, scanning every leaf whose box meets the radius ball"""
+        m = len(queries)
+        owners, nodes = np.arange(m), np.zeros(m, dtype=np.int64)
+        for level in range(self.depth):
+            owners = np.concatenate((owners, owners))
+            nodes = np.concatenate((2 * nodes + 1, 2 * nodes + 2))
+            points = queries[owners]
+            gap = np.maximum(self.box_low[nodes] - points, 0) + np.maximum(
+                points - self.box_high[nodes], 0
+            )
+            close = (gap**2).sum(axis=1) <= radius[owners]
+            owners, nodes = owners[close], nodes[close]
+        positions, chord2 = self._scan(queries[owners], nodes)
+
+        owners = np.repeat(owners, positions.shape[1])
+        positions, chord2 = positions.ravel(), chord2.ravel()
+        inside = chord2 <= radius[owners]
+        owners, positions, chord2 = owners[inside], positions[inside], chord2[inside]
+        ranked = np.lexsort((chord2, owners))
+        owners, positions, chord2 = owners[ranked], positions[ranked], chord2[ranked]
+        rank = np.arange(len(owners)) - np.searchsorted(owners, owners)
+        kept = rank < k
+        rows = np.empty((m, k), dtype=np.int64)
+        distances = np.empty((m, k))
+        rows[owners[kept], rank[kept]] = self.rows[positions[kept]]
+        distances[owners[kept], rank[kept]] = chord2[kept]
+        return rows, distances
+
+    def snap(self, latitudes, longitudes, k=1):
+        """Rows and distances in km of the k nearest towns of every point.
+
+        Return two (points, k) arrays, nearest first; k is capped to the
+        number of towns. Points are processed by chunks of CHUNK.
+        """
+        queries = unit_vectors(latitudes, longitudes).reshape(-1, 3)
+        k = min(k, len(self))
+        rows = np.empty((len(queries), k), dtype=np.int64)
+        distances = np.empty((len(queries), k))
+        for first in range(0, len(queries), CHUNK):
+            chunk = slice(first, first + CHUNK)
+            rows[chunk], distances[chunk] = self._query(queries[chunk], k)
+        return rows, chord_to_km(distances)
+
+    def _key(self, row):
+        return row if self.keys is None else self.keys[row]
+
+    def _lists(self):
+        """The tree as Python lists, for single point queries"""
+        if self._tree_lists is None:
+            self._tree_lists = (
+                self.split_axis.tolist(),
+                self.split_value.tolist(),
+                self.box_low.tolist(),
+                self.box_high.tolist(),
+                self.starts.tolist(),
+                self.ends.tolist(),
+                self.points.tolist(),
+                self.rows.tolist(),
+            )
+        return self._tree_lists
+
+    def _query_one(self, latitude, longitude, k):
+        """[(squared chord, row)] of the k nearest towns of one point, sorted.
+
+        Plain Python: for a single point, the NumPy calls of _query cost
+        more than the few nodes actually visited.
+        """
+        axes, splits, lows, highs, starts, ends, points, rows = self._lists()
+        lat, lon = math.radians(latitude), math.radians(longitude)
+        query = (
+            math.cos(lat) * math.cos(lon),
+            math.cos(lat) * math.sin(lon),
+            math.sin(lat),
+        )
+        qx, qy, qz = query
+        first_leaf = 2**self.depth - 1
+        best = []  # Max heap of (-chord2, row)
+        worst = math.inf
+        stack = [0]
+        while stack:
+            node = stack.pop()
+            if worst < math.inf:
+                gap = 0.0
+                for q, low, high in zip(query, lows[node], highs[node]):
+                    if q < low:
+                        gap += (low - q) ** 2
+                    elif q > high:
+                        gap += (q - high) ** 2
+                if gap > worst:
+                    continue
+            if node >= first_leaf:
+                for position in range(starts[node], ends[node]):
+                    x, y, z = points[position]
+                    chord2 = (x - qx) ** 2 + (y - qy) ** 2 + (z - qz) ** 2
+                    if len(best) < k:
+                        heapq.heappush(best, (-chord2, rows[position]))
+                    elif chord2 < worst:
+                        heapq.heapreplace(best, (-chord2, rows[position]))
+                    if len(best) == k:
+                        worst = -best[0][0]
+                continue
+            near = 2 * node + 1
+            if query[axes[node]] >= splits[node]:
+                near += 1
+            stack.append(4 * node + 3 - near)  # The other child, visited last
+            stack.append(near)
+        return sorted((-chord2, row) for chord2, row in best)
+
+    def nearest(self, latitude, longitude):
+        """Nearest town of a point given in degrees"""
+        return self._key(self._query_one(latitude, longitude, 1)[0][1])
+
+    def k_nearest(self, latitude, longitude, k):
+        """List of the (town, distance in km) of the k nearest towns, nearest first"""
+        return [
+            (self._key(row), float(chord_to_km(chord2)))
+            for chord2, row in self._query_one(latitude, longitude, k)
+        ]
+
+
+def read_points(file):
+    """Yield (latitude, longitude) pairs from a ";" separated file.
+
+    Rows starting with "#" and a first row that is not numeric (a header)
+    are skipped; ValueError names the line of the first malformed row.
+    """
+    for line, row in enumerate(csv.reader(file, delimiter=";"), 1):
+        if not row or row[0].startswith("#"):
+            continue
+        try:
+            if len(row) != 2:
+                raise ValueError(f"expected 2 fields, got {len(row)}")
+            yield float(row[0]), float(row[1])
+        except ValueError as error:
+            if line == 1:
+                continue
+            raise ValueError(f"line {line}: {error}") from None
+
+
+def main(arguments=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("points", help='latitude;longitude file, "-" for stdin')
+    parser.add_argument("-o", "--output", help="result file, stdout by default")
+    parser.add_argument("-k", type=int, default=1, help="towns per point")
+    parser.add_argument("--towns", default=TOWNS_CSV)
+    parser.add_argument("--roads", default=ROADS_CSV)
+    parser.add_argument("--snapshot", default=SNAPSHOT_DIR)
+    args = parser.parse_args(arguments)
+    if args.k < 1:
+        parser.error("-k must be positive")
+
+    graph = open_graph(args.snapshot, args.towns, args.roads, recompile=True)
+    index = TownIndex.from_csr(graph)
+    # Only the files opened here are closed, never stdin and stdout
+    with contextlib.ExitStack() as files:
+        source, output = sys.stdin, sys.stdout
+        if args.points != "-":
+            source = files.enter_context(open(args.points, newline=""))
+        if args.output is not None:
+            output = files.enter_context(open(args.output, "w", newline=""))
+        writer = csv.writer(output, delimiter=";", lineterminator="\n")
+        writer.writerow(("latitude", "longitude", "rank", "dept_id", "distance"))
+        points = read_points(source)
+        try:
+            while True:
+                chunk = [point for _, point in zip(range(CHUNK), points)]
+                if not chunk:
+                    break
+                latitudes, longitudes = zip(*chunk)
+                rows, distances = index.snap(latitudes, longitudes, args.k)
+                dept_ids = graph.dept_ids[rows].tolist()
+                for i, (latitude, longitude) in enumerate(chunk):
+                    for rank in range(rows.shape[1]):
+                        writer.writerow(
+                            (
+                                latitude,
+                                longitude,
+                                rank + 1,
+                                dept_ids[i][rank],
+                                round(float(distances[i, rank]), 3),
+                            )
+                        )
+        except ValueError as error:
+            parser.error(f"{args.points}: {error}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,260 @@
+"""Instrumentation of the Town/Road searches.
+
+instrumented_search runs a search like run_search and also returns its
+statistics: towns expanded and generated (added to the frontier),
+duplicate pushes (a town added again, through a better path or, for the
+blind searches, from another neighbour), the peak frontier size, the
+number of heuristic evaluations, and the search time split between the
+heuristic, the priority queue, the visitor (drawing, for the GUI) and the
+expansion itself (everything else).
+
+The counters come from a SearchStats visitor wrapped around the caller's
+visitor; the priority queue and the heuristic provider are wrapped to be
+timed. Queue time is only measured for the searches using a priority queue
+(ucs, greedy, A* and the bidirectional ones).
+
+With `trace`, the order in which towns were expanded is saved as JSON,
+and replay_trace can later feed it to a CanvasVisitor to watch it again.
+"""
+
+import json
+import time
+
+from ..Node import Node
+from .graph import costs, edge_cost
+from .pqueue import HeapQueue
+from .search import (
+    a_star,
+    bidirectional_a_star,
+    bidirectional_ucs,
+    goal_heuristic,
+    greedy_search,
+    informed_searches,
+    search_algorithms,
+    search_functions,
+    ucs,
+)
+from .visitor import NULL_VISITOR, SearchVisitor
+
+TRACE_VERSION = 1
+
+
+class SearchStats(SearchVisitor):
+    """Visitor counting expansions and pushes, forwarding visits to `visitor`"""
+
+    def __init__(self, visitor=NULL_VISITOR, record=False):
+        self.visitor = visitor
+        self.expanded = 0
+        self.generated = 0
+        self.duplicate_pushes = 0
+        self.max_frontier = 0
+        self.heuristic_calls = 0
+        self.heuristic_time = 0.0
+        self.queue_time = 0.0
+        self.visitor_time = 0.0
+        self.total_time = 0.0
+        self.order = [] if record else None
+        self._pushed = set()
+
+    def visit(self, town):
+        self.expanded += 1
+        if self.order is not None:
+            self.order.append(town)
+        begin = time.perf_counter()
+        self.visitor.visit(town)
+        self.visitor_time += time.perf_counter() - begin
+
+    def push(self, town, frontier_size):
+        self.generated += 1
+        if town in self._pushed:
+            self.duplicate_pushes += 1
+        else:
+            self._pushed.add(town)
+        if frontier_size > self.max_frontier:
+            self.max_frontier = frontier_size
+
+    def finish(self):
+        begin = time.perf_counter()
+        self.visitor.finish()
+        self.visitor_time += time.perf_counter() - begin
+
+    def counters(self):
+        return {
+            "expanded": self.expanded,
+            "generated": self.generated,
+            "duplicate_pushes": self.duplicate_pushes,
+            "max_frontier": self.max_frontier,
+            "heuristic_calls": self.heuristic_calls,
+            "total_time": self.total_time,
+            "heuristic_time": self.heuristic_time,
+            "queue_time": self.queue_time,
+            "visitor_time": self.visitor_time,
+            "expansion_time": max(
+                0.0,
+                self.total_time
+                - self.heuristic_time
+                - self.queue_time
+                - self.visitor_time,
+            ),
+        }
+
+
+class StatsFrontier:
+    """Priority queue wrapper adding the time of every operation to stats"""
+
+    def __init__(self, frontier, stats):
+        self.frontier = frontier
+        self.stats = stats
+
+    def __len__(self):
+        return len(self.frontier)
+
+    def __contains__(self, key):
+        begin = time.perf_counter()
+        result = key in self.frontier
+        self.stats.queue_time += time.perf_counter() - begin
+        return result
+
+    def can_improve(self, key, priority):
+        begin = time.perf_counter()
+        result = self.frontier.can_improve(key, priority)
+        self.stats.queue_time += time.perf_counter() - begin
+        return result
+
+    def push(self, key, priority, item):
+        begin = time.perf_counter()
+        result = self.frontier.push(key, priority, item)
+        self.stats.queue_time += time.perf_counter() - begin
+        return result
+
+    def pop(self):
+        begin = time.perf_counter()
+        result = self.frontier.pop()
+        self.stats.queue_time += time.perf_counter() - begin
+        return result
+
+    def min_priority(self):
+        begin = time.perf_counter()
+        result = self.frontier.min_priority()
+        self.stats.queue_time += time.perf_counter() - begin
+        return result
+
+
+class StatsHeuristic:
+    """Heuristic provider wrapper counting and timing the evaluations.
+
+    `heuristic` may be None: the lookups then follow search.goal_heuristic
+    (crow flies distance for the distance cost, 0 otherwise).
+    """
+
+    def __init__(self, heuristic, stats):
+        self.heuristic = heuristic
+        self.stats = stats
+
+    def goal_lookup(self, goal, cost_type):
+        begin = time.perf_counter()
+        h = goal_heuristic(goal, cost_type, self.heuristic)
+        self.stats.heuristic_time += time.perf_counter() - begin
+        return _TimedLookup(h, self.stats)
+
+
+class _TimedLookup:
+    def __init__(self, h, stats):
+        self.h = h
+        self.stats = stats
+
+    def __getitem__(self, town):
+        begin = time.perf_counter()
+        value = self.h(town)
+        self.stats.heuristic_calls += 1
+        self.stats.heuristic_time += time.perf_counter() - begin
+        return value
+
+
+def instrumented_search(
+    search_method,
+    start_town,
+    end_town,
+    cost_type,
+    visitor=NULL_VISITOR,
+    heuristic=None,
+    trace=None,
+):
+    """Same as run_search, returning (path, counters of SearchStats).
+
+    `trace` is an optional file path where the expansion order is saved.
+    """
+    if not 0 <= search_method < len(search_functions):
+        return None, None
+    stats = SearchStats(visitor, record=trace is not None)
+    search = search_functions[search_method]
+    options = dict()
+    if search in informed_searches:
+        options["heuristic"] = StatsHeuristic(heuristic, stats)
+    if search in (ucs, greedy_search, a_star):
+        options["frontier"] = StatsFrontier(HeapQueue(), stats)
+    elif search in (bidirectional_ucs, bidirectional_a_star):
+        options["frontier_type"] = lambda: StatsFrontier(HeapQueue(), stats)
+    begin = time.perf_counter()
+    path = search(start_town, end_town, cost_type, stats, **options)
+    stats.finish()
+    stats.total_time = time.perf_counter() - begin
+    counters = stats.counters()
+    if trace is not None:
+        write_trace(
+            trace, search_method, start_town, end_town, cost_type, stats.order, path
+        )
+    return path, counters
+
+
+def write_trace(path_file, search_method, start_town, end_town, cost_type, order, path):
+    """Save an expansion order and the path found, with dept_ids for the towns"""
+    steps = []
+    node = path
+    while node is not None:
+        steps.append(node.state.dept_id)
+        node = node.parent
+    trace = {
+        "version": TRACE_VERSION,
+        "algorithm": search_algorithms[search_method],
+        "start": start_town.dept_id,
+        "end": end_town.dept_id,
+        "cost": costs[cost_type],
+        "expanded": [town.dept_id for town in order],
+        "path": steps[::-1] if path is not None else None,
+    }
+    with open(path_file, "w") as file:
+        json.dump(trace, file)
+
+
+def read_trace(path_file):
+    with open(path_file) as file:
+        trace = json.load(file)
+    if trace.get("version") != TRACE_VERSION:
+        raise ValueError(f"{path_file}: unsupported trace version")
+    return trace
+
+
+def replay_trace(trace, towns, visitor=NULL_VISITOR):
+    """Visit the towns of a trace in their recorded order.
+
+    `trace` is a file path or a dict from read_trace, `towns` the dict of
+    load_graph. Returns the recorded path as a Node chain over the current
+    roads (None if the search found nothing).
+    """
+    if not isinstance(trace, dict):
+        trace = read_trace(trace)
+    for dept_id in trace["expanded"]:
+        visitor.visit(towns[dept_id])
+    visitor.finish()
+    if trace["path"] is None:
+        return None
+    cost_type = costs.index(trace["cost"])
+    node = Node(towns[trace["path"][0]])
+    for dept_id in trace["path"][1:]:
+        town = towns[dept_id]
+        road = node.state.neighbours[town]
+        child = Node(town, node, road)
+        child.path_cost = node.path_cost + edge_cost(road, cost_type)
+        node = child
+    return node
@@ -0,0 +1,206 @@
+"""Random geographic road networks in the CSV format of tp1/data.
+
+Towns are drawn uniformly over the bounding box of metropolitan France and
+each one is joined to its k nearest neighbours. Candidates are taken from
+the 5x5 block of grid cells around the town, with about two towns per
+cell, so the generation stays linear in the number of towns. Components
+left disconnected are then chained in grid order, which makes every town
+reachable. A road's distance is the haversine distance times a random
+detour factor and its time follows from a random average speed, both
+rounded up to whole kilometres and minutes like roads.csv.
+
+Write a graph with `python -m src.routing.synthetic 100000 data/synthetic/100000`
+(from tp1/).
+"""
+
+import argparse
+import os
+
+import numpy as np
+
+from .csr import CSRGraph
+from .geo import EARTH_RADIUS
+
+LATITUDES = (42.5, 51.0)
+LONGITUDES = (-4.5, 8.0)
+DETOUR = (1.05, 1.4)
+SPEED = (50.0, 110.0)  # km/h
+CHUNK = 16_384
+
+
+def haversine_pairs(lat1, lon1, lat2, lon2):
+    """Vector of haversine distances in km between pairs of points in degrees"""
+    lat1, lon1, lat2, lon2 = map(np.radians, (lat1, lon1, lat2, lon2))
+    a = (
+        np.sin((lat2 - lat1) / 2) ** 2
+        + np.cos(lat1) * np.cos(lat2) * np.sin((lon2 - lon1) / 2) ** 2
+    )
+    return EARTH_RADIUS * 2 * np.arctan2(np.sqrt(a), np.sqrt(1 - a))
+
+
+def _grid(latitudes, longitudes, per_cell=2.0):
+    """Projected coordinates and grid cell of every town.
+
+    The equirectangular projection is good enough to rank close neighbours;
+    cells are sized for about per_cell towns each. Return (x, y, cx, cy,
+    columns, rows).
+    """
+    x = np.radians(longitudes) * np.cos(np.radians(np.mean(latitudes)))
+    y = np.radians(latitudes)
+    width, height = np.ptp(x), np.ptp(y)
+    size = max(np.sqrt(width * height * per_cell / len(x)), 1e-9)
+    columns = int(width / size) + 1
+    rows = int(height / size) + 1
+    cx = ((x - x.min()) / size).astype(np.int64)
+    cy = ((y - y.min()) / size).astype(np.int64)
+    return x, y, cx, cy, columns, rows
+
+
+def nearest_neighbours(latitudes, longitudes, k):
+    """(town1, town2) arrays of the roads joining each town to its k nearest"""
+    n = len(latitudes)
+    x, y, cx, cy, columns, rows = _grid(latitudes, longitudes)
+    cell = cy * columns + cx
+    order = np.argsort(cell, kind="stable")
+    starts = np.searchsorted(cell[order], np.arange(columns * rows + 1))
+    occupancy = int(np.max(np.diff(starts)))
+
+    town1, town2 = [], []
+    for first in range(0, n, CHUNK):
+        towns = np.arange(first, min(first + CHUNK, n))
+        candidates = []
+        for dy in range(-2, 3):
+            for dx in range(-2, 3):
+                ncx, ncy = cx[towns] + dx, cy[towns] + dy
+                inside = (ncx >= 0) & (ncx < columns) & (ncy >= 0) & (ncy < rows)
+                neighbour_cell = np.where(inside, ncy * columns + ncx, 0)
+                start = starts[neighbour_cell]
+                count = np.where(inside, starts[neighbour_cell + 1] - start, 0)
+                for slot in range(occupancy):
+                    position = np.minimum(start + slot, n - 1)
+                    candidates.append(np.where(slot < count, order[position], -1))
+        candidates = np.stack(candidates, axis=1)
+        distances = (x[candidates] - x[towns, None]) ** 2 + (
+            y[candidates] - y[towns, None]
+        ) ** 2
+        distances[(candidates == -1) | (candidates == towns[:, None])] = np.inf
+        count = min(k, candidates.shape[1])
+        nearest = np.argpartition(distances, count - 1, axis=1)[:, :count]
+        chosen = np.take_along_axis(candidates, nearest, axis=1)
+        found = np.isfinite(np.take_along_axis(distances, nearest, axis=1))
+        town1.append(np.repeat(towns, count)[found.ravel()])
+        town2.append(chosen[found])
+
+    town1, town2 = np.concatenate(town1), np.concatenate(town2)
+    # Each road once, whichever of its two towns chose it
+    low, high = np.minimum(town1, town2), np.maximum(town1, town2)
+    keys = np.unique(low * n + high)
+    return keys // n, keys % n
+
+
+def _connect(latitudes, longitudes, town1, town2):
+    """Extra roads chaining the components together, in snake grid order"""
+    n = len(latitudes)
+    _, _, cx, cy, _, _ = _grid(latitudes, longitudes)
+    parent = list(range(n))
+
+    def find(town):
+        while parent[town] != town:
+            parent[town] = parent[parent[town]]
+            town = parent[town]
+        return town
+
+    for a, b in zip(town1.tolist(), town2.tolist()):
+        root_a, root_b = find(a), find(b)
+        if root_a != root_b:
+            parent[root_a] = root_b
+    # Row by row, alternating direction, so consecutive towns are close
+    snake_x = np.where(cy % 2 == 0, cx, -cx)
+    order = np.lexsort((snake_x, cy)).tolist()
+    extra1, extra2 = [], []
+    for a, b in zip(order, order[1:]):
+        root_a, root_b = find(a), find(b)
+        if root_a != root_b:
+            parent[root_a] = root_b
+            extra1.append(a)
+            extra2.append(b)
+    return np.asarray(extra1, dtype=np.int64), np.asarray(extra2, dtype=np.int64)
+
+
+def generate(n, k=4, seed=0):
+    """Random connected road network of n towns.
+
+    Return (latitudes, longitudes, town1, town2, distance, time) arrays,
+    towns being indices 0..n-1.
+    """
+    rng = np.random.default_rng(seed)
+    latitudes = rng.uniform(*LATITUDES, n)
+    longitudes = rng.uniform(*LONGITUDES, n)
+    town1, town2 = nearest_neighbours(latitudes, longitudes, k)
+    extra1, extra2 = _connect(latitudes, longitudes, town1, town2)
+    town1 = np.concatenate([town1, extra1])
+    town2 = np.concatenate([town2, extra2])
+    crow = haversine_pairs(
+        latitudes[town1], longitudes[town1], latitudes[town2], longitudes[town2]
+    )
+    distance = np.maximum(np.ceil(crow * rng.uniform(*DETOUR, len(crow))), 1)
+    time = np.maximum(np.ceil(distance / rng.uniform(*SPEED, len(crow)) * 60), 1)
+    return (
+        latitudes,
+        longitudes,
+        town1,
+        town2,
+        distance.astype(np.int64),
+        time.astype(np.int64),
+    )
+
+
+def write_csv(directory, latitudes, longitudes, town1, town2, distance, time):
+    """Write towns.csv and roads.csv in directory, dept_ids numbered from 1"""
+    os.makedirs(directory, exist_ok=True)
+    towns_path = os.path.join(directory, "towns.csv")
+    roads_path = os.path.join(directory, "roads.csv")
+    with open(towns_path, "w") as file:
+        file.write("dept_id;name;latitude;longitude\n")
+        file.writelines(
+            f"{i};Ville {i};{latitude:.6f};{longitude:.6f}\n"
+            for i, (latitude, longitude) in enumerate(
+                zip(latitudes.tolist(), longitudes.tolist()), 1
+            )
+        )
+    with open(roads_path, "w") as file:
+        file.write("town1;town2;distance;time\n")
+        file.writelines(
+            f"{a + 1};{b + 1};{d};{t}\n"
+            for a, b, d, t in zip(
+                town1.tolist(), town2.tolist(), distance.tolist(), time.tolist()
+            )
+        )
+    return towns_path, roads_path
+
+
+def to_csr(latitudes, longitudes, town1, town2, distance, time):
+    """CSRGraph of a generated network, without going through the CSV files"""
+    n = len(latitudes)
+    return CSRGraph.from_edges(
+        list(range(1, n + 1)),
+        [f"Ville {i}" for i in range(1, n + 1)],
+        latitudes,
+        longitudes,
+        town1,
+        town2,
+        distance,
+        time,
+    )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("towns", type=int)
+    parser.add_argument("directory")
+    parser.add_argument("-k", type=int, default=4, help="voisins par ville")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+    network = generate(args.towns, args.k, args.seed)
+    write_csv(args.directory, *network)
+    print(f"{args.towns} villes, {len(network[2])} routes -> {args.directory}")
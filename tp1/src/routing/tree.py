@@ -0,0 +1,69 @@
+"""Search trees stored as parent pointer arrays.
+
+A linked Node tree costs one object per reached town, plus a boxed float
+for its path cost. SearchTree keeps the same information in three typed
+arrays indexed by town (parent town, road to the parent, path cost), 16
+bytes per town, and only builds Node objects for the path that is returned.
+"""
+
+import math
+from array import array
+
+from ..Node import Node
+
+
+def build_path(end, parent, parent_road, path_costs):
+    """Turn parent pointers into a Node chain from the start to `end`"""
+    chain = []
+    town = end
+    while town != -1:
+        chain.append(town)
+        town = parent[town]
+    node = None
+    for town in reversed(chain):
+        node = Node(town, node, None if node is None else parent_road[town])
+        node.path_cost = path_costs[town]
+    return node
+
+
+class SearchTree:
+    """Predecessor town, predecessor road and path cost of every town.
+
+    Unreached towns have parent -1 and path cost math.inf, the root has
+    parent -1 and path cost 0.
+    """
+
+    def __init__(self, n):
+        self.parent = array("i", [-1]) * n
+        self.parent_road = array("i", [-1]) * n
+        self.path_costs = array("d", [math.inf]) * n
+
+    def __len__(self):
+        return len(self.parent)
+
+    def reached(self, town):
+        return self.path_costs[town] != math.inf
+
+    def path(self, end):
+        """Towns from the root to `end`, None if `end` was not reached"""
+        if not self.reached(end):
+            return None
+        chain = []
+        town = end
+        while town != -1:
+            chain.append(town)
+            town = self.parent[town]
+        chain.reverse()
+        return chain
+
+    def to_node(self, end):
+        """Node chain of the path to `end`, as returned by the searches"""
+        if not self.reached(end):
+            return None
+        return build_path(end, self.parent, self.parent_road, self.path_costs)
+
+    def nbytes(self):
+        return sum(
+            len(column) * column.itemsize
+            for column in (self.parent, self.parent_road, self.path_costs)
+        )
@@ -0,0 +1,96 @@
+class SearchVisitor:
+    """Observer notified by the search algorithms, does nothing by default"""
+
+    def visit(self, town):
+        """Called each time a town is taken out of the frontier"""
+
+    def push(self, town, frontier_size):
+        """Called each time a town is added to the frontier, with its new size"""
+
+    def finish(self):
+        """Called once the search is over"""
+
+
+class NullVisitor(SearchVisitor):
+    pass
+
+
+NULL_VISITOR = NullVisitor()
+
+
+class UntilVisitor(SearchVisitor):
+    """Forward the notifications to `visitor` until `town` has been visited.
+
+    Lets a search that goes on past its goal (ucs_tree for the route cache)
+    show only what a search stopping at the goal would have expanded.
+    """
+
+    def __init__(self, visitor, town):
+        self.visitor = visitor
+        self.town = town
+        self.done = False
+
+    def visit(self, town):
+        if not self.done:
+            self.visitor.visit(town)
+            self.done = town == self.town
+
+    def push(self, town, frontier_size):
+        if not self.done:
+            self.visitor.push(town, frontier_size)
+
+    def finish(self):
+        self.visitor.finish()
+
+
+class CanvasVisitor(SearchVisitor):
+    """Colour visited towns on a Tkinter canvas, redrawing every `batch_size` visits"""
+
+    def __init__(self, canvas, town_circles, color="blue", batch_size=10):
+        self.canvas = canvas
+        self.town_circles = town_circles
+        self.color = color
+        self.batch_size = batch_size
+        self.pending = 0
+
+    def visit(self, town):
+        if town in self.town_circles:
+            self.canvas.itemconfig(self.town_circles[town], fill=self.color)
+            self.pending += 1
+            if self.pending >= self.batch_size:
+                self.flush()
+
+    def flush(self):
+        if self.pending:
+            self.canvas.update()  # Force GUI update
+            self.pending = 0
+
+    def finish(self):
+        self.flush()
+
+
+class CountingVisitor(SearchVisitor):
+    """Count the towns taken out of the frontier"""
+
+    def __init__(self):
+        self.visits = 0
+
+    def visit(self, town):
+        self.visits += 1
+
+
+class BudgetExceeded(Exception):
+    """Raised by BudgetVisitor to stop a search that expanded too many towns"""
+
+
+class BudgetVisitor(CountingVisitor):
+    """Abort the search with BudgetExceeded after `budget` visits"""
+
+    def __init__(self, budget):
+        super().__init__()
+        self.budget = budget
+
+    def visit(self, town):
+        self.visits += 1
+        if self.visits > self.budget:
+            raise BudgetExceeded(self.budget)
@@ -0,0 +1,86 @@
+"""ALT landmark bounds: admissible, and optimal searches against ucs"""
+
+import math
+import random
+
+import numpy as np
+import pytest
+
+from src.routing import (
+    ALTHeuristic,
+    CSRGraph,
+    a_star,
+    bidirectional_a_star,
+    costs,
+    load_graph,
+)
+from src.routing import csr_search
+from src.routing.alt import landmark_strategies
+from src.routing.csr_search import shortest_path_tree
+
+
+@pytest.fixture(scope="module")
+def graph():
+    towns, roads = load_graph()
+    return towns, roads, CSRGraph.from_graph(towns, roads)
+
+
+@pytest.fixture(scope="module", params=sorted(landmark_strategies))
+def alt(request, graph):
+    _, _, csr = graph
+    return ALTHeuristic.build(csr, count=4, strategy=request.param)
+
+
+@pytest.fixture(scope="module")
+def true_costs(graph):
+    """Cost of the shortest path of every pair, per cost type, by Dijkstra"""
+    _, _, csr = graph
+    return {
+        cost_type: np.array(
+            [shortest_path_tree(csr, goal, cost_type)[0] for goal in range(csr.n_towns)]
+        )
+        for cost_type in range(len(costs))
+    }
+
+
+def test_landmarks_are_distinct(graph, alt):
+    _, _, csr = graph
+    for cost_type in range(len(costs)):
+        landmarks = alt.landmarks[cost_type].tolist()
+        assert len(landmarks) == 4 == len(set(landmarks))
+        assert all(0 <= town < csr.n_towns for town in landmarks)
+        assert alt.tables[cost_type].shape == (4, csr.n_towns)
+
+
+@pytest.mark.parametrize("cost_type", range(len(costs)))
+def test_bounds_are_admissible(graph, alt, true_costs, cost_type):
+    """Vector and lazy bounds agree and never exceed the true cost"""
+    _, _, csr = graph
+    lazy = ALTHeuristic(alt.landmarks, alt.tables)
+    lazy.vector_limit = 0
+    for goal in range(csr.n_towns):
+        bounds = alt.distances_to(goal, cost_type)
+        assert np.all(bounds <= true_costs[cost_type][goal] + 1e-9)
+        lookup = lazy.goal_lookup(goal, cost_type)
+        for town in range(0, csr.n_towns, 7):
+            assert math.isclose(lookup[town], bounds[town])
+
+
+@pytest.mark.parametrize("cost_type", range(len(costs)))
+def test_searches_are_optimal(graph, alt, true_costs, cost_type):
+    towns, _, csr = graph
+    town_list = list(towns.values())
+    objects = ALTHeuristic(alt.landmarks, alt.tables, keys=town_list)
+    rng = random.Random(cost_type)
+    for _ in range(300):
+        start, end = rng.randrange(csr.n_towns), rng.randrange(csr.n_towns)
+        expected = true_costs[cost_type][end][start]
+        paths = (
+            a_star(town_list[start], town_list[end], cost_type, heuristic=objects),
+            bidirectional_a_star(
+                town_list[start], town_list[end], cost_type, heuristic=objects
+            ),
+            csr_search.a_star(csr, start, end, cost_type, heuristic=alt),
+        )
+        for path in paths:
+            assert math.isclose(path.path_cost, expected), (start, end)
@@ -0,0 +1,112 @@
+"""Alternative routes against a brute force enumeration of simple paths"""
+
+import math
+import random
+
+import pytest
+
+from src.Road import Road
+from src.Town import Town
+from src.routing import (
+    COST_DISTANCE,
+    COST_POINTS,
+    COST_TIME,
+    RouteAlternatives,
+    edge_cost,
+    load_graph,
+)
+from src.routing.alternatives import route_roads, route_towns
+
+
+def small_graph(seed, count=9, degree=4):
+    """Random connected graph small enough to list all its simple paths"""
+    rng = random.Random(seed)
+    towns = [
+        Town(i, f"T{i}", 45 + rng.random(), 2 + rng.random()) for i in range(count)
+    ]
+
+    def connect(town1, town2):
+        road = Road(town1, town2, rng.randint(1, 100), rng.randint(1, 100))
+        town1.neighbours[town2] = road
+        town2.neighbours[town1] = road
+
+    for i in range(1, count):
+        connect(towns[i], towns[rng.randrange(i)])
+    for _ in range(count * (degree - 2) // 2):
+        town1, town2 = rng.sample(towns, 2)
+        if town2 not in town1.neighbours:
+            connect(town1, town2)
+    return towns
+
+
+def simple_paths(start, end):
+    """Every loopless path from start to end, as tuples of towns"""
+    paths = []
+    stack = [(start,)]
+    while stack:
+        towns = stack.pop()
+        if towns[-1] is end:
+            paths.append(towns)
+            continue
+        for neighbour in towns[-1].neighbours:
+            if neighbour not in towns:
+                stack.append(towns + (neighbour,))
+    return paths
+
+
+def path_cost(towns, cost_type):
+    return sum(
+        edge_cost(town.neighbours[next_town], cost_type)
+        for town, next_town in zip(towns, towns[1:])
+    )
+
+
+def check_route(route, start, end, cost_type):
+    """The route is simple, follows real roads and costs path_cost"""
+    towns = route_towns(route)
+    assert towns[0] is start and towns[-1] is end
+    assert len(set(towns)) == len(towns)
+    roads = route_roads(route)
+    assert all(a.neighbours[b] is road for a, b, road in zip(towns, towns[1:], roads))
+    assert math.isclose(route.path_cost, path_cost(towns, cost_type))
+
+
+@pytest.mark.parametrize("seed", range(6))
+@pytest.mark.parametrize("cost_type", (COST_DISTANCE, COST_TIME, COST_POINTS))
+def test_yen_matches_brute_force(seed, cost_type):
+    towns = small_graph(seed)
+    start, end = towns[0], towns[-1]
+    paths = simple_paths(start, end)
+    expected = sorted(path_cost(path, cost_type) for path in paths)
+
+    routes = RouteAlternatives(start, end, cost_type).k_shortest(len(paths) + 5)
+    assert len(routes) == len(paths)
+    for route in routes:
+        check_route(route, start, end, cost_type)
+    assert len({tuple(route_towns(route)) for route in routes}) == len(routes)
+    found = [route.path_cost for route in routes]
+    assert found == sorted(found)
+    assert all(map(math.isclose, found, expected))
+
+    # A prefix of the list for a smaller k
+    k = min(4, len(paths))
+    first = RouteAlternatives(start, end, cost_type).k_shortest(k)
+    assert [route.path_cost for route in first] == found[:k]
+
+
+@pytest.mark.parametrize("method", ("plateaus", "penalties"))
+def test_other_methods_give_valid_routes(method):
+    towns, _ = load_graph()
+    town_list = list(towns.values())
+    rng = random.Random(3)
+    for _ in range(5):
+        start, end = rng.sample(town_list, 2)
+        alternatives = RouteAlternatives(start, end, COST_DISTANCE)
+        routes = getattr(alternatives, method)(4, max_stretch=0.3)
+        best = alternatives.shortest()
+        assert routes[0].path_cost == best.path_cost
+        assert 1 <= len(routes) <= 4
+        assert len({tuple(route_towns(route)) for route in routes}) == len(routes)
+        for route in routes:
+            check_route(route, start, end, COST_DISTANCE)
+            assert route.path_cost <= best.path_cost * 1.3 + 1e-9
@@ -0,0 +1,26 @@
+"""Optimal algorithms of the batch mode against its ucs, on every pair of towns"""
+
+import math
+
+import pytest
+
+from src.routing import CSRGraph, CountingVisitor, costs, load_graph
+from src.routing.batch import BatchSolver
+
+
+@pytest.fixture(scope="module")
+def solver():
+    return BatchSolver(CSRGraph.from_graph(*load_graph()))
+
+
+@pytest.mark.parametrize("cost_type", range(len(costs)))
+@pytest.mark.parametrize("algorithm", ("a_star", "bidirectional_a_star"))
+def test_batch_a_star_matches_ucs(solver, algorithm, cost_type):
+    dept_ids = solver.graph.dept_ids.tolist()
+    for start in dept_ids:
+        for end in dept_ids:
+            _, expected = solver.run(start, end, "ucs", cost_type, CountingVisitor())
+            _, path_cost = solver.run(
+                start, end, algorithm, cost_type, CountingVisitor()
+            )
+            assert math.isclose(path_cost, expected), (start, end)
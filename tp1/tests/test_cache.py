@@ -0,0 +1,126 @@
+"""RouteCache answers like run_search, from its routes and ucs trees"""
+
+import pytest
+
+from src.routing import (
+    DynamicGraph,
+    RouteCache,
+    SearchVisitor,
+    load_graph,
+    run_search,
+    ucs,
+)
+from src.routing.search import optimal_searches, search_functions
+
+UCS = search_functions.index(ucs)
+BFS = 0  # Parcours en largeur, not a shortest path search
+
+
+class RecordingVisitor(SearchVisitor):
+    def __init__(self):
+        self.visited = []
+        self.pushed = []
+        self.finished = 0
+
+    def visit(self, town):
+        self.visited.append(town)
+
+    def push(self, town, frontier_size):
+        self.pushed.append((town, frontier_size))
+
+    def finish(self):
+        self.finished += 1
+
+
+@pytest.fixture(scope="module")
+def graph():
+    return load_graph()
+
+
+def test_tree_miss_shows_the_ucs_expansion(graph):
+    """Building a tree, the visitor still sees ucs stop at the end town"""
+    towns, _ = graph
+    town_list = list(towns.values())
+    start, end = town_list[0], town_list[len(town_list) // 2]
+    expected = RecordingVisitor()
+    ucs(start, end, 0, expected)
+    visitor = RecordingVisitor()
+    cache = RouteCache()
+    path = cache.search(UCS, start, end, 0, visitor)
+    assert visitor.visited == expected.visited
+    assert visitor.pushed == expected.pushed
+    assert visitor.finished == 1
+    assert cache.stats()["tree_towns"] == len(towns)
+    assert path.path_cost == run_search(UCS, start, end, 0).path_cost
+
+
+def index_of(search):
+    return search_functions.index(search)
+
+
+def test_routes_are_evicted_least_recently_used(graph):
+    towns, _ = graph
+    a, b, c, d = list(towns.values())[:4]
+    cache = RouteCache(max_routes=2)
+    first = cache.search(BFS, a, b, 0)
+    cache.search(BFS, a, c, 0)
+    assert cache.search(BFS, a, b, 0) is first  # Hit, now the most recent
+    cache.search(BFS, a, d, 0)  # Evicts (a, c)
+    assert cache.stats()["evictions"] == 1
+    assert (a, b, BFS, 0) in cache.routes and (a, c, BFS, 0) not in cache.routes
+    assert cache.stats()["hits"] == 1 and cache.stats()["misses"] == 3
+
+
+def test_tree_answers_the_shortest_path_searches(graph):
+    towns, _ = graph
+    town_list = list(towns.values())
+    start = town_list[0]
+    cache = RouteCache()
+    cache.search(UCS, start, town_list[1], 1)
+    for search in optimal_searches:
+        for end in town_list[::10]:
+            path = cache.search(index_of(search), start, end, 1)
+            expected = run_search(index_of(search), start, end, 1)
+            assert path.state is end
+            assert path.path_cost == pytest.approx(expected.path_cost)
+    stats = cache.stats()
+    assert stats["misses"] == 1 and stats["trees"] == 1
+    assert stats["tree_hits"] == len(optimal_searches) * len(town_list[::10])
+
+    # Searches not returning shortest paths, or another cost type, still search
+    cache.search(BFS, start, town_list[5], 1)
+    cache.search(UCS, start, town_list[5], 0)
+    assert cache.stats()["misses"] == 3 and cache.stats()["trees"] == 2
+
+
+def test_trees_are_evicted_by_count_and_size(graph):
+    towns, _ = graph
+    town_list = list(towns.values())
+    end = town_list[-1]
+    cache = RouteCache(max_trees=2)
+    for start in town_list[:3]:
+        cache.search(UCS, start, end, 0)
+    assert list(cache.trees) == [(town, 0) for town in town_list[1:3]]
+    assert cache.stats()["evictions"] == 1
+    assert cache.tree_towns == 2 * len(towns)
+
+    cache = RouteCache(max_tree_towns=len(towns) * 3 // 2)
+    cache.search(UCS, town_list[0], end, 0)
+    cache.search(UCS, town_list[1], end, 0)
+    assert list(cache.trees) == [(town_list[1], 0)]
+    assert cache.tree_towns == len(towns)
+
+    cache = RouteCache(max_tree_towns=len(towns) - 1)  # Too big to keep
+    path = cache.search(UCS, town_list[0], end, 0)
+    assert path.state is end and not cache.trees
+
+
+def test_road_change_clears_the_cache():
+    towns, roads = load_graph()
+    town_list = list(towns.values())
+    cache = RouteCache()
+    dynamic = DynamicGraph(towns, roads)
+    dynamic.subscribe(cache)
+    cache.search(UCS, town_list[0], town_list[1], 0)
+    dynamic.update_road(roads[0], distance=roads[0].distance + 1)
+    assert not cache.routes and not cache.trees and cache.tree_towns == 0
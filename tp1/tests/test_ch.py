@@ -0,0 +1,82 @@
+"""Contraction hierarchy queries against ucs, and saved hierarchy staleness"""
+
+import math
+import random
+
+import numpy as np
+import pytest
+
+from src.routing import CSRGraph, ContractionHierarchy, costs, edge_cost, load_graph
+from src.routing import csr_search
+
+
+@pytest.fixture(scope="module")
+def graph():
+    return CSRGraph.from_csv()
+
+
+@pytest.fixture(scope="module")
+def hierarchies(graph):
+    return [
+        ContractionHierarchy.build(graph, cost_type) for cost_type in range(len(costs))
+    ]
+
+
+def sampled_pairs(graph, count=400, seed=0):
+    rng = random.Random(seed)
+    n = graph.n_towns
+    return [(rng.randrange(n), rng.randrange(n)) for _ in range(count)]
+
+
+@pytest.mark.parametrize("cost_type", range(len(costs)))
+def test_query_matches_ucs(graph, hierarchies, cost_type):
+    """Same cost as ucs, and the unpacked path follows the original roads"""
+    towns, roads = graph.to_graph()
+    for start, end in sampled_pairs(graph):
+        expected = csr_search.ucs(graph, start, end, cost_type)
+        path = hierarchies[cost_type].query(start, end)
+        assert math.isclose(path.path_cost, expected.path_cost), (start, end)
+
+        node = graph.path_to_objects(path, towns, roads)
+        assert node.state.dept_id == graph.dept_ids[end]
+        cost = 0
+        while node.parent is not None:
+            road = node.road_to_parent
+            assert {road.town1, road.town2} == {node.state, node.parent.state}
+            cost += edge_cost(road, cost_type)
+            node = node.parent
+        assert node.state.dept_id == graph.dept_ids[start]
+        assert math.isclose(cost, expected.path_cost), (start, end)
+
+
+def test_unpack_expands_every_shortcut(hierarchies):
+    """Each shortcut unpacks into original roads of the same total weight"""
+    hierarchy = hierarchies[0]
+    assert hierarchy.n_shortcuts > 0
+    for town in range(len(hierarchy.rank)):
+        begin, end = hierarchy.up_offsets[town], hierarchy.up_offsets[town + 1]
+        for edge in range(begin, end):
+            steps = hierarchy._unpack(town, int(hierarchy.up_targets[edge]))
+            assert all(road != -1 for _, road, _ in steps)
+            assert steps[-1][0] == hierarchy.up_targets[edge]
+            weight = sum(weight for _, _, weight in steps)
+            assert math.isclose(weight, hierarchy.up_weights[edge])
+
+
+def test_saved_hierarchy_is_checked_against_the_graph(graph, hierarchies, tmp_path):
+    path = str(tmp_path / "ch_distance.npz")
+    hierarchies[0].save(path)
+    loaded = ContractionHierarchy.load(0, path, graph)
+    assert loaded is not None
+    assert np.array_equal(loaded.up_targets, hierarchies[0].up_targets)
+    for start, end in sampled_pairs(graph, 50):
+        assert loaded.query(start, end).path_cost == (
+            hierarchies[0].query(start, end).path_cost
+        )
+
+    # Another cost type, or a road changed since the build: stale
+    assert ContractionHierarchy.load(1, path, graph) is None
+    towns, roads = load_graph()
+    roads[0].distance += 1
+    assert ContractionHierarchy.load(0, path, CSRGraph.from_graph(towns, roads)) is None
+    assert ContractionHierarchy.load(0, str(tmp_path / "missing.npz")) is None
@@ -0,0 +1,84 @@
+"""LPAStar against a fresh ucs after random sequences of road changes"""
+
+import math
+import random
+
+import pytest
+
+from src.Road import Road
+from src.routing import (
+    DynamicGraph,
+    HaversineHeuristic,
+    LPAStar,
+    costs,
+    edge_cost,
+    load_graph,
+    ucs,
+)
+
+
+def check_path(path, start, end, cost_type):
+    """The path goes from start to end on open roads and costs path_cost"""
+    assert path.state is end
+    cost = 0
+    node = path
+    while node.parent is not None:
+        assert node.parent.state.neighbours.get(node.state) is node.road_to_parent
+        cost += edge_cost(node.road_to_parent, cost_type)
+        node = node.parent
+    assert node.state is start
+    assert math.isclose(cost, path.path_cost)
+
+
+def random_change(graph, closed, rng):
+    """Apply one random update_road, remove_road or add_road to graph"""
+    town_list = list(graph.towns.values())
+    action = rng.random()
+    if action < 0.5:
+        road = rng.choice(graph.roads)
+        factor = rng.uniform(0.3, 3)
+        graph.update_road(
+            road,
+            max(1, round(road.distance * factor)),
+            max(1, round(road.time * factor)),
+        )
+    elif action < 0.8:
+        road = rng.choice(graph.roads)
+        graph.remove_road(road)
+        closed.append(road)
+    elif closed and action < 0.9:
+        graph.add_road(closed.pop(rng.randrange(len(closed))))
+    else:
+        town1, town2 = rng.sample(town_list, 2)
+        graph.add_road(Road(town1, town2, rng.randint(1, 500), rng.randint(1, 300)))
+
+
+@pytest.mark.parametrize("seed", range(4))
+@pytest.mark.parametrize("with_provider", (False, True))
+def test_lpa_star_matches_ucs_after_changes(seed, with_provider):
+    rng = random.Random(seed)
+    towns, roads = load_graph()
+    graph = DynamicGraph(towns, roads)
+    heuristic = HaversineHeuristic.from_towns(towns, roads) if with_provider else None
+    town_list = list(towns.values())
+    planners = []
+    for cost_type in range(len(costs)):
+        for _ in range(2):
+            start, end = rng.sample(town_list, 2)
+            planner = LPAStar(start, end, cost_type, heuristic)
+            graph.subscribe(planner)
+            planners.append(planner)
+
+    closed = []
+    for step in range(60):
+        if step:
+            random_change(graph, closed, rng)
+        for planner in planners:
+            path = planner.compute()
+            expected = ucs(planner.start, planner.end, planner.cost_type)
+            if expected is None:
+                assert path is None, step
+            else:
+                assert path is not None, step
+                assert math.isclose(path.path_cost, expected.path_cost), step
+                check_path(path, planner.start, planner.end, planner.cost_type)
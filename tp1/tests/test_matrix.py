@@ -0,0 +1,93 @@
+"""Cost matrices: sequential, parallel and cached runs against Dijkstra"""
+
+import math
+import os
+import shutil
+
+import numpy as np
+import pytest
+
+from src.routing import CSRGraph, costs, cost_matrix, load_cost_matrix
+from src.routing import matrix as matrix_module
+from src.routing.csr_search import shortest_path_tree
+from src.routing.graph import ROADS_CSV, TOWNS_CSV
+
+
+@pytest.fixture(scope="module")
+def graph():
+    return CSRGraph.from_csv()
+
+
+@pytest.mark.parametrize("cost_type", range(len(costs)))
+def test_rows_are_shortest_path_costs(graph, cost_type):
+    matrix = cost_matrix(graph, cost_type)
+    assert matrix.shape == (graph.n_towns, graph.n_towns)
+    for source in range(graph.n_towns):
+        expected = shortest_path_tree(graph, source, cost_type)[0]
+        assert np.allclose(matrix[source], expected)
+    assert np.allclose(matrix, matrix.T)
+
+
+def test_parallel_matches_sequential(graph):
+    sources = list(range(0, graph.n_towns, 3))
+    targets = list(range(graph.n_towns - 1, -1, -5))
+    sequential = cost_matrix(graph, 1, sources, targets)
+    parallel = cost_matrix(graph, 1, sources, targets, processes=2)
+    assert sequential.shape == (len(sources), len(targets))
+    assert np.array_equal(parallel, sequential)
+    assert np.array_equal(
+        cost_matrix(graph, 0, processes=2), cost_matrix(graph, 0, processes=1)
+    )
+
+
+def test_unreachable_pairs_are_infinite():
+    """Two components: 0-1 and 2-3"""
+    graph = CSRGraph.from_edges(
+        [1, 2, 3, 4],
+        list("abcd"),
+        [45, 45.1, 46, 46.1],
+        [2, 2.1, 3, 3.1],
+        [0, 2],
+        [1, 3],
+        [10, 20],
+        [7, 9],
+    )
+    for processes in (1, 2):
+        matrix = cost_matrix(graph, 0, processes=processes)
+        assert matrix[0, 1] == 10 and matrix[2, 3] == 20
+        assert math.isinf(matrix[0, 2]) and math.isinf(matrix[3, 1])
+
+
+def test_cache_hits_and_misses(graph, tmp_path, monkeypatch):
+    cache_dir = str(tmp_path / "cache")
+    computed = []
+    original = matrix_module.cost_matrix
+
+    def counting(*args, **options):
+        computed.append(args[1])
+        return original(*args, **options)
+
+    monkeypatch.setattr(matrix_module, "cost_matrix", counting)
+    first = load_cost_matrix(0, cache_dir=cache_dir)
+    again = load_cost_matrix(0, cache_dir=cache_dir)
+    assert computed == [0]  # The second call read the cache
+    assert np.array_equal(first, again)
+    assert np.array_equal(first, original(graph, 0))
+    assert len(os.listdir(cache_dir)) == 1
+
+    load_cost_matrix(2, cache_dir=cache_dir)
+    assert computed == [0, 2]  # Another cost type is another entry
+
+    # Changed roads: another key, computed again
+    towns_path = str(tmp_path / "towns.csv")
+    roads_path = str(tmp_path / "roads.csv")
+    shutil.copy(TOWNS_CSV, towns_path)
+    with open(ROADS_CSV) as source, open(roads_path, "w") as target:
+        lines = source.readlines()
+        town1, town2, distance, time = lines[1].strip().split(";")
+        lines[1] = f"{town1};{town2};{int(distance) + 500};{time}\n"
+        target.writelines(lines)
+    changed = load_cost_matrix(0, towns_path, roads_path, cache_dir=cache_dir)
+    assert computed == [0, 2, 0]
+    assert not np.array_equal(changed, first)
+    assert len(os.listdir(cache_dir)) == 3
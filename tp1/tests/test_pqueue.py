@@ -0,0 +1,68 @@
+"""Frontier priority queues against a plain dict reference"""
+
+import random
+
+import pytest
+
+from src.routing.pqueue import IndexedHeap, frontier_types
+
+
+def check_heap(queue):
+    """IndexedHeap invariants: heap order and a position for every key"""
+    keys = queue._keys
+    assert len(keys) == len(queue._entries) == len(queue._position)
+    for i, key in enumerate(keys):
+        assert queue._position[key] == i
+        if i:
+            assert not queue._less(i, (i - 1) >> 1)
+
+
+@pytest.mark.parametrize("name", sorted(frontier_types))
+@pytest.mark.parametrize("seed", range(5))
+def test_random_operations(name, seed):
+    rng = random.Random(seed)
+    queue = frontier_types[name]()
+    reference = dict()  # key -> (priority, item)
+    for step in range(3000):
+        action = rng.random()
+        key = rng.randrange(60)
+        if action < 0.5:
+            priority = rng.randrange(100)
+            improves = key not in reference or priority < reference[key][0]
+            assert queue.can_improve(key, priority) == improves
+            assert queue.push(key, priority, (key, step)) == improves
+            if improves:
+                reference[key] = (priority, (key, step))
+        elif action < 0.65:
+            queue.remove(key)
+            reference.pop(key, None)
+        elif reference:
+            smallest = min(priority for priority, _ in reference.values())
+            assert queue.min_priority() == smallest
+            priority, item = queue.pop()
+            assert priority == smallest
+            assert reference.pop(item[0]) == (priority, item)
+        assert len(queue) == len(reference)
+        assert (key in queue) == (key in reference)
+        if isinstance(queue, IndexedHeap):
+            check_heap(queue)
+    while reference:
+        priority, item = queue.pop()
+        assert reference.pop(item[0]) == (priority, item)
+        assert all(priority <= other for other, _ in reference.values())
+    assert len(queue) == 0
+
+
+def test_indexed_heap_counters():
+    queue = IndexedHeap()
+    queue.push("a", 5, "a")
+    queue.push("b", 3, "b")
+    queue.push("a", 1, "a")  # decrease-key, in place
+    queue.push("b", 4, "b")  # worse, ignored
+    assert queue.pop() == (1, "a")
+    counters = queue.counters()
+    assert counters["pushes"] == 3 and counters["decrease_keys"] == 1
+    assert counters["pops"] == 1 and counters["peak_size"] == 2
+    assert queue.pop() == (3, "b")
+    with pytest.raises(IndexError):
+        queue.pop()
@@ -0,0 +1,144 @@
+"""Searches on every pair of towns of data/.
+
+A* must find the cost of ucs for every cost type, and iterative deepening
+a path with as few roads as bfs.
+"""
+
+import math
+
+import pytest
+
+from src.routing import (
+    COST_DISTANCE,
+    ALTHeuristic,
+    CSRGraph,
+    DynamicGraph,
+    HaversineHeuristic,
+    a_star,
+    bfs,
+    bidirectional_a_star,
+    costs,
+    dfs_iter,
+    load_graph,
+    ucs_tree,
+)
+from src.routing import csr_search
+from src.routing.heuristics import component_scales
+from src.Town import Town
+
+
+@pytest.fixture(scope="module")
+def graph():
+    return load_graph()
+
+
+@pytest.fixture(scope="module")
+def optimal_costs(graph):
+    """Cost of the shortest path of every pair, from ucs, per cost type"""
+    towns, _ = graph
+    return {
+        cost_type: {
+            start: {
+                town: node.path_cost
+                for town, node in ucs_tree(start, cost_type).items()
+            }
+            for start in towns.values()
+        }
+        for cost_type in range(len(costs))
+    }
+
+
+def assert_optimal(path, expected, start, end):
+    assert path is not None, (start.name, end.name)
+    assert math.isclose(path.path_cost, expected), (start.name, end.name)
+
+
+@pytest.mark.parametrize("cost_type", range(len(costs)))
+@pytest.mark.parametrize("with_provider", (False, True))
+def test_a_star_matches_ucs(graph, optimal_costs, cost_type, with_provider):
+    towns, roads = graph
+    heuristic = HaversineHeuristic.from_towns(towns, roads) if with_provider else None
+    for start in towns.values():
+        for end, expected in optimal_costs[cost_type][start].items():
+            path = a_star(start, end, cost_type, heuristic=heuristic)
+            assert_optimal(path, expected, start, end)
+
+
+@pytest.mark.parametrize("cost_type", range(len(costs)))
+def test_bidirectional_a_star_matches_ucs(graph, optimal_costs, cost_type):
+    towns, roads = graph
+    heuristic = HaversineHeuristic.from_towns(towns, roads)
+    for start in towns.values():
+        for end, expected in optimal_costs[cost_type][start].items():
+            path = bidirectional_a_star(start, end, cost_type, heuristic=heuristic)
+            assert_optimal(path, expected, start, end)
+
+
+@pytest.mark.parametrize("cost_type", range(len(costs)))
+def test_csr_a_star_matches_ucs(graph, optimal_costs, cost_type):
+    towns, roads = graph
+    csr = CSRGraph.from_graph(towns, roads)
+    town_list = list(towns.values())
+    for start in town_list:
+        for end, expected in optimal_costs[cost_type][start].items():
+            path = csr_search.a_star(
+                csr, town_list.index(start), town_list.index(end), cost_type
+            )
+            assert math.isclose(path.path_cost, expected), (start.name, end.name)
+
+
+def roads_of(path):
+    count = 0
+    while path.parent is not None:
+        count += 1
+        path = path.parent
+    return count
+
+
+@pytest.mark.parametrize("provider", ("crow", "alt"))
+def test_dfs_iter_finds_fewest_roads(graph, provider):
+    towns, roads = graph
+    csr = CSRGraph.from_graph(towns, roads)
+    town_list = list(towns.values())
+    heuristic = csr_heuristic = None
+    if provider == "alt":
+        csr_heuristic = ALTHeuristic.build(csr)
+        heuristic = ALTHeuristic(
+            csr_heuristic.landmarks, csr_heuristic.tables, keys=town_list
+        )
+    for i, start in enumerate(town_list):
+        for j, end in enumerate(town_list):
+            fewest = roads_of(bfs(start, end, COST_DISTANCE))
+            path = dfs_iter(start, end, COST_DISTANCE, heuristic=heuristic)
+            assert roads_of(path) == fewest
+            path = csr_search.dfs_iter(
+                csr, i, j, COST_DISTANCE, heuristic=csr_heuristic
+            )
+            assert roads_of(path) == fewest
+
+
+def test_component_scales_follow_road_changes():
+    """Memoised scales match the provider's, and are redone after a change"""
+    towns, roads = load_graph()
+    town_list = list(towns.values())
+    scales = component_scales(town_list[0])
+    assert scales == pytest.approx(HaversineHeuristic.from_towns(towns, roads).scales)
+    assert component_scales(town_list[-1]) is scales
+
+    road = min(roads, key=lambda road: road.distance)
+    DynamicGraph(towns, roads).update_road(road, distance=road.distance / 10)
+    assert component_scales(town_list[0])[COST_DISTANCE] < scales[COST_DISTANCE]
+
+
+def test_provider_scales_without_roads(graph):
+    """from_towns finds the roads itself rather than leaving raw distances"""
+    towns, roads = graph
+    assert HaversineHeuristic.from_towns(towns).scales == pytest.approx(
+        HaversineHeuristic.from_towns(towns, roads).scales
+    )
+
+
+def test_scales_of_a_town_without_roads():
+    town = Town(1, "Seule", 45.0, 2.0)
+    assert component_scales(town) == (1.0, 0.0, 0.0)
+    assert HaversineHeuristic.from_towns({1: town}).scales == (1.0, 0.0, 0.0)
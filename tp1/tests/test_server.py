@@ -0,0 +1,82 @@
+"""Route server over a real socket, with its worker pool"""
+
+import asyncio
+import json
+import socket
+
+import pytest
+
+from src.routing import server as route_server
+
+
+@pytest.fixture(scope="module")
+def routes(tmp_path_factory):
+    """RouteServer on the full graph, with one worker"""
+    snapshot_dir = str(tmp_path_factory.mktemp("snapshot"))
+    routes = route_server.create_server(workers=1, snapshot_dir=snapshot_dir)
+    with routes.executor:
+        yield routes
+
+
+def exchange(port, request):
+    """Send request on a new connection and read until the server closes it"""
+    with socket.create_connection(("127.0.0.1", port), timeout=60) as client:
+        client.sendall(request)
+        response = b""
+        while True:
+            data = client.recv(65536)
+            if not data:
+                return response
+            response += data
+
+
+def run(routes, requests):
+    """Responses of the requests, each on its own connection, in order"""
+
+    async def main():
+        server = await routes.start("127.0.0.1", 0)
+        port = server.sockets[0].getsockname()[1]
+        async with server:
+            return [
+                await asyncio.to_thread(exchange, port, request) for request in requests
+            ]
+
+    return asyncio.run(main())
+
+
+def body(response):
+    head, _, payload = response.partition(b"\r\n\r\n")
+    assert head.startswith(b"HTTP/1.1 200 ")
+    return json.loads(payload)
+
+
+def test_closed_connections_reach_eof(routes):
+    """The first search starts the workers, which must not keep the socket"""
+    start, end = sorted(routes.dept_ids)[:2]
+    target = f"/route?start={start}&end={end}&algorithm=ucs"
+    responses = run(
+        routes,
+        [
+            f"GET {target} HTTP/1.0\r\n\r\n".encode(),
+            f"GET {target} HTTP/1.1\r\nConnection: close\r\n\r\n".encode(),
+            b"GET /stats HTTP/1.0\r\n\r\n",
+        ],
+    )
+    first, second, stats = (body(response) for response in responses)
+    assert b"Connection: close" in responses[0]
+    assert first == {**second, "time_ms": first["time_ms"]}
+    assert first["path"][0] == start and first["path"][-1] == end
+    assert stats["requests"] == 3 and stats["searches"] == 2
+
+
+def test_bad_requests(routes):
+    responses = run(
+        routes,
+        [
+            b"GET /route?start=1 HTTP/1.0\r\n\r\n",
+            b"GET /nowhere HTTP/1.0\r\n\r\n",
+            b"POST /route HTTP/1.0\r\n\r\n",
+        ],
+    )
+    statuses = [response.split()[1] for response in responses]
+    assert statuses == [b"400", b"404", b"405"]
@@ -0,0 +1,26 @@
+"""Snapshot generations: meta.json only names complete arrays"""
+
+import os
+
+import numpy as np
+
+from src.routing import snapshot
+
+
+def test_recompile_keeps_previous_generation(tmp_path):
+    directory = str(tmp_path)
+    first = snapshot.compile_snapshot(directory)
+    old_meta = snapshot.read_meta(directory)
+    snapshot.compile_snapshot(directory)
+    snapshot.compile_snapshot(directory)
+    meta = snapshot.read_meta(directory)
+
+    generations = sorted(
+        entry for entry in os.listdir(directory) if entry != "meta.json"
+    )
+    assert len(generations) == 2 and meta["generation"] == generations[-1]
+    assert old_meta["generation"] not in generations
+    graph = snapshot.open_graph(directory)
+    assert isinstance(graph.targets, np.memmap)
+    assert np.array_equal(graph.targets, first.targets)
+    assert list(graph.names) == list(first.names)
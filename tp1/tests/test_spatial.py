@@ -0,0 +1,87 @@
+"""TownIndex against a brute force scan, and the snapping command"""
+
+import io
+import random
+import sys
+
+import numpy as np
+import pytest
+
+from src.routing import TownIndex, load_graph
+from src.routing import spatial
+from src.routing.spatial import chord_to_km, unit_vectors
+
+
+def brute_force(latitudes, longitudes, points, k):
+    """Sorted distances in km from each point to its k nearest towns"""
+    towns = unit_vectors(latitudes, longitudes)
+    queries = unit_vectors(*zip(*points))
+    chord2 = ((queries[:, None, :] - towns[None, :, :]) ** 2).sum(axis=2)
+    return chord_to_km(np.sort(chord2, axis=1)[:, :k]), chord2
+
+
+def random_points(rng, count):
+    return [(rng.uniform(41, 52), rng.uniform(-6, 10)) for _ in range(count)]
+
+
+@pytest.mark.parametrize("leaf_size", (1, 4, 16))
+@pytest.mark.parametrize("k", (1, 3, 20))
+def test_snap_and_k_nearest_match_brute_force(leaf_size, k):
+    rng = random.Random(leaf_size * 100 + k)
+    towns = random_points(rng, 500)
+    latitudes, longitudes = zip(*towns)
+    index = TownIndex(latitudes, longitudes, leaf_size=leaf_size)
+    points = random_points(rng, 300) + towns[:20]
+    expected, chord2 = brute_force(latitudes, longitudes, points, k)
+
+    rows, distances = index.snap(*zip(*points), k=k)
+    assert np.allclose(distances, expected, atol=1e-6)
+    found = np.take_along_axis(chord_to_km(chord2), rows, axis=1)
+    assert np.allclose(found, expected, atol=1e-6)
+    for i, point in enumerate(points[:50]):
+        result = index.k_nearest(*point, k)
+        assert np.allclose([distance for _, distance in result], expected[i])
+        found = chord_to_km(chord2[i, [row for row, _ in result]])
+        assert np.allclose(found, expected[i], atol=1e-6)
+        assert chord2[i, index.nearest(*point)] == chord2[i].min()
+
+
+def test_duplicate_points():
+    """Towns at the same place are all found, at distance 0"""
+    latitudes = [45.0] * 5 + [46.0, 47.0] * 10
+    longitudes = [2.0] * 5 + [3.0, 4.0] * 10
+    index = TownIndex(latitudes, longitudes, leaf_size=2)
+    rows, distances = index.snap([45.0, 46.0], [2.0, 3.0], k=5)
+    assert sorted(rows[0].tolist()) == [0, 1, 2, 3, 4]
+    assert np.allclose(distances, 0)
+    assert set(rows[1].tolist()) <= set(range(5, 25, 2))
+    result = index.k_nearest(45.0, 2.0, 6)
+    assert sorted(row for row, _ in result[:5]) == [0, 1, 2, 3, 4]
+    assert result[5][1] > 100
+    # k larger than the index is capped
+    assert index.snap([45.0], [2.0], k=100)[0].shape == (1, len(latitudes))
+
+
+def test_keys_of_the_town_objects():
+    towns, _ = load_graph()
+    index = TownIndex.from_towns(towns)
+    for town in list(towns.values())[::9]:
+        assert index.nearest(town.latitude, town.longitude) is town
+
+
+def test_command_leaves_stdin_and_stdout_open(tmp_path, monkeypatch):
+    stdin = io.StringIO("latitude;longitude\n45.75;4.85\n48.85;2.35\n")
+    stdout = io.StringIO()
+    monkeypatch.setattr(sys, "stdin", stdin)
+    monkeypatch.setattr(sys, "stdout", stdout)
+    spatial.main(["-", "--snapshot", str(tmp_path / "snapshot")])
+    assert not stdin.closed and not stdout.closed
+    lines = stdout.getvalue().splitlines()
+    assert lines[0] == "latitude;longitude;rank;dept_id;distance"
+    assert [line.split(";")[3] for line in lines[1:]] == ["69", "75"]
+
+    output = tmp_path / "snapped.csv"
+    points = tmp_path / "points.csv"
+    points.write_text("45.75;4.85\n")
+    spatial.main([str(points), "-o", str(output), "-k", "2"])
+    assert len(output.read_text().splitlines()) == 3
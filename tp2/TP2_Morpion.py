@@ -6,10 +6,30 @@ from queue import Queue
 
 
 player_type = ["human", "AI: Min-Max", "AI: alpha-beta"]
+nodes_searched = 0  # Positions evaluated for the last AI decision
+
+
+# Number of winning lines through a cell: 4 for the center, 3 for a corner
+def line_count(move):
+    x, y = move
+    count = 2  # Its line and its column
+    if x == y:
+        count += 1
+    if x + y == 2:
+        count += 1
+    return count
+
+
+# Moves on the most lines first (center, corners, edges): the best move is
+# usually among the first ones, which makes alpha-beta cut earlier
+def ordered_moves(board):
+    return sorted(board.get_possible_moves(), key=line_count, reverse=True)
 
 
 def alpha_beta_decision(board, turn, queue):
-    possible_moves = board.get_possible_moves()
+    global nodes_searched
+    nodes_searched = 0
+    possible_moves = ordered_moves(board)
     best_move = possible_moves[0]
     best_value = -2
     alpha = -2
@@ -21,15 +41,18 @@ def alpha_beta_decision(board, turn, queue):
         if value > best_value:
             best_value = value
             best_move = move
+        alpha = max(alpha, value)
     queue.put(best_move)
 
 
 def max_value_ab(board, turn, alpha, beta):
+    global nodes_searched
+    nodes_searched += 1
     if board.check_victory(update_display=False):
         return -1
     if turn > 9:
         return 0
-    possible_moves = board.get_possible_moves()
+    possible_moves = ordered_moves(board)
     value = -2
     for move in possible_moves:
         updated_board = board.copy()
@@ -42,11 +65,13 @@ def max_value_ab(board, turn, alpha, beta):
 
 
 def min_value_ab(board, turn, alpha, beta):
+    global nodes_searched
+    nodes_searched += 1
     if board.check_victory(update_display=False):
         return 1
     if turn > 9:
         return 0
-    possible_moves = board.get_possible_moves()
+    possible_moves = ordered_moves(board)
     value = 2
     for move in possible_moves:
         updated_board = board.copy()
@@ -59,6 +84,8 @@ def min_value_ab(board, turn, alpha, beta):
 
 
 def minimax_decision(board, turn, queue):
+    global nodes_searched
+    nodes_searched = 0
     possible_moves = board.get_possible_moves()
     best_move = possible_moves[0]
     best_value = -2
@@ -73,6 +100,8 @@ def minimax_decision(board, turn, queue):
 
 
 def max_value(board, turn):
+    global nodes_searched
+    nodes_searched += 1
     if board.check_victory(update_display=False):
         return -1
     if turn > 9:
@@ -89,6 +118,8 @@ def max_value(board, turn):
 
 
 def min_value(board, turn):
+    global nodes_searched
+    nodes_searched += 1
     if board.check_victory(update_display=False):
         return 1
     if turn > 9:
@@ -178,12 +209,14 @@ class TicTacToe:
         self.human_turn = False
         self.information_label = info_label
         self.ai_move = Queue()
+        self.search_stats = ""  # Positions searched for the last AI move
 
     def current_player(self):
         return (self.turn - 1) % 2 + 1
 
     def launch(self):
         self.board.reinit()
+        self.search_stats = ""
         self.turn = 0
         self.information_label["text"] = (
             "Turn "
@@ -213,6 +246,7 @@ class TicTacToe:
     def ai_wait_for_move(self):
         if not self.ai_move.empty():
             move = self.ai_move.get()
+            self.search_stats = f"{nodes_searched} positions searched"
             self.move(move[0], move[1])
         else:
             window.after(100, self.ai_wait_for_move)
@@ -240,6 +274,7 @@ class TicTacToe:
                 )
             else:
                 self.information_label["text"] = "This is a draw !"
+            self.information_label["text"] += "\n" + self.search_stats
             return
         self.turn = self.turn + 1
         self.information_label["text"] = (
@@ -248,6 +283,8 @@ class TicTacToe:
             + " - Player "
             + str((self.turn - 1) % 2 + 1)
             + " is playing"
+            + "\n"
+            + self.search_stats
         )
         if self.players[self.current_player() - 1] != 0:
             self.human_turn = False
@@ -0,0 +1,196 @@
+"""Full game tree search speed: NumPy Board against BitBoard.
+
+Both run the same minimax over every game from the given position (the
+empty grid by default): NumpyBoard is the Board of main.py without its
+canvas, copied for every move and checked with NumPy indexing like the
+original max_value/min_value; the bitboard version plays and takes back
+moves on one BitBoard. Alpha-beta on the BitBoard is reported too, with
+the number of moves it plays when it tries the cells in the row-major
+order of Board.get_possible_moves and in its own order (center, corners,
+edges), then both searches with a TranspositionTable, with and without the
+symmetries. Nodes are the positions the search looks at, counted once
+beforehand.
+
+Run from tp2/: python -m benchmarks.bench_board [--moves 1]
+"""
+
+import argparse
+import random
+import time
+
+import numpy as np
+
+from src.morpion import BitBoard, TranspositionTable, alpha_beta, cell_of, minimax
+from src.morpion.search import LAST_TURN
+
+
+class NumpyBoard:
+    def __init__(self):
+        self.grid = np.array([[0, 0, 0], [0, 0, 0], [0, 0, 0]])
+
+    def copy(self):
+        new_board = NumpyBoard()
+        new_board.grid = np.array(self.grid, copy=True)
+        return new_board
+
+    def get_possible_moves(self):
+        possible_moves = list()
+        for i in range(3):
+            for j in range(3):
+                if self.grid[i][j] == 0:
+                    possible_moves.append((i, j))
+        return possible_moves
+
+    def check_victory(self):
+        for i in range(3):
+            if self.grid[0][i] == self.grid[1][i] == self.grid[2][i] != 0:
+                return self.grid[0][i]
+        for i in range(3):
+            if self.grid[i][0] == self.grid[i][1] == self.grid[i][2] != 0:
+                return self.grid[i][0]
+        if self.grid[0][0] == self.grid[1][1] == self.grid[2][2] != 0:
+            return self.grid[0][0]
+        if self.grid[0][2] == self.grid[1][1] == self.grid[2][0] != 0:
+            return self.grid[0][2]
+        return 0
+
+
+def numpy_max_value(state, turn):
+    if state.check_victory():
+        return -1
+    if turn > 9:
+        return 0
+    value = -2
+    for move in state.get_possible_moves():
+        new_state = state.copy()
+        new_state.grid[move[0]][move[1]] = turn % 2 + 1
+        value = max(value, numpy_min_value(new_state, turn + 1))
+    return value
+
+
+def numpy_min_value(state, turn):
+    if state.check_victory():
+        return 1
+    if turn > 9:
+        return 0
+    value = 2
+    for move in state.get_possible_moves():
+        new_state = state.copy()
+        new_state.grid[move[0]][move[1]] = turn % 2 + 1
+        value = min(value, numpy_max_value(new_state, turn + 1))
+    return value
+
+
+def numpy_minimax(board, turn):
+    best_move, best_value = None, -2
+    for move in board.get_possible_moves():
+        updated_board = board.copy()
+        updated_board.grid[move[0]][move[1]] = turn % 2 + 1
+        value = numpy_min_value(updated_board, turn + 1)
+        if value > best_value:
+            best_value, best_move = value, move
+    return best_move, best_value
+
+
+class CountingBoard(BitBoard):
+    """BitBoard counting the moves played on it"""
+
+    __slots__ = ("made",)
+
+    def __init__(self, player1=0, player2=0):
+        super().__init__(player1, player2)
+        self.made = 0
+
+    def make(self, cell, player):
+        self.made += 1
+        super().make(cell, player)
+
+
+class RowMajorBoard(CountingBoard):
+    """CountingBoard giving alpha-beta its moves unordered"""
+
+    __slots__ = ()
+
+    def ordered_moves(self):
+        return self.possible_moves()
+
+
+def count_nodes(board, turn, cell=None):
+    """Positions a full minimax looks at below this one, itself included"""
+    if cell is not None and board.wins_at(cell, (turn - 1) % 2 + 1):
+        return 1
+    if turn > LAST_TURN:
+        return 1
+    nodes = 1
+    player = turn % 2 + 1
+    for move in board.possible_moves():
+        board.make(move, player)
+        nodes += count_nodes(board, turn + 1, move)
+        board.unmake(move, player)
+    return nodes
+
+
+def timed(search, board, turn):
+    begin = time.perf_counter()
+    result = search(board, turn)
+    return result, time.perf_counter() - begin
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--moves", type=int, default=0, help="random moves first")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    numpy_board, bitboard = NumpyBoard(), BitBoard()
+    turn = 1
+    for _ in range(args.moves):
+        x, y = rng.choice(numpy_board.get_possible_moves())
+        numpy_board.grid[x][y] = turn % 2 + 1
+        bitboard.make(cell_of(x, y), turn % 2 + 1)
+        turn += 1
+
+    nodes = count_nodes(bitboard, turn)
+    print(f"{nodes} positions dans l'arbre complet (tour {turn})")
+    reference, reference_time = timed(numpy_minimax, numpy_board, turn)
+    for name, search in (("Board NumPy", None), ("BitBoard", minimax)):
+        if search is None:
+            result, elapsed = reference, reference_time
+        else:
+            result, elapsed = timed(search, bitboard, turn)
+            assert result == reference, (result, reference)
+        print(
+            f"{name:12} minimax: {elapsed:.2f}s, {nodes / elapsed:,.0f} positions/s"
+            f" (x{reference_time / elapsed:.1f})"
+        )
+    result, elapsed = timed(alpha_beta, bitboard, turn)
+    assert result[1] == reference[1]
+    print(f"{'BitBoard':12} alpha-beta: {elapsed:.3f}s, coup {result[0]}")
+    for name, board_type in (
+        ("ordre ligne", RowMajorBoard),
+        ("ordre centre", CountingBoard),
+    ):
+        board = board_type(bitboard.masks[1], bitboard.masks[2])
+        result = alpha_beta(board, turn)
+        assert result[1] == reference[1]
+        print(f"{'':12} alpha-beta {name}: {board.made} coups joués")
+
+    # Transposition table, without and with the symmetries
+    for search in (minimax, alpha_beta):
+        for symmetries in (False, True):
+            table = TranspositionTable(symmetries)
+            begin = time.perf_counter()
+            result = search(bitboard, turn, table)
+            elapsed = time.perf_counter() - begin
+            assert result[1] == reference[1]
+            counters = table.counters()
+            print(
+                f"{search.__name__:10} table{' D4' if symmetries else '   '}:"
+                f" {elapsed * 1e3:.1f}ms, {counters['entries']} positions,"
+                f" {counters['hit_rate']:.0%} trouvées"
+            )
+
+
+if __name__ == "__main__":
+    main()
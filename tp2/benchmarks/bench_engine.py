@@ -0,0 +1,83 @@
+"""Pruning of the m,n,k engine: nodes searched per decision.
+
+From random openings (a few moves near the center), every position is
+searched to the same fixed depth by engines with more and more of the
+improvements of the search turned on: the transposition table alone, then
+the move ordering (killer moves, history, priors), principal variation
+search and aspiration windows. Each decision starts from an empty table.
+The fewer nodes, the better the pruning; the share of cut-offs made by the
+first move tried tells how good the ordering is.
+
+Run from tp2/: python -m benchmarks.bench_engine --board 15 15 5 --depth 4
+"""
+
+import argparse
+import math
+import random
+import statistics
+import time
+
+from src.morpion import Engine, MNKBoard, MNKGame
+
+CONFIGURATIONS = (
+    ("table seule", dict(ordering=False, pvs=False, aspiration=False)),
+    ("+ ordre", dict(ordering=True, pvs=False, aspiration=False)),
+    ("+ PVS", dict(ordering=True, pvs=True, aspiration=False)),
+    ("+ aspiration", dict(ordering=True, pvs=True, aspiration=True)),
+)
+
+
+def random_openings(game, count, moves, rng):
+    """Positions after `moves` random candidate moves, and the player to move"""
+    positions = []
+    while len(positions) < count:
+        board, player = MNKBoard(game), 2
+        for _ in range(moves):
+            cell = rng.choice(board.candidates())
+            board.make(cell, player)
+            player = 3 - player
+        if board.winning_window(3 - player) is None and not board.is_full():
+            positions.append((board, player))
+    return positions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--board", type=int, nargs=3, default=[15, 15, 5])
+    parser.add_argument("--depth", type=int, default=3)
+    parser.add_argument("--positions", type=int, default=10)
+    parser.add_argument("--moves", type=int, default=4, help="random moves first")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    game = MNKGame(*args.board)
+    positions = random_openings(
+        game, args.positions, args.moves, random.Random(args.seed)
+    )
+    print(
+        f"{args.positions} positions {game.columns}x{game.rows}, {game.k} alignés,"
+        f" profondeur {args.depth}"
+    )
+    reference = None
+    for name, options in CONFIGURATIONS:
+        nodes, first, elapsed = [], [], 0.0
+        for board, player in positions:
+            engine = Engine(game, math.inf, args.depth, **options)
+            begin = time.perf_counter()
+            engine.choose(board, player)
+            elapsed += time.perf_counter() - begin
+            counters = engine.counters()
+            nodes.append(counters["nodes"])
+            first.append(counters["first_move_cutoffs"])
+        mean = statistics.mean(nodes)
+        if reference is None:
+            reference = mean
+        print(
+            f"{name:13} {mean:10,.0f} positions/décision (x{reference / mean:.1f}),"
+            f" {elapsed / len(positions) * 1e3:7.1f}ms,"
+            f" coupures au 1er coup {statistics.mean(first):.0%}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1 @@
+"""Makes the src package importable from the tests, run from tp2/: pytest tests"""
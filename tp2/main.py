@@ -1,74 +1,62 @@
 import tkinter as tk
 from tkinter import ttk
 import numpy as np
-import random as rnd
 from threading import Thread
 from queue import Queue
 from tqdm import tqdm
 
-
-player_type = ["human", "AI: Min-Max", "AI: alpha-beta"]
-
-
-def alpha_beta_decision(board, turn, queue):
-    # random move (to modify)
-    queue.put(
-        board.get_possible_moves()[rnd.randint(0, len(board.get_possible_moves()) - 1)]
+from src import morpion
+
+
+# Board size and stones in a row to win (15, 15, 5 for Gomoku)
+columns, rows, k = 3, 3, 3
+time_budget = 1.0  # Seconds per move of the iterative deepening AI
+game_rules = morpion.MNKGame(columns, rows, k)
+
+# The exhaustive searches are only possible on the 3x3 board
+if (columns, rows, k) == (3, 3, 3):
+    player_type = [
+        "human",
+        "AI: Min-Max",
+        "AI: alpha-beta",
+        "AI: iterative deepening",
+        "AI: perfect play",
+    ]
+else:
+    player_type = ["human", "AI: iterative deepening"]
+use_transposition_table = True  # Shared by the AIs for all moves and games
+transposition_file = None  # e.g. "transpositions.npz" to keep it between runs
+# Table of python -m src.morpion.solver, solved at start if missing
+perfect_play_file = None  # e.g. "perfect_play.npz"
+
+
+def alpha_beta_decision(board, turn, queue, table=None):
+    move, value = morpion.alpha_beta(
+        morpion.BitBoard.from_grid(board.grid), turn, table
     )
+    queue.put(move)
 
 
-def max_value(state, turn):
-    # If the previous move ended the game, current player to play loses
-    if state.check_victory(update_display=False):
-        return -1
-    if turn > 9:
-        return 0  # Draw
-
-    possible_moves = state.get_possible_moves()
-    value = -2
-    for move in possible_moves:
-        new_state = state.copy()
-        new_state.grid[move[0]][move[1]] = turn % 2 + 1
-        value = max(value, min_value(new_state, turn + 1))
-    return value
-
-
-def min_value(state, turn):
-    # If the previous move ended the game, current player to play wins (from MAX perspective)
-    if state.check_victory(update_display=False):
-        return 1
-    if turn > 9:
-        return 0  # Draw
+def minimax_decision(board, turn, queue, table=None):
+    move, value = morpion.minimax(morpion.BitBoard.from_grid(board.grid), turn, table)
+    queue.put(move)
 
-    possible_moves = state.get_possible_moves()
-    value = 2
-    for move in possible_moves:
-        new_state = state.copy()
-        new_state.grid[move[0]][move[1]] = turn % 2 + 1
-        value = min(value, max_value(new_state, turn + 1))
-    return value
 
+def perfect_play_decision(board, turn, queue, perfect_play):
+    move, value = perfect_play.lookup(morpion.BitBoard.from_grid(board.grid))
+    queue.put(move)
 
-def minimax_decision(board, turn, queue):
-    possible_moves = board.get_possible_moves()
-    best_move = possible_moves[0]
-    best_value = -2
 
-    for move in possible_moves:
-        updated_board = board.copy()
-        updated_board.grid[move[0]][move[1]] = turn % 2 + 1
-        value = min_value(updated_board, turn + 1)
-        if value > best_value:
-            best_value = value
-            best_move = move
-
-    queue.put(best_move)
+def iterative_deepening_decision(board, turn, queue, engine):
+    position = morpion.MNKBoard.from_grid(engine.game, board.grid)
+    cell, value = engine.choose(position, turn % 2 + 1)
+    queue.put(engine.game.coordinates(cell))
 
 
 class Board:
     def __init__(self):
-        self.grid = np.array([[0, 0, 0], [0, 0, 0], [0, 0, 0]])
-        self.drawn_symbols = [["", "", ""], ["", "", ""], ["", "", ""]]
+        self.grid = np.zeros((columns, rows), dtype=int)
+        self.drawn_symbols = [[""] * rows for _ in range(columns)]
 
     # copy the board
     def copy(self):
@@ -80,8 +68,8 @@ class Board:
     # return all possible moves for the board
     def get_possible_moves(self):
         possible_moves = list()
-        for i in range(3):
-            for j in range(3):
+        for i in range(columns):
+            for j in range(rows):
                 if self.grid[i][j] == 0:
                     possible_moves.append((i, j))
         return possible_moves
@@ -89,8 +77,8 @@ class Board:
     # reinit the board
     def reinit(self):
         # Clear grid
-        for i in range(3):
-            for j in range(3):
+        for i in range(columns):
+            for j in range(rows):
                 if self.drawn_symbols[i][j] != "":
                     canvas1.delete(self.drawn_symbols[i][j])
                     self.drawn_symbols[i][j] = ""
@@ -98,44 +86,24 @@ class Board:
 
     def draw_symbol(self, x, y, symbol):
         self.drawn_symbols[x][y] = canvas1.create_text(
-            (x + 0.5) * (width // 3),
-            (y + 0.5) * (height // 3),
-            font=("helvetica", width // 6),
+            (x + 0.5) * cell_size,
+            (y + 0.5) * cell_size,
+            font=("helvetica", cell_size // 2),
             text=symbol,
             fill="black",
         )
 
     # check if the board is a victory and could update graphics
     def check_victory(self, update_display=True):
-        # Checking lines
-        for i in range(3):
-            if self.grid[0][i] == self.grid[1][i] == self.grid[2][i] != 0:
-                winner = self.grid[0][i]
-                if update_display:
-                    for j in range(3):
-                        canvas1.itemconfig(self.drawn_symbols[j][i], fill="red")
-                return winner
-        # Checking columns
-        for i in range(3):
-            if self.grid[i][0] == self.grid[i][1] == self.grid[i][2] != 0:
-                winner = self.grid[i][0]
+        # Checking every segment of k cells: lines, columns and diagonals
+        for cells in game_rules.windows:
+            segment = [game_rules.coordinates(cell) for cell in cells]
+            winner = self.grid[segment[0][0]][segment[0][1]]
+            if winner != 0 and all(self.grid[x][y] == winner for x, y in segment):
                 if update_display:
-                    for j in range(3):
-                        canvas1.itemconfig(self.drawn_symbols[i][j], fill="red")
+                    for x, y in segment:
+                        canvas1.itemconfig(self.drawn_symbols[x][y], fill="red")
                 return winner
-        # Checking diagonals
-        if self.grid[0][0] == self.grid[1][1] == self.grid[2][2] != 0:
-            winner = self.grid[0][0]
-            if update_display:
-                for i in range(3):
-                    canvas1.itemconfig(self.drawn_symbols[i][i], fill="red")
-            return winner
-        if self.grid[0][2] == self.grid[1][1] == self.grid[2][0] != 0:
-            winner = self.grid[0][2]
-            if update_display:
-                for i in range(3):
-                    canvas1.itemconfig(self.drawn_symbols[i][2 - i], fill="red")
-            return winner
         return 0
 
 
@@ -149,12 +117,26 @@ class TicTacToe:
         self.human_turn = False
         self.information_label = info_label
         self.ai_move = Queue()
+        self.table = None
+        if use_transposition_table:
+            self.table = morpion.TranspositionTable.load(transposition_file)
+            if self.table is None:
+                self.table = morpion.TranspositionTable()
+        self.engine = morpion.Engine(game_rules, time_budget)
+        self.search_stats = ""  # Counters of the last AI move, under the turn
+        self.perfect_play = None
+        if "AI: perfect play" in player_type:
+            self.perfect_play = morpion.PerfectPlay.load(perfect_play_file)
+            if self.perfect_play is None:
+                self.perfect_play = morpion.PerfectPlay.solve()
 
     def current_player(self):
         return (self.turn - 1) % 2 + 1
 
     def launch(self):
         self.board.reinit()
+        self.engine.new_game()
+        self.search_stats = ""
         self.turn = 0
         self.information_label["text"] = (
             "Turn "
@@ -169,15 +151,33 @@ class TicTacToe:
 
     # Manage AI turn
     def ai_turn(self, ai_type):
-        if ai_type == 1:  # Min-Max
+        ai_type = player_type[ai_type]
+        self.ai_type = ai_type
+        if ai_type == "AI: Min-Max":
+            t = Thread(
+                target=minimax_decision,
+                args=(self.board, self.turn, self.ai_move, self.table),
+            )
+            t.start()
+            self.ai_wait_for_move()
+        elif ai_type == "AI: alpha-beta":
+            t = Thread(
+                target=alpha_beta_decision,
+                args=(self.board, self.turn, self.ai_move, self.table),
+            )
+            t.start()
+            self.ai_wait_for_move()
+        elif ai_type == "AI: iterative deepening":
             t = Thread(
-                target=minimax_decision, args=(self.board, self.turn, self.ai_move)
+                target=iterative_deepening_decision,
+                args=(self.board, self.turn, self.ai_move, self.engine),
             )
             t.start()
             self.ai_wait_for_move()
-        elif ai_type == 2:  # Alpha-Beta
+        elif ai_type == "AI: perfect play":
             t = Thread(
-                target=alpha_beta_decision, args=(self.board, self.turn, self.ai_move)
+                target=perfect_play_decision,
+                args=(self.board, self.turn, self.ai_move, self.perfect_play),
             )
             t.start()
             self.ai_wait_for_move()
@@ -186,15 +186,34 @@ class TicTacToe:
     def ai_wait_for_move(self):
         if not self.ai_move.empty():
             move = self.ai_move.get()
+            self.search_stats = self.ai_stats()
             self.move(move[0], move[1])
         else:
             window.after(100, self.ai_wait_for_move)
 
+    # Counters of the search behind the last AI move, read once it is done
+    def ai_stats(self):
+        exact_search = self.ai_type in ("AI: Min-Max", "AI: alpha-beta")
+        if exact_search and self.table is not None:
+            counters = self.table.counters()
+            return (
+                f"Transposition table: {counters['entries']} positions,"
+                f" {counters['hit_rate']:.0%} hits"
+            )
+        if self.ai_type == "AI: iterative deepening":
+            counters = self.engine.counters()
+            return (
+                f"Depth {counters['depth']}: {counters['nodes']} nodes searched,"
+                f" {counters['first_move_cutoffs']:.0%} cut-offs on the first move"
+            )
+        return ""
+
     def click(self, event):
         if self.human_turn:
-            x = event.x // (width // 3)
-            y = event.y // (height // 3)
-            self.move(x, y)
+            x = event.x // cell_size
+            y = event.y // cell_size
+            if x < columns and y < rows:
+                self.move(x, y)
 
     def move(self, x, y):
         player = self.turn % 2 + 1
@@ -207,12 +226,15 @@ class TicTacToe:
     def handle_turn(self):
         self.human_turn = False
         winner = self.board.check_victory()
-        if winner or self.turn == 9:
+        if winner or self.turn == game_rules.cells:
             self.information_label["fg"] = "red"
             if winner:
                 self.information_label["text"] = "Player " + str(winner) + " wins !"
             else:
                 self.information_label["text"] = "This is a draw !"
+            self.information_label["text"] += "\n" + self.search_stats
+            if self.table is not None and transposition_file is not None:
+                self.table.save(transposition_file)
             return
         self.turn = self.turn + 1
         self.information_label["text"] = (
@@ -221,6 +243,8 @@ class TicTacToe:
             + " - Player "
             + str((self.turn - 1) % 2 + 1)
             + " is playing"
+            + "\n"
+            + self.search_stats
         )
         if self.players[self.current_player() - 1] != 0:
             self.human_turn = False
@@ -230,9 +254,10 @@ class TicTacToe:
 
 
 # Graphical settings
-width = 300
-height = 300
-grid_thickness = 5
+cell_size = max(30, 300 // max(columns, rows))
+width = cell_size * columns
+height = cell_size * rows
+grid_thickness = max(1, cell_size // 20)
 
 window = tk.Tk()
 window.title("Tie Tac Toe")
@@ -240,18 +265,14 @@ canvas1 = tk.Canvas(window, bg="white", width=width, height=height)
 
 
 # Grid drawing
-line1 = canvas1.create_line(
-    0, height // 3, width, height // 3, fill="black", width=grid_thickness
-)
-line2 = canvas1.create_line(
-    0, (height // 3) * 2, width, (height // 3) * 2, fill="black", width=grid_thickness
-)
-line3 = canvas1.create_line(
-    width // 3, 0, width // 3, height, fill="black", width=grid_thickness
-)
-line4 = canvas1.create_line(
-    (width // 3) * 2, 0, (width // 3) * 2, height, fill="black", width=grid_thickness
-)
+for i in range(1, columns):
+    canvas1.create_line(
+        i * cell_size, 0, i * cell_size, height, fill="black", width=grid_thickness
+    )
+for j in range(1, rows):
+    canvas1.create_line(
+        0, j * cell_size, width, j * cell_size, fill="black", width=grid_thickness
+    )
 canvas1.grid(row=0, column=0, columnspan=2)
 
 information = tk.Label(window, text="")
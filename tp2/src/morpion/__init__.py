@@ -0,0 +1,8 @@
+"""Moteur du Morpion, utilisable sans interface graphique."""
+
+from .bitboard import BitBoard, WIN_LINES, cell_of, coordinates
+from .engine import Engine, play
+from .mnk import MNKBoard, MNKGame
+from .search import alpha_beta, minimax
+from .solver import PerfectPlay
+from .transposition import TranspositionTable
@@ -0,0 +1,109 @@
+"""Morpion positions as bitboards.
+
+Cell (x, y) of the grid (x the column, like Board.grid[x][y]) is bit
+3 * x + y of a 9 bit integer. BitBoard keeps one such mask per player,
+indexed by the value Board.grid uses for that player (1 or 2). A move
+sets a bit and undoing it clears the same bit, so a search plays and
+takes back moves on a single board instead of copying it, and a victory
+is a test against the few precomputed lines through the last cell played.
+"""
+
+SIZE = 3
+FULL = (1 << SIZE * SIZE) - 1
+
+
+def cell_of(x, y):
+    return SIZE * x + y
+
+
+def coordinates(cell):
+    """(x, y) of a cell, the moves of Board.get_possible_moves"""
+    return divmod(cell, SIZE)
+
+
+def _lines():
+    lines = []
+    for i in range(SIZE):
+        lines.append(sum(1 << cell_of(x, i) for x in range(SIZE)))
+        lines.append(sum(1 << cell_of(i, y) for y in range(SIZE)))
+    lines.append(sum(1 << cell_of(i, i) for i in range(SIZE)))
+    lines.append(sum(1 << cell_of(i, SIZE - 1 - i) for i in range(SIZE)))
+    return tuple(lines)
+
+
+WIN_LINES = _lines()
+# Lines going through each cell
+LINES_THROUGH = tuple(
+    tuple(line for line in WIN_LINES if line >> cell & 1) for cell in range(SIZE * SIZE)
+)
+# Cells of each 9 bit mask of empty cells, so that listing moves is a lookup
+CELLS_OF = tuple(
+    tuple(cell for cell in range(SIZE * SIZE) if mask >> cell & 1)
+    for mask in range(FULL + 1)
+)
+# Cells by decreasing number of lines through them: center, corners, edges
+MOVE_ORDER = tuple(
+    sorted(range(SIZE * SIZE), key=lambda cell: -len(LINES_THROUGH[cell]))
+)
+# Same as CELLS_OF, in MOVE_ORDER, so that alpha-beta tries the best cells first
+ORDERED_CELLS_OF = tuple(
+    tuple(cell for cell in MOVE_ORDER if mask >> cell & 1) for mask in range(FULL + 1)
+)
+
+
+class BitBoard:
+    """Morpion position: masks[player] has a bit set per cell of player"""
+
+    __slots__ = ("masks",)
+
+    def __init__(self, player1=0, player2=0):
+        self.masks = [0, player1, player2]
+
+    @classmethod
+    def from_grid(cls, grid):
+        """BitBoard of a Board.grid (0 empty, 1 and 2 the players)"""
+        board = cls()
+        for x in range(SIZE):
+            for y in range(SIZE):
+                player = int(grid[x][y])
+                if player:
+                    board.masks[player] |= 1 << cell_of(x, y)
+        return board
+
+    def copy(self):
+        return BitBoard(self.masks[1], self.masks[2])
+
+    def empty(self):
+        """Mask of the empty cells"""
+        return FULL & ~(self.masks[1] | self.masks[2])
+
+    def possible_moves(self):
+        """Tuple of the empty cells"""
+        return CELLS_OF[FULL & ~(self.masks[1] | self.masks[2])]
+
+    def ordered_moves(self):
+        """Tuple of the empty cells, center first, then corners, then edges"""
+        return ORDERED_CELLS_OF[FULL & ~(self.masks[1] | self.masks[2])]
+
+    def make(self, cell, player):
+        self.masks[player] |= 1 << cell
+
+    def unmake(self, cell, player):
+        self.masks[player] &= ~(1 << cell)
+
+    def wins_at(self, cell, player):
+        """True if player owns a full line through cell"""
+        mask = self.masks[player]
+        for line in LINES_THROUGH[cell]:
+            if mask & line == line:
+                return True
+        return False
+
+    def winner(self):
+        """Player owning a full line, 0 if there is none"""
+        for player in (1, 2):
+            mask = self.masks[player]
+            for line in WIN_LINES:
+                if mask & line == line:
+                    return player
+        return 0
@@ -0,0 +1,302 @@
+"""Depth-limited alpha-beta with iterative deepening for m,n,k-games.
+
+Engine.choose searches the position to depth 1, 2, 3... until the time
+budget runs out, and plays the best move of the deepest search that
+completed. Below the depth limit a position is valued by MNKBoard's
+evaluation; a win is worth WIN minus the number of moves to reach it, so
+that the engine prefers the quickest win and the slowest loss. Searching
+the best move of the previous depth first, and the transposition table
+kept from one depth (and one move) to the next, are what make the
+repeated searches cheap.
+
+Alpha-beta prunes the most when the best move comes first, so the moves
+of a position are tried in this order: the best move stored in the
+table, the two last moves that caused a cut-off at the same ply (killer
+moves), then the others by history score (the moves that caused cut-offs
+anywhere, weighted by depth) and, on ties, by number of windows through
+the cell (center before corners before edges). With a good first move
+the others only need to be proven worse, which principal variation
+search does with a null window, searching again only the few that turn
+out better. From depth 2 the root is also searched with an aspiration
+window around the value of the previous depth.
+"""
+
+import math
+import time
+
+from .mnk import MNKBoard
+
+WIN = 1_000_000_000
+EXACT, LOWER, UPPER = 0, 1, 2
+CHECK_EVERY = 1024  # Nodes between two looks at the clock
+
+
+class SearchTimeout(Exception):
+    pass
+
+
+def is_decisive(value):
+    """True for the value of a forced win or loss"""
+    return abs(value) > WIN // 2
+
+
+def to_table(value, ply):
+    """Value to store for a position at ply: wins counted from the position.
+
+    A position reached at another ply (by a transposition, or on the next
+    move) then reads back the win at the right distance from its own root.
+    """
+    if value > WIN // 2:
+        return value + ply
+    if value < -WIN // 2:
+        return value - ply
+    return value
+
+
+def from_table(value, ply):
+    """Value read from the table for a position at ply, counted from the root"""
+    if value > WIN // 2:
+        return value - ply
+    if value < -WIN // 2:
+        return value + ply
+    return value
+
+
+class Engine:
+    """Negamax alpha-beta player for one MNKGame.
+
+    `table` maps a Zobrist hash to (depth, value, bound, best move). It is
+    kept between calls to choose, like the history scores, and both are
+    cleared with new_game. `ordering`, `pvs` and `aspiration` turn the
+    corresponding improvements off when False, to measure what they bring.
+    """
+
+    def __init__(
+        self,
+        game,
+        time_budget=1.0,
+        max_depth=None,
+        ordering=True,
+        pvs=True,
+        aspiration=True,
+    ):
+        self.game = game
+        self.time_budget = time_budget
+        self.max_depth = max_depth
+        self.ordering = ordering
+        self.pvs = pvs
+        # Half width of the aspiration window: the weight of a full window
+        self.aspiration = game.weights[game.k] if aspiration else 0
+        self.table = dict()
+        self.prior = tuple(len(windows) for windows in game.windows_through)
+        self.history = (None, [0] * game.cells, [0] * game.cells)
+        self.killers = []  # Two moves per ply
+        self.nodes = 0
+        self.depth = 0  # Depth of the last completed search
+        self.nodes_per_depth = []
+        self.cutoffs = 0
+        self.first_move_cutoffs = 0
+        self.researches = 0
+        self._deadline = math.inf
+
+    def new_game(self):
+        self.table.clear()
+        for player in (1, 2):
+            self.history[player][:] = [0] * self.game.cells
+
+    def counters(self):
+        """Statistics of the last call to choose"""
+        return {
+            "nodes": self.nodes,
+            "depth": self.depth,
+            "nodes_per_depth": list(self.nodes_per_depth),
+            "cutoffs": self.cutoffs,
+            "first_move_cutoffs": (
+                self.first_move_cutoffs / self.cutoffs if self.cutoffs else 0.0
+            ),
+            "researches": self.researches,
+        }
+
+    def choose(self, board, player):
+        """Best move (cell) found for player within the time budget, and its value"""
+        candidates = board.candidates()
+        if not candidates:
+            raise ValueError("no move left")
+        self.nodes = 0
+        self.depth = 0
+        self.nodes_per_depth = []
+        self.cutoffs = self.first_move_cutoffs = self.researches = 0
+        self._deadline = time.perf_counter() + self.time_budget
+        remaining = self.game.cells - len(board.moves)
+        max_depth = remaining if self.max_depth is None else self.max_depth
+        self.killers = [[None, None] for _ in range(max_depth + 1)]
+        best_move, best_value = candidates[0], 0
+        for depth in range(1, max_depth + 1):
+            nodes = self.nodes
+            try:
+                best_value, best_move = self._aspiration(
+                    board, player, depth, best_move, best_value
+                )
+            except SearchTimeout:
+                break
+            self.depth = depth
+            self.nodes_per_depth.append(self.nodes - nodes)
+            if is_decisive(best_value) or depth >= remaining:
+                break
+        return best_move, best_value
+
+    def _aspiration(self, board, player, depth, first_move, guess):
+        """Root search in a window around guess, widened if the value falls out"""
+        if depth == 1 or not self.aspiration:
+            return self._root(board, player, depth, first_move, -math.inf, math.inf)
+        alpha, beta = guess - self.aspiration, guess + self.aspiration
+        value, move = self._root(board, player, depth, first_move, alpha, beta)
+        if value <= alpha:
+            self.researches += 1
+            return self._root(board, player, depth, first_move, -math.inf, beta)
+        if value >= beta:
+            self.researches += 1
+            return self._root(board, player, depth, move, alpha, math.inf)
+        return value, move
+
+    def _ordered(self, board, player, ply, tt_move):
+        """Candidate moves, the most promising first"""
+        moves = board.candidates()
+        front = [] if tt_move is None else [tt_move]
+        if self.ordering:
+            history, prior = self.history[player], self.prior
+            moves.sort(key=lambda move: (history[move], prior[move]), reverse=True)
+            for killer in self.killers[ply]:
+                if killer is not None and killer not in front and killer in moves:
+                    front.append(killer)
+        for move in front:
+            moves.remove(move)
+        return front + moves
+
+    def _search_move(self, board, player, move, depth, alpha, beta, ply, first):
+        """Value for player of playing move, the rest searched to depth - 1"""
+        board.make(move, player)
+        try:
+            if first or not self.pvs:
+                return -self._negamax(
+                    board, 3 - player, depth - 1, -beta, -alpha, ply + 1, move
+                )
+            # Prove that the move is no better than alpha, search it again if not
+            value = -self._negamax(
+                board, 3 - player, depth - 1, -alpha - 1, -alpha, ply + 1, move
+            )
+            if alpha < value < beta:
+                self.researches += 1
+                value = -self._negamax(
+                    board, 3 - player, depth - 1, -beta, -alpha, ply + 1, move
+                )
+            return value
+        finally:
+            board.unmake(move, player)
+
+    def _root(self, board, player, depth, first_move, alpha, beta):
+        window_low = alpha
+        best_value, best_move = -math.inf, first_move
+        moves = self._ordered(board, player, 0, first_move)
+        for index, move in enumerate(moves):
+            value = self._search_move(
+                board, player, move, depth, alpha, beta, 0, index == 0
+            )
+            if value > best_value:
+                best_value, best_move = value, move
+                if value > alpha:
+                    alpha = value
+                    if alpha >= beta:
+                        break
+        self._store(board, depth, best_value, window_low, beta, best_move, 0)
+        return best_value, best_move
+
+    def _negamax(self, board, player, depth, alpha, beta, ply, last_move):
+        """Value for player, to move, of the position after last_move"""
+        self.nodes += 1
+        if self.nodes % CHECK_EVERY == 0 and time.perf_counter() > self._deadline:
+            raise SearchTimeout
+        if board.wins_at(last_move, 3 - player):
+            return ply - WIN
+        if board.is_full():
+            return 0
+        if depth == 0:
+            return board.evaluate(player)
+
+        entry = self.table.get(board.hash)
+        tt_move = None
+        if entry is not None:
+            entry_depth, value, bound, tt_move = entry
+            value = from_table(value, ply)
+            if entry_depth >= depth:
+                if bound == EXACT:
+                    return value
+                if bound == LOWER:
+                    alpha = max(alpha, value)
+                else:
+                    beta = min(beta, value)
+                if alpha >= beta:
+                    return value
+        window_low = alpha
+
+        moves = self._ordered(board, player, ply, tt_move)
+        best_value, best_move = -math.inf, moves[0]
+        for index, move in enumerate(moves):
+            value = self._search_move(
+                board, player, move, depth, alpha, beta, ply, index == 0
+            )
+            if value > best_value:
+                best_value, best_move = value, move
+                if value > alpha:
+                    alpha = value
+                    if alpha >= beta:
+                        self._cutoff(player, move, depth, ply, index)
+                        break
+        self._store(board, depth, best_value, window_low, beta, best_move, ply)
+        return best_value
+
+    def _cutoff(self, player, move, depth, ply, index):
+        """Remember the move that caused a cut-off, for the ordering"""
+        self.cutoffs += 1
+        if index == 0:
+            self.first_move_cutoffs += 1
+        if self.ordering:
+            self.history[player][move] += depth * depth
+            killers = self.killers[ply]
+            if killers[0] != move:
+                killers[0], killers[1] = move, killers[0]
+
+    def _store(self, board, depth, value, window_low, beta, move, ply):
+        if value >= beta:
+            bound = LOWER
+        elif value <= window_low:
+            bound = UPPER
+        else:
+            bound = EXACT
+        self.table[board.hash] = (depth, to_table(value, ply), bound, move)
+
+
+def play(game, engines, moves=(), verbose=False):
+    """Winner of a game between engines[0] (player 1) and engines[1], 0 if drawn.
+
+    Player 2 moves first, like in main.py, after the opening `moves`.
+    """
+    board = MNKBoard(game)
+    player = 2
+    for cell in moves:
+        board.make(cell, player)
+        player = 3 - player
+    while True:
+        if board.moves and board.wins_at(board.moves[-1], 3 - player):
+            return 3 - player
+        if board.is_full():
+            return 0
+        engine = engines[player - 1]
+        cell, value = engine.choose(board, player)
+        if verbose:
+            print(
+                f"joueur {player}: {game.coordinates(cell)} valeur {value}"
+                f" profondeur {engine.depth} ({engine.nodes} positions)"
+            )
+        board.make(cell, player)
+        player = 3 - player
@@ -0,0 +1,193 @@
+"""m,n,k-games: k in a row on a board of any size (Gomoku is 15,15,5).
+
+MNKGame holds what only depends on the size of the board: the windows
+(every segment of k cells where a line can be made), the windows through
+each cell, the cells near each cell, and random Zobrist keys. Cells are
+numbered rows * x + y, so that on 3x3 they match bitboard.cell_of.
+
+MNKBoard is a position on such a board. Besides one bitboard per player,
+it counts the stones of each player in every window and updates the
+counts of the windows through a cell on each make/unmake. A move wins iff
+one of its windows reaches k stones, and the evaluation (a sum over the
+windows still open to a single player) is kept up to date the same way,
+so neither needs a scan of the board. The Zobrist hash of the position is
+updated with each move too.
+"""
+
+import random
+
+DIRECTIONS = ((1, 0), (0, 1), (1, 1), (1, -1))
+
+
+class MNKGame:
+    """Board of columns x rows cells, won by k stones in a row.
+
+    Candidate moves are the empty cells at most `radius` cells away from
+    a stone (all of them on boards of at most 16 cells).
+    """
+
+    def __init__(self, columns=3, rows=3, k=3, radius=2, seed=0):
+        if not 1 <= k <= max(columns, rows):
+            raise ValueError(f"cannot make {k} in a row on {columns}x{rows}")
+        self.columns = columns
+        self.rows = rows
+        self.k = k
+        self.cells = columns * rows
+        self.full = (1 << self.cells) - 1
+
+        windows = []
+        for x in range(columns):
+            for y in range(rows):
+                for dx, dy in DIRECTIONS:
+                    end_x, end_y = x + dx * (k - 1), y + dy * (k - 1)
+                    if 0 <= end_x < columns and 0 <= end_y < rows:
+                        windows.append(
+                            tuple(self.cell(x + dx * i, y + dy * i) for i in range(k))
+                        )
+        self.windows = tuple(windows)
+        through = [[] for _ in range(self.cells)]
+        for window, cells in enumerate(self.windows):
+            for cell in cells:
+                through[cell].append(window)
+        self.windows_through = tuple(tuple(windows) for windows in through)
+        # Value of a window holding `count` stones of a single player
+        self.weights = tuple(0 if count == 0 else 4**count for count in range(k + 1))
+
+        if self.cells <= 16:
+            radius = max(columns, rows)
+        self.near = tuple(
+            sum(
+                1 << self.cell(x + dx, y + dy)
+                for dx in range(-radius, radius + 1)
+                for dy in range(-radius, radius + 1)
+                if 0 <= x + dx < columns and 0 <= y + dy < rows
+            )
+            for x in range(columns)
+            for y in range(rows)
+        )
+        rng = random.Random(seed)
+        self.zobrist = (
+            None,
+            tuple(rng.getrandbits(64) for _ in range(self.cells)),
+            tuple(rng.getrandbits(64) for _ in range(self.cells)),
+        )
+
+    def cell(self, x, y):
+        return self.rows * x + y
+
+    def coordinates(self, cell):
+        """(x, y) of a cell, like the moves of Board.get_possible_moves"""
+        return divmod(cell, self.rows)
+
+    def center(self):
+        return self.cell(self.columns // 2, self.rows // 2)
+
+
+def cells_of(mask):
+    """Cells of the bits set in mask, lowest first"""
+    cells = []
+    while mask:
+        low = mask & -mask
+        cells.append(low.bit_length() - 1)
+        mask ^= low
+    return cells
+
+
+class MNKBoard:
+    """Position of an MNKGame, played with make/unmake.
+
+    `score` is the evaluation for player 1: the sum of the weights of the
+    windows holding only stones of player 1, minus the same for player 2.
+    """
+
+    __slots__ = ("game", "masks", "counts", "score", "hash", "moves")
+
+    def __init__(self, game):
+        self.game = game
+        self.masks = [0, 0, 0]
+        self.counts = (None, [0] * len(game.windows), [0] * len(game.windows))
+        self.score = 0
+        self.hash = 0
+        self.moves = []  # Cells played, last one at the end
+
+    @classmethod
+    def from_grid(cls, game, grid):
+        """MNKBoard of a Board.grid (0 empty, 1 and 2 the players)"""
+        board = cls(game)
+        for x in range(game.columns):
+            for y in range(game.rows):
+                player = int(grid[x][y])
+                if player:
+                    board.make(game.cell(x, y), player)
+        return board
+
+    def occupied(self):
+        return self.masks[1] | self.masks[2]
+
+    def is_full(self):
+        return len(self.moves) == self.game.cells
+
+    def make(self, cell, player):
+        game = self.game
+        self.masks[player] |= 1 << cell
+        self.hash ^= game.zobrist[player][cell]
+        self.moves.append(cell)
+        mine, theirs = self.counts[player], self.counts[3 - player]
+        weights = game.weights
+        delta = 0
+        for window in game.windows_through[cell]:
+            count = mine[window]
+            if not theirs[window]:
+                delta += weights[count + 1] - weights[count]
+            elif not count:
+                delta += weights[theirs[window]]  # Their window is now blocked
+            mine[window] = count + 1
+        self.score += delta if player == 1 else -delta
+
+    def unmake(self, cell, player):
+        game = self.game
+        self.masks[player] &= ~(1 << cell)
+        self.hash ^= game.zobrist[player][cell]
+        self.moves.pop()
+        mine, theirs = self.counts[player], self.counts[3 - player]
+        weights = game.weights
+        delta = 0
+        for window in game.windows_through[cell]:
+            count = mine[window] - 1
+            if not theirs[window]:
+                delta += weights[count + 1] - weights[count]
+            elif not count:
+                delta += weights[theirs[window]]
+            mine[window] = count
+        self.score -= delta if player == 1 else -delta
+
+    def wins_at(self, cell, player):
+        """True if the stone of player on cell completes k in a row"""
+        k = self.game.k
+        counts = self.counts[player]
+        for window in self.game.windows_through[cell]:
+            if counts[window] == k:
+                return True
+        return False
+
+    def winning_window(self, player):
+        """Cells of a full window of player, or None"""
+        counts = self.counts[player]
+        for window, cells in enumerate(self.game.windows):
+            if counts[window] == self.game.k:
+                return cells
+        return None
+
+    def evaluate(self, player):
+        """Evaluation for player"""
+        return self.score if player == 1 else -self.score
+
+    def candidates(self):
+        """Empty cells near a stone, the center on an empty board"""
+        occupied = self.masks[1] | self.masks[2]
+        if not occupied:
+            return [self.game.center()]
+        near = 0
+        for cell in self.moves:
+            near |= self.game.near[cell]
+        return cells_of(near & ~occupied)
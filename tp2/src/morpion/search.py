@@ -0,0 +1,182 @@
+"""Minimax and alpha-beta on a BitBoard.
+
+Like the original functions of main.py, `turn` is the number of the move
+about to be played (1 to 9) and the player playing it puts turn % 2 + 1 on
+the grid. Values are from the point of view of the player choosing the
+move: 1 win, 0 draw, -1 loss. Each function plays and takes back its
+moves on the board it is given, which is left unchanged.
+
+With a TranspositionTable, a position already searched (in any
+orientation) is not searched again: minimax uses the exact values, and
+alpha-beta also narrows its window with the bounds stored by earlier
+cut-offs. The table may be kept from one call to the next.
+
+Alpha-beta tries the center first, then the corners, then the edges: the
+cells on the most lines are usually the best, and an early best move is
+what makes the cut-offs happen.
+"""
+
+from .bitboard import SIZE, coordinates
+from .transposition import EXACT, LOWER, UPPER
+
+LAST_TURN = SIZE * SIZE
+
+
+def max_value(board, turn, cell, table=None):
+    """Value for MAX, playing at turn; cell is the move MIN just played"""
+    # If the previous move ended the game, current player to play loses
+    if board.wins_at(cell, (turn - 1) % 2 + 1):
+        return -1
+    if turn > LAST_TURN:
+        return 0  # Draw
+    if table is not None:
+        key = table.key(board)
+        entry = table.probe(key)
+        if entry is not None and entry[1] == EXACT:
+            table.cutoffs += 1
+            return entry[0]
+
+    player = turn % 2 + 1
+    value = -2
+    for move in board.possible_moves():
+        board.make(move, player)
+        value = max(value, min_value(board, turn + 1, move, table))
+        board.unmake(move, player)
+    if table is not None:
+        table.store(key, value)
+    return value
+
+
+def min_value(board, turn, cell, table=None):
+    """Value for MAX, MIN playing at turn; cell is the move MAX just played"""
+    if board.wins_at(cell, (turn - 1) % 2 + 1):
+        return 1
+    if turn > LAST_TURN:
+        return 0  # Draw
+    if table is not None:
+        key = table.key(board)
+        entry = table.probe(key)
+        if entry is not None and entry[1] == EXACT:
+            table.cutoffs += 1
+            return -entry[0]  # Stored for MIN, the player to move
+
+    player = turn % 2 + 1
+    value = 2
+    for move in board.possible_moves():
+        board.make(move, player)
+        value = min(value, max_value(board, turn + 1, move, table))
+        board.unmake(move, player)
+    if table is not None:
+        table.store(key, -value)
+    return value
+
+
+def minimax(board, turn, table=None):
+    """Best move as (x, y), and its value"""
+    player = turn % 2 + 1
+    best_move, best_value = None, -2
+    for move in board.possible_moves():
+        board.make(move, player)
+        value = min_value(board, turn + 1, move, table)
+        board.unmake(move, player)
+        if value > best_value:
+            best_value, best_move = value, move
+    return coordinates(best_move), best_value
+
+
+def max_value_ab(board, turn, cell, alpha, beta, table=None):
+    if board.wins_at(cell, (turn - 1) % 2 + 1):
+        return -1
+    if turn > LAST_TURN:
+        return 0
+    if table is not None:
+        key = table.key(board)
+        entry = table.probe(key)
+        if entry is not None:
+            value, flag = entry
+            if flag == EXACT:
+                table.cutoffs += 1
+                return value
+            if flag == LOWER:
+                alpha = max(alpha, value)
+            else:
+                beta = min(beta, value)
+            if alpha >= beta:
+                table.cutoffs += 1
+                return value
+    window_low = alpha
+
+    player = turn % 2 + 1
+    value = -2
+    for move in board.ordered_moves():
+        board.make(move, player)
+        value = max(value, min_value_ab(board, turn + 1, move, alpha, beta, table))
+        board.unmake(move, player)
+        if value >= beta:
+            break
+        alpha = max(alpha, value)
+    if table is not None:
+        if value >= beta:
+            table.store(key, value, LOWER)
+        elif value <= window_low:
+            table.store(key, value, UPPER)
+        else:
+            table.store(key, value, EXACT)
+    return value
+
+
+def min_value_ab(board, turn, cell, alpha, beta, table=None):
+    if board.wins_at(cell, (turn - 1) % 2 + 1):
+        return 1
+    if turn > LAST_TURN:
+        return 0
+    if table is not None:
+        # Entries are stored for MIN, the player to move: negate them
+        key = table.key(board)
+        entry = table.probe(key)
+        if entry is not None:
+            value, flag = -entry[0], entry[1]
+            if flag == EXACT:
+                table.cutoffs += 1
+                return value
+            if flag == LOWER:
+                beta = min(beta, value)
+            else:
+                alpha = max(alpha, value)
+            if alpha >= beta:
+                table.cutoffs += 1
+                return value
+    window_high = beta
+
+    player = turn % 2 + 1
+    value = 2
+    for move in board.ordered_moves():
+        board.make(move, player)
+        value = min(value, max_value_ab(board, turn + 1, move, alpha, beta, table))
+        board.unmake(move, player)
+        if value <= alpha:
+            break
+        beta = min(beta, value)
+    if table is not None:
+        if value <= alpha:
+            table.store(key, -value, LOWER)
+        elif value >= window_high:
+            table.store(key, -value, UPPER)
+        else:
+            table.store(key, -value, EXACT)
+    return value
+
+
+def alpha_beta(board, turn, table=None):
+    """Best move as (x, y), and its value, pruning with alpha-beta"""
+    player = turn % 2 + 1
+    best_move, best_value = None, -2
+    alpha, beta = -2, 2
+    for move in board.ordered_moves():
+        board.make(move, player)
+        value = min_value_ab(board, turn + 1, move, alpha, beta, table)
+        board.unmake(move, player)
+        if value > best_value:
+            best_value, best_move = value, move
+        alpha = max(alpha, value)
+    return coordinates(best_move), best_value
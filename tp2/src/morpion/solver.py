@@ -0,0 +1,165 @@
+"""Perfect play table for the 3x3 Morpion, solved offline.
+
+Every position of the grid is a base-3 number: cell c (cell_of(x, y))
+holds the digit Board.grid[x][y], worth that digit times 3**c. The table
+has one entry per number (3**9 = 19,683), of which the 5,478 positions
+reachable from the empty grid are solved once, by a negamax over the
+positions with each one solved a single time. An entry holds the value
+for the player to move (1 win, 0 draw, -1 loss) and the best move; the
+player to move is known from the position, player 2 moving first like in
+main.py. The best move is the first one of best value in the order of
+Board.get_possible_moves, the one minimax_decision plays, so a lookup
+answers exactly like it, in constant time.
+
+Run from tp2/: python -m src.morpion.solver perfect_play.npz [--verify]
+"""
+
+import argparse
+import os
+import time
+
+import numpy as np
+
+from .bitboard import FULL, SIZE, BitBoard, coordinates
+from .search import minimax
+
+SOLVER_VERSION = 1
+POSITIONS = 3 ** (SIZE * SIZE)
+UNREACHABLE = -128  # Value of the positions no game goes through
+NO_MOVE = 255  # Move of the positions where the game is over
+
+# Base-3 number of each mask of a single player, counting its stones as 1
+BASE3 = tuple(
+    sum(3**cell for cell in range(SIZE * SIZE) if mask >> cell & 1)
+    for mask in range(FULL + 1)
+)
+
+
+def encode(board):
+    """Base-3 number of a BitBoard"""
+    return BASE3[board.masks[1]] + 2 * BASE3[board.masks[2]]
+
+
+def decode(code):
+    """BitBoard of a base-3 number"""
+    board = BitBoard()
+    for cell in range(SIZE * SIZE):
+        code, digit = divmod(code, 3)
+        if digit:
+            board.masks[digit] |= 1 << cell
+    return board
+
+
+def to_move(board):
+    """Player to move: 2 when both have as many stones, since 2 starts"""
+    if board.masks[1].bit_count() == board.masks[2].bit_count():
+        return 2
+    return 1
+
+
+class PerfectPlay:
+    """Value and best move of every reachable position, by base-3 number"""
+
+    def __init__(self, values, moves):
+        self.values = values
+        self.moves = moves
+
+    @classmethod
+    def solve(cls):
+        values = np.full(POSITIONS, UNREACHABLE, dtype=np.int8)
+        moves = np.full(POSITIONS, NO_MOVE, dtype=np.uint8)
+        _solve(BitBoard(), 2, None, values, moves)
+        return cls(values, moves)
+
+    def reachable(self):
+        return int(np.count_nonzero(self.values != UNREACHABLE))
+
+    def lookup(self, board):
+        """Best move as (x, y) (None if the game is over), and its value"""
+        code = encode(board)
+        value = int(self.values[code])
+        if value == UNREACHABLE:
+            raise ValueError("position not reachable in a game")
+        move = int(self.moves[code])
+        return (None if move == NO_MOVE else coordinates(move)), value
+
+    def save(self, path):
+        np.savez(
+            path,
+            version=np.asarray(SOLVER_VERSION),
+            values=self.values,
+            moves=self.moves,
+        )
+
+    @classmethod
+    def load(cls, path):
+        """Read a saved table, None if missing or of another version"""
+        if path is None or not os.path.exists(path):
+            return None
+        with np.load(path) as data:
+            if int(data["version"]) != SOLVER_VERSION:
+                return None
+            return cls(data["values"], data["moves"])
+
+
+def _solve(board, player, cell, values, moves):
+    """Value of the position for player, to move; cell is the last move"""
+    code = encode(board)
+    if values[code] != UNREACHABLE:
+        return int(values[code])
+    if cell is not None and board.wins_at(cell, 3 - player):
+        value = -1
+    else:
+        value, best_move = 0, NO_MOVE  # Draw if the grid is full
+        for move in board.possible_moves():
+            board.make(move, player)
+            move_value = -_solve(board, 3 - player, move, values, moves)
+            board.unmake(move, player)
+            if best_move == NO_MOVE or move_value > value:
+                value, best_move = move_value, move
+        moves[code] = best_move
+    values[code] = value
+    return value
+
+
+def verify(table):
+    """Positions where the table and minimax disagree, as (code, table, minimax)"""
+    differences = []
+    for code in np.flatnonzero(table.moves != NO_MOVE).tolist():
+        board = decode(code)
+        turn = board.masks[1].bit_count() + board.masks[2].bit_count() + 1
+        expected = minimax(board, turn)
+        found = table.lookup(board)
+        if found != expected:
+            differences.append((code, found, expected))
+    return differences
+
+
+def main(arguments=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("output", nargs="?", help="npz file to write the table to")
+    parser.add_argument(
+        "--verify", action="store_true", help="compare with minimax everywhere"
+    )
+    args = parser.parse_args(arguments)
+
+    begin = time.perf_counter()
+    table = PerfectPlay.solve()
+    print(
+        f"{table.reachable()} positions résolues en"
+        f" {time.perf_counter() - begin:.2f}s"
+    )
+    if args.output is not None:
+        table.save(args.output)
+    if args.verify:
+        differences = verify(table)
+        for code, found, expected in differences:
+            print(f"position {code}: table {found}, minimax {expected}")
+        playable = int(np.count_nonzero(table.moves != NO_MOVE))
+        print(f"{playable - len(differences)}/{playable} positions identiques")
+        if differences:
+            raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,136 @@
+"""Transposition table for the Morpion searches.
+
+The same position is reached through many move orders (a full minimax
+looks at 549,946 positions but there are only 5,478 different ones), and
+the 8 rotations and reflections of a position (the D4 group of the
+square) have the same value. The table is keyed by the two bitboards of
+the position, mapped to the smallest key among its 8 images, so that a
+position found once is never searched again in any orientation (765
+positions up to symmetry).
+
+Values are stored from the point of view of the player to move, who is
+known from the position, with a bound type for alpha-beta: EXACT, LOWER
+(the value is at least this) or UPPER (at most this). They are exact
+game values, so the table stays valid from one move to the next and from
+one game to the next, and can be saved to a file.
+"""
+
+import os
+
+import numpy as np
+
+from .bitboard import FULL, SIZE, cell_of
+
+TABLE_VERSION = 1
+EXACT, LOWER, UPPER = 0, 1, 2
+
+
+def _symmetries():
+    """The 8 permutations of the cells by the rotations and reflections"""
+    last = SIZE - 1
+    maps = (
+        lambda x, y: (x, y),
+        lambda x, y: (y, last - x),
+        lambda x, y: (last - x, last - y),
+        lambda x, y: (last - y, x),
+        lambda x, y: (last - x, y),
+        lambda x, y: (x, last - y),
+        lambda x, y: (y, x),
+        lambda x, y: (last - y, last - x),
+    )
+    return tuple(
+        tuple(cell_of(*image(*divmod(cell, SIZE))) for cell in range(SIZE * SIZE))
+        for image in maps
+    )
+
+
+SYMMETRIES = _symmetries()
+# MASK_IMAGES[s][mask] is the image of a 9 bit mask by symmetry s
+MASK_IMAGES = tuple(
+    tuple(
+        sum(1 << permutation[cell] for cell in range(SIZE * SIZE) if mask >> cell & 1)
+        for mask in range(FULL + 1)
+    )
+    for permutation in SYMMETRIES
+)
+SHIFT = SIZE * SIZE
+
+
+class TranspositionTable:
+    """Values of searched positions, keyed up to symmetry.
+
+    Use key(board) once per position, then probe(key) before searching it
+    and store(key, value, flag) after. counters() gives the number of
+    probes, hits (an entry was found), cutoffs (the entry alone gave the
+    value) and stores.
+    """
+
+    def __init__(self, symmetries=True):
+        self.symmetries = symmetries
+        self.entries = dict()
+        self.probes = 0
+        self.hits = 0
+        self.cutoffs = 0
+        self.stores = 0
+
+    def __len__(self):
+        return len(self.entries)
+
+    def key(self, board):
+        player1, player2 = board.masks[1], board.masks[2]
+        if not self.symmetries:
+            return player1 | player2 << SHIFT
+        return min(images[player1] | images[player2] << SHIFT for images in MASK_IMAGES)
+
+    def probe(self, key):
+        """(value, flag) stored for key, or None"""
+        self.probes += 1
+        entry = self.entries.get(key)
+        if entry is not None:
+            self.hits += 1
+        return entry
+
+    def store(self, key, value, flag=EXACT):
+        self.entries[key] = (value, flag)
+        self.stores += 1
+
+    def clear(self):
+        self.entries.clear()
+
+    def counters(self):
+        return {
+            "entries": len(self.entries),
+            "probes": self.probes,
+            "hits": self.hits,
+            "cutoffs": self.cutoffs,
+            "stores": self.stores,
+            "hit_rate": self.hits / self.probes if self.probes else 0.0,
+        }
+
+    def save(self, path):
+        keys = np.fromiter(self.entries, dtype=np.int64, count=len(self.entries))
+        values = np.array(list(self.entries.values()), dtype=np.int8).reshape(-1, 2)
+        np.savez(
+            path,
+            version=np.asarray(TABLE_VERSION),
+            symmetries=np.asarray(self.symmetries),
+            keys=keys,
+            values=values,
+        )
+
+    @classmethod
+    def load(cls, path):
+        """Read a saved table, None if missing or of another version"""
+        if path is None or not os.path.exists(path):
+            return None
+        with np.load(path) as data:
+            if int(data["version"]) != TABLE_VERSION:
+                return None
+            table = cls(bool(data["symmetries"]))
+            table.entries = dict(
+                zip(
+                    data["keys"].tolist(),
+                    map(tuple, data["values"].tolist()),
+                )
+            )
+        return table
@@ -0,0 +1,30 @@
+"""Engine values with the transposition table kept from one move to the next"""
+
+import random
+
+import pytest
+
+from src.morpion.engine import Engine
+from src.morpion.mnk import MNKBoard, MNKGame
+
+
+@pytest.mark.parametrize("dimensions", [(3, 3, 3), (4, 3, 3), (4, 4, 3)])
+def test_kept_table_gives_fresh_values(dimensions):
+    """A forced win is worth the same with the table of the previous moves"""
+    game = MNKGame(*dimensions)
+    rng = random.Random(0)
+    for _ in range(5):
+        kept = Engine(game, time_budget=100)
+        board = MNKBoard(game)
+        player = 2
+        for _ in range(rng.randint(0, 2)):
+            board.make(rng.choice(board.candidates()), player)
+            player = 3 - player
+        while not board.is_full() and not (
+            board.moves and board.wins_at(board.moves[-1], 3 - player)
+        ):
+            cell, value = kept.choose(board, player)
+            _, fresh = Engine(game, time_budget=100).choose(board, player)
+            assert value == fresh
+            board.make(cell, player)
+            player = 3 - player
@@ -0,0 +1,34 @@
+"""Perfect play table against plain minimax"""
+
+import pytest
+
+from src.morpion import BitBoard
+from src.morpion.solver import PerfectPlay, decode, encode, verify
+
+
+@pytest.fixture(scope="module")
+def table():
+    return PerfectPlay.solve()
+
+
+def test_reachable_positions(table):
+    assert table.reachable() == 5478
+
+
+def test_encode_decode(table):
+    board = BitBoard()
+    assert encode(board) == 0
+    for code in range(0, 3**9, 97):
+        assert encode(decode(code)) == code
+
+
+def test_same_as_minimax(table):
+    assert verify(table) == []
+
+
+def test_save_load(table, tmp_path):
+    path = tmp_path / "perfect_play.npz"
+    table.save(path)
+    loaded = PerfectPlay.load(str(path))
+    assert (loaded.values == table.values).all()
+    assert (loaded.moves == table.moves).all()